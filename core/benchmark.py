@@ -0,0 +1,243 @@
+# pollpro_backend/core/benchmark.py
+import asyncio
+import http.client
+import json
+import socket
+import statistics
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer, WSGIRequestHandler, WSGIServer, get_internal_wsgi_application,
+)
+from django.db import connection
+
+BENCHMARK_HEADER = 'X-Benchmark-Endpoint'
+LOCAL_HOSTS = {'', 'localhost', '127.0.0.1', '::1'}
+
+# build(i) returns (path, json_body_or_None, bearer_token_or_None) for the i-th request
+Endpoint = namedtuple('Endpoint', ['name', 'method', 'build'])
+
+
+def is_local_database(connection):
+    """Whether `connection` is SQLite or a server on this machine (loopback or a Unix socket)."""
+    if connection.vendor == 'sqlite':
+        return True
+    host = connection.settings_dict.get('HOST') or ''
+    return host in LOCAL_HOSTS or host.startswith('/')
+
+
+class QueryCountingApp:
+    """WSGI wrapper that tallies DB queries per benchmarked endpoint (in-process server only)."""
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = threading.Lock()
+        self.queries = defaultdict(int)
+
+    def __call__(self, environ, start_response):
+        name = environ.get('HTTP_' + BENCHMARK_HEADER.upper().replace('-', '_'))
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            # Drain streaming responses inside the wrapper so their queries are counted too
+            body = list(self.app(environ, start_response))
+        if name:
+            with self.lock:
+                self.queries[name] += count
+        return body
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class LocalServer:
+    """Serve the project's WSGI application from a background thread on an ephemeral port."""
+
+    def __init__(self, host='127.0.0.1'):
+        self.app = QueryCountingApp(get_internal_wsgi_application())
+        self.httpd = ThreadedWSGIServer((host, 0), _QuietHandler, allow_reuse_address=False)
+        self.httpd.set_app(self.app)
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class PooledWSGIServer(WSGIServer):
+    """A WSGI server with a fixed pool of worker threads, like a deployment of N sync workers."""
+    request_queue_size = 4096
+
+    def __init__(self, *args, workers, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class PooledWSGIServerThread:
+    """Serve the project's WSGI application from `workers` threads on an ephemeral port."""
+
+    def __init__(self, workers, host='127.0.0.1'):
+        self.httpd = PooledWSGIServer((host, 0), _QuietHandler, allow_reuse_address=False, workers=workers)
+        self.httpd.set_app(get_internal_wsgi_application())
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ASGIServerThread:
+    """Serve pollpro_backend.asgi (async read views included) with uvicorn from a background thread."""
+
+    def __init__(self, host='127.0.0.1'):
+        import uvicorn
+        from pollpro_backend.asgi import application
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.bind((host, 0))
+        self.server = uvicorn.Server(
+            uvicorn.Config(application, lifespan='off', log_level='warning', backlog=4096, timeout_keep_alive=1)
+        )
+        self.base_url = f"http://{host}:{self.socket.getsockname()[1]}"
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.run, kwargs={'sockets': [self.socket]}, daemon=True)
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
+        self.socket.close()
+
+
+def simulated_db_latency(seconds):
+    """An execute wrapper that stalls each query, standing in for a database across the network."""
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+    return wrapper
+
+
+async def _fetch(host, port, path, timeout):
+    # One request per connection, like clients that each hold their own socket
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\nConnection: close\r\n\r\n".encode()
+        )
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+def run_connections(base_url, paths, requests, connections, timeout=60):
+    """
+    Fire `requests` GETs, cycling through `paths`, from `connections` concurrent asyncio clients
+    (one socket each, so the server holds that many connections at once).
+    """
+    target = urlsplit(base_url)
+    counter = iter(range(requests))
+    samples = []
+
+    async def client():
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                code = await _fetch(target.hostname, target.port, paths[i % len(paths)], timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                code = 599
+            samples.append((time.perf_counter() - started, code))
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(connections)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return samples, time.perf_counter() - started
+
+
+def _send(base_url, endpoint, i):
+    path, body, token = endpoint.build(i)
+    target = urlsplit(base_url)
+    headers = {BENCHMARK_HEADER: endpoint.name, 'Accept': 'application/json'}
+    payload = None
+    if body is not None:
+        payload = json.dumps(body).encode()
+        headers['Content-Type'] = 'application/json'
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn = http.client.HTTPConnection(target.hostname, target.port, timeout=60)
+    try:
+        started = time.perf_counter()
+        conn.request(endpoint.method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return time.perf_counter() - started, response.status
+    finally:
+        conn.close()
+
+
+def run_endpoint(base_url, endpoint, requests, concurrency):
+    """Fire `requests` calls at one endpoint from `concurrency` client threads."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda i: _send(base_url, endpoint, i), range(requests)))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed, queries=None):
+    latencies = sorted(latency for latency, _ in samples)
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    statuses = defaultdict(int)
+    for _, code in samples:
+        statuses[str(code)] += 1
+    return {
+        'requests': len(samples),
+        'errors': sum(count for code, count in statuses.items() if int(code) >= 400),
+        'statuses': dict(sorted(statuses.items())),
+        'requests_per_sec': round(len(samples) / elapsed, 1),
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies) * 1000, 2),
+            'p50': round(cuts[49] * 1000, 2),
+            'p95': round(cuts[94] * 1000, 2),
+            'p99': round(cuts[98] * 1000, 2),
+        },
+        'queries_per_request': round(queries / len(samples), 2) if queries is not None else None,
+    }
@@ -0,0 +1,40 @@
+# pollpro_backend/core/db.py
+import random
+from contextvars import ContextVar
+from django.conf import settings
+
+# Set per request by core.middleware.ReplicaRoutingMiddleware; reads outside a request
+# (management commands, shells, workers) always use the primary
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def allow_replica_reads(allowed):
+    """Route the reads of the current context to replicas (or not); returns a token for reset_replica_reads()."""
+    return _replica_reads.set(allowed)
+
+
+def reset_replica_reads(token):
+    _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Reads go to a random replica from settings.DATABASE_REPLICAS when the current request
+    allows it; writes, migrations and everything else stay on the primary ('default').
+    Replicas mirror the primary, so relations across aliases are always allowed.
+    """
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _replica_reads.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Never follow an instance that was read from a replica back to it
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
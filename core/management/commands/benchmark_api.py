@@ -0,0 +1,250 @@
+# pollpro_backend/core/management/commands/benchmark_api.py
+import json
+import subprocess
+from datetime import timedelta
+from importlib import import_module
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import CustomUser
+from users.tokens import access_token_for
+from polls.models import Poll, Option, Vote
+from polls.counters import adjust_vote_counters
+from polls.seeding import delete_seeded_data, seed_polls
+from pollpro_admin.rollups import roll_up_votes
+from polls.trending import refresh_trending
+from core.benchmark import Endpoint, LocalServer, is_local_database, run_endpoint, summarize
+
+BENCH_PREFIX = '__bench_'
+BENCH_PASSWORD = 'bench-Pass-4821'
+URLCONFS = ('polls.urls', 'users.urls', 'pollpro_admin.urls')
+# URL names deliberately left out of request/response benchmarking
+SKIPPED = {
+    'poll_results_stream': "long-lived SSE stream, not a request/response endpoint",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a dataset, start the API on a local port and drive every URL of the polls, users and "
+        "pollpro_admin apps with concurrent clients. Reports p50/p95/p99 latency, requests/sec and "
+        "DB queries per request, optionally as JSON for diffing between commits. "
+        "Writes to the configured database: point it at a disposable SQLite file or local Postgres. "
+        "The seeded dataset and benchmark rows are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--polls', type=int, default=500, help="Polls to seed.")
+        parser.add_argument('--users', type=int, default=200, help="Users to seed.")
+        parser.add_argument('--votes-per-poll', type=int, default=20, help="Votes to seed per poll.")
+        parser.add_argument('--no-seed', action='store_true', help="Reuse the data already in the database.")
+        parser.add_argument('--keep-seed', action='store_true', help="Leave the seeded dataset in place for later --no-seed runs.")
+        parser.add_argument('--allow-remote', action='store_true', help="Run even when the database is not on this machine.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Concurrent client threads.")
+        parser.add_argument('--only', action='append', help="Benchmark only the given URL name (repeatable).")
+        parser.add_argument('--base-url', help="Benchmark an already running server instead (no query counts).")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if not options['allow_remote'] and not is_local_database(connection):
+            raise CommandError(
+                f"Refusing to write benchmark data to the database at {connection.settings_dict['HOST']}. "
+                "Point it at SQLite or a local server, or pass --allow-remote."
+            )
+        if not options['no_seed']:
+            self.stdout.write("Seeding dataset...")
+            seed_polls(polls=options['polls'], users=options['users'], votes_per_poll=options['votes_per_poll'])
+
+        try:
+            endpoints = self.build_endpoints(options['requests'])
+            self.check_coverage(endpoints)
+            if options['only']:
+                endpoints = [endpoint for endpoint in endpoints if endpoint.name in options['only']]
+
+            if options['base_url']:
+                report = self.run(options['base_url'], endpoints, options, query_counts=None)
+            else:
+                with LocalServer() as server:
+                    report = self.run(server.base_url, endpoints, options, query_counts=server.app.queries)
+        finally:
+            CustomUser.objects.filter(username__startswith=BENCH_PREFIX).delete()
+            if not options['no_seed'] and not options['keep_seed']:
+                delete_seeded_data()
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def run(self, base_url, endpoints, options, query_counts):
+        results = {}
+        self.stdout.write(f"{'endpoint':<36}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'errors':>8}")
+        for endpoint in endpoints:
+            samples, elapsed = run_endpoint(base_url, endpoint, options['requests'], options['concurrency'])
+            queries = query_counts.get(endpoint.name, 0) if query_counts is not None else None
+            summary = summarize(samples, elapsed, queries)
+            results[endpoint.name] = summary
+            latency = summary['latency_ms']
+            self.stdout.write(
+                f"{endpoint.name:<36}{summary['requests_per_sec']:>9}{latency['p50']:>9}{latency['p95']:>9}"
+                f"{latency['p99']:>9}{str(summary['queries_per_request']):>9}{summary['errors']:>8}"
+            )
+        return {
+            'meta': {
+                'commit': self.git_revision(),
+                'database': connection.vendor,
+                'requests_per_endpoint': options['requests'],
+                'concurrency': options['concurrency'],
+                'dataset': {
+                    'polls': Poll.objects.count(),
+                    'votes': Vote.objects.count(),
+                    'users': CustomUser.objects.count(),
+                },
+                'timestamp': timezone.now().isoformat(),
+            },
+            'endpoints': results,
+        }
+
+    def git_revision(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def check_coverage(self, endpoints):
+        """Fail loudly when a URL is added without a benchmark scenario."""
+        covered = {endpoint.name for endpoint in endpoints}
+        names = {
+            pattern.name for urlconf in URLCONFS for pattern in import_module(urlconf).urlpatterns if pattern.name
+        }
+        missing = names - covered - set(SKIPPED)
+        if missing:
+            raise CommandError(f"No benchmark scenario for: {', '.join(sorted(missing))}")
+
+    def build_endpoints(self, requests):
+        admin = CustomUser.objects.create_user(
+            username=f'{BENCH_PREFIX}admin', password=BENCH_PASSWORD, roles='admin'
+        )
+        admin_token = str(access_token_for(admin))
+        refresh_token = str(RefreshToken.for_user(admin))
+        # Logout also revokes the access token it was sent with, so every request brings its own
+        logout_tokens = [(str(RefreshToken.for_user(admin)), str(access_token_for(admin))) for _ in range(requests)]
+
+        # One voter per request so every vote and retract is a fresh, valid operation
+        CustomUser.objects.bulk_create(
+            CustomUser(username=f'{BENCH_PREFIX}voter_{i}', password='!') for i in range(requests)
+        )
+        voters = list(CustomUser.objects.filter(username__startswith=f'{BENCH_PREFIX}voter_').order_by('id'))
+        voter_tokens = [str(access_token_for(voter)) for voter in voters]
+
+        target = Poll.objects.create(question="Benchmark vote target", creator=admin)
+        target_options = Option.objects.bulk_create(Option(poll=target, text=f"Choice {i}") for i in range(4))
+        doomed = Poll.objects.create(question="Benchmark delete target", creator=admin)
+        doomed_option = Option.objects.create(poll=doomed, text="Doomed")
+        Vote.objects.bulk_create(Vote(poll=doomed, option=doomed_option, user=voter) for voter in voters)
+        adjust_vote_counters([(doomed.id, doomed_option.id)] * len(voters))
+        doomed_votes = list(Vote.objects.filter(poll=doomed).order_by('id').values_list('id', flat=True))
+
+        # Each bulk request casts one ballot per bulk poll on behalf of a different voter
+        bulk_polls = Poll.objects.bulk_create(Poll(question=f"Benchmark bulk {i}", creator=admin) for i in range(10))
+        bulk_options = Option.objects.bulk_create(Option(poll=poll, text="Yes") for poll in bulk_polls)
+
+        # Analytics and the trending feed read the rollups, so count the seeded votes straight away
+        roll_up_votes(lag=timedelta(0))
+        refresh_trending()
+
+        poll_ids = list(Poll.objects.order_by('-total_votes').values_list('id', flat=True)[:100]) or [target.id]
+        user_ids = list(CustomUser.objects.order_by('id').values_list('id', flat=True)[:100])
+        run = timezone.now().strftime('%H%M%S%f')
+
+        def get(name, path, token=None):
+            return Endpoint(name, 'GET', lambda i: (path(i) if callable(path) else path, None, token))
+
+        def next_poll(i):
+            return poll_ids[i % len(poll_ids)]
+
+        def next_user(i):
+            return user_ids[i % len(user_ids)]
+
+        return [
+            # polls.urls
+            get('poll_list', reverse('poll_list')),
+            get('poll_list?category', reverse('poll_list') + '?category=TECH'),
+            get('category_choices', reverse('category_choices')),
+            get('poll_trending', reverse('poll_trending')),
+            get('poll_search', reverse('poll_search') + '?q=question'),
+            get('poll_search?category', reverse('poll_search') + '?q=option&category=TECH'),
+            get('poll_trending?category', reverse('poll_trending') + '?category=TECH'),
+            get('poll_detail', lambda i: reverse('poll_detail', args=[next_poll(i)])),
+            get('poll_results', lambda i: reverse('poll_results', args=[next_poll(i)])),
+            get('user_poll_history', reverse('user_poll_history'), voter_tokens[0]),
+            get('poll_user_votes', lambda i: reverse('poll_user_votes') + '?ids=' + ','.join(map(str, poll_ids)), voter_tokens[0]),
+            get('user_poll_list_create', reverse('user_poll_list_create'), admin_token),
+            get('user_poll_retrieve_update_destroy', reverse('user_poll_retrieve_update_destroy', args=[target.id]), admin_token),
+            Endpoint('poll_create', 'POST', lambda i: (
+                reverse('poll_create'),
+                {'question': f"Benchmark poll {i}", 'category': 'TECH', 'options': ['Yes', 'No']},
+                admin_token,
+            )),
+            Endpoint('poll_vote', 'POST', lambda i: (
+                reverse('poll_vote', args=[target.id]),
+                {'option': target_options[i % len(target_options)].id},
+                voter_tokens[i],
+            )),
+            Endpoint('vote_retract', 'DELETE', lambda i: (
+                reverse('vote_retract', args=[target.id]), None, voter_tokens[i],
+            )),
+            Endpoint('poll_vote_bulk', 'POST', lambda i: (
+                reverse('poll_vote_bulk'),
+                {'votes': [
+                    {'poll': option.poll_id, 'option': option.id, 'user': voters[i].id} for option in bulk_options
+                ]},
+                admin_token,
+            )),
+            # users.urls
+            Endpoint('register', 'POST', lambda i: (
+                reverse('register'),
+                {
+                    'username': f'{BENCH_PREFIX}reg_{run}_{i}',
+                    'email': f'{BENCH_PREFIX}{run}_{i}@example.com',
+                    'password': BENCH_PASSWORD,
+                    'password2': BENCH_PASSWORD,
+                },
+                None,
+            )),
+            Endpoint('login', 'POST', lambda i: (
+                reverse('login'), {'username': admin.username, 'password': BENCH_PASSWORD}, None,
+            )),
+            Endpoint('token_refresh', 'POST', lambda i: (reverse('token_refresh'), {'refresh': refresh_token}, None)),
+            get('user_detail', reverse('user_detail'), admin_token),
+            Endpoint('logout', 'POST', lambda i: (reverse('logout'), {'refresh': logout_tokens[i][0]}, logout_tokens[i][1])),
+            # pollpro_admin.urls
+            get('admin_user_list', reverse('admin_user_list'), admin_token),
+            get('admin_user_detail', lambda i: reverse('admin_user_detail', args=[next_user(i)]), admin_token),
+            get('admin_poll_list', reverse('admin_poll_list'), admin_token),
+            get('admin_poll_detail', lambda i: reverse('admin_poll_detail', args=[next_poll(i)]), admin_token),
+            Endpoint('admin_poll_import', 'POST', lambda i: (
+                reverse('admin_poll_import'),
+                {'polls': [
+                    {'question': f"Benchmark import {i}.{j}", 'category': 'EDU', 'options': ['A', 'B', 'C', 'D']}
+                    for j in range(100)
+                ]},
+                admin_token,
+            )),
+            get('admin_vote_list', reverse('admin_vote_list'), admin_token),
+            Endpoint('admin_vote_detail', 'DELETE', lambda i: (
+                reverse('admin_vote_detail', args=[doomed_votes[i]]), None, admin_token,
+            )),
+            get('admin_vote_queue', reverse('admin_vote_queue'), admin_token),
+            get('admin_vote_export', reverse('admin_vote_export'), admin_token),
+            get('admin_poll_export', reverse('admin_poll_export'), admin_token),
+            get('admin_user_export', reverse('admin_user_export'), admin_token),
+            get('admin_vote_analytics', reverse('admin_vote_analytics') + '?interval=hour', admin_token),
+            get('admin_top_polls', reverse('admin_top_polls') + '?limit=20', admin_token),
+        ]
@@ -0,0 +1,92 @@
+# pollpro_backend/core/management/commands/benchmark_concurrency.py
+import json
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from django.utils import timezone
+from polls.models import Poll
+from polls.seeding import seed_polls
+from core.benchmark import ASGIServerThread, PooledWSGIServerThread, run_connections, simulated_db_latency, summarize
+
+SERVERS = ('wsgi', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare sync WSGI workers with the ASGI stack (async read views) under many concurrent "
+        "connections: the poll list, detail, results and category reads are fired from one socket "
+        "per client. --db-latency-ms stalls every query to mimic a database across the network, "
+        "which is where a sync worker sits idle. Writes to the configured database when seeding."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--polls', type=int, default=500, help="Polls to seed.")
+        parser.add_argument('--users', type=int, default=200, help="Users to seed.")
+        parser.add_argument('--votes-per-poll', type=int, default=5, help="Votes to seed per poll.")
+        parser.add_argument('--no-seed', action='store_true', help="Reuse the data already in the database.")
+        parser.add_argument('--connections', type=int, default=1000, help="Concurrent client connections.")
+        parser.add_argument('--requests', type=int, default=5000, help="Requests per server.")
+        parser.add_argument('--wsgi-workers', type=int, default=16, help="Worker threads of the WSGI server.")
+        parser.add_argument('--db-latency-ms', type=float, default=5.0, help="Added to every query (0 to disable).")
+        parser.add_argument('--server', action='append', choices=SERVERS, help="Run only this server (repeatable).")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if not options['no_seed']:
+            self.stdout.write("Seeding dataset...")
+            seed_polls(polls=options['polls'], users=options['users'], votes_per_poll=options['votes_per_poll'])
+
+        poll_ids = list(Poll.objects.order_by('-id').values_list('id', flat=True)[:100])
+        paths = [reverse('poll_list'), reverse('poll_list') + '?category=TECH', reverse('category_choices')]
+        for poll_id in poll_ids:
+            paths += [reverse('poll_detail', args=[poll_id]), reverse('poll_results', args=[poll_id])]
+
+        latency = None
+        if options['db_latency_ms']:
+            latency = simulated_db_latency(options['db_latency_ms'] / 1000)
+
+            def install_latency(sender, connection, **kwargs):
+                if latency not in connection.execute_wrappers:
+                    connection.execute_wrappers.append(latency)
+            connection_created.connect(install_latency, weak=False, dispatch_uid='benchmark_concurrency.latency')
+
+        servers = {
+            'wsgi': lambda: PooledWSGIServerThread(options['wsgi_workers']),
+            'asgi': ASGIServerThread,
+        }
+        results = {}
+        self.stdout.write(f"{'server':<28}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'errors':>8}")
+        try:
+            for name in options['server'] or SERVERS:
+                with servers[name]() as server:
+                    samples, elapsed = run_connections(
+                        server.base_url, paths, options['requests'], options['connections']
+                    )
+                summary = summarize(samples, elapsed)
+                results[name] = summary
+                label = f"{name} ({options['wsgi_workers']} workers)" if name == 'wsgi' else name
+                latency_ms = summary['latency_ms']
+                self.stdout.write(
+                    f"{label:<28}{summary['requests_per_sec']:>9}{latency_ms['p50']:>9}{latency_ms['p95']:>9}"
+                    f"{latency_ms['p99']:>9}{summary['errors']:>8}"
+                )
+        finally:
+            if latency is not None:
+                connection_created.disconnect(dispatch_uid='benchmark_concurrency.latency')
+
+        report = {
+            'meta': {
+                'database': connection.vendor,
+                'connections': options['connections'],
+                'requests': options['requests'],
+                'wsgi_workers': options['wsgi_workers'],
+                'db_latency_ms': options['db_latency_ms'],
+                'timestamp': timezone.now().isoformat(),
+            },
+            'servers': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,84 @@
+# pollpro_backend/core/management/commands/benchmark_serializers.py
+import json
+import statistics
+import time
+from types import SimpleNamespace
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from core.renderers import ORJSONRenderer
+from polls.models import Poll
+from polls.payloads import RESULT_FIELDS, build_polls, build_results, option_rows, poll_rows
+from polls.seeding import seed_polls
+from polls.serializers import PollSerializer, PollResultSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Time serialize+render of one page of polls, DRF serializers with the stock JSON renderer "
+        "against the fast-path payloads (polls.payloads) with the orjson renderer. The data is "
+        "loaded up front, so only CPU time is measured."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help="Polls per page.")
+        parser.add_argument('--iterations', type=int, default=200, help="Timed runs per variant.")
+        parser.add_argument('--seed', action='store_true', help="Seed polls first (writes to the database).")
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            seed_polls(polls=options['page_size'], users=50, votes_per_poll=20)
+        page_size = options['page_size']
+        ids = list(Poll.objects.order_by('-created_at', 'id').values_list('id', flat=True)[:page_size])
+        if len(ids) < page_size:
+            raise CommandError(f"Need {page_size} polls, found {len(ids)}; pass --seed to create them.")
+
+        user = AnonymousUser()
+        polls = list(Poll.objects.for_listing().filter(pk__in=ids).order_by('-created_at', 'id'))
+        rows = list(poll_rows(Poll.objects.filter(pk__in=ids).order_by('-created_at', 'id')))
+        options_ = list(option_rows(ids))
+        result_polls = list(Poll.objects.select_related('result_snapshot').prefetch_related('options').filter(pk__in=ids))
+        result_rows = list(poll_rows(Poll.objects.filter(pk__in=ids), RESULT_FIELDS))
+        options_by_poll = {}
+        for option in options_:
+            options_by_poll.setdefault(option[0], []).append(option)
+
+        drf, fast = JSONRenderer(), ORJSONRenderer()
+        variants = {
+            'poll_list drf': lambda: drf.render(
+                PollSerializer(polls, many=True, context={'request': SimpleNamespace(user=user)}).data
+            ),
+            'poll_list fast': lambda: fast.render(build_polls(rows, options_, None)),
+            'poll_results drf': lambda: [drf.render(PollResultSerializer(poll).data) for poll in result_polls],
+            'poll_results fast': lambda: [
+                fast.render(build_results(row, options_by_poll.get(row['id'], ())))
+                for row in result_rows
+            ],
+        }
+
+        report = {}
+        self.stdout.write(f"{'variant':<22}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'bytes':>10}")
+        for name, run in variants.items():
+            output = run()
+            size = len(output) if isinstance(output, bytes) else sum(len(chunk) for chunk in output)
+            timings = []
+            for _ in range(options['iterations']):
+                started = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - started) * 1000)
+            cuts = statistics.quantiles(timings, n=100, method='inclusive')
+            report[name] = {
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'p50_ms': round(cuts[49], 3),
+                'p95_ms': round(cuts[94], 3),
+                'bytes': size,
+            }
+            self.stdout.write(
+                f"{name:<22}{report[name]['mean_ms']:>10}{report[name]['p50_ms']:>10}{report[name]['p95_ms']:>10}{size:>10}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({'page_size': page_size, 'iterations': options['iterations'], 'variants': report}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,124 @@
+# pollpro_backend/core/metrics.py
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# The RequestMetrics of the request being served. A context variable rather than a per-request
+# execute_wrapper: connections are per thread, and the async ORM queries from worker threads
+# that inherit the request's context
+_current = ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised instead of logged when settings.QUERY_BUDGET_STRICT is on (the test runner turns it on)."""
+
+
+def query_budget(max_queries):
+    """
+    Declare the most DB queries one request to a view may run, e.g. `@query_budget(5)` on a
+    class-based view or a view function. core.middleware.RequestMetricsMiddleware checks it.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def budget_of(view_func):
+    # as_view() does not copy class attributes onto the view function, but keeps the class
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'view_class', None), 'query_budget', None)
+    return budget
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver: put record_query first, outside any temporary execute_wrapper()."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def start_recording(metrics):
+    """Attribute the queries of the current context to `metrics`; returns a token for stop_recording()."""
+    return _current.set(metrics)
+
+
+def stop_recording(token):
+    _current.reset(token)
+
+
+@contextmanager
+def unmetered():
+    """
+    Leave the queries of the block out of the current request's count and budget, e.g. a
+    process-wide cache reload that whichever request comes first happens to trigger.
+    """
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def unmetered():
+    """
+    Leave the queries of the block out of the current request's count and budget, e.g. a
+    process-wide cache reload that whichever request comes first happens to trigger.
+    """
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class RequestMetrics:
+    """Query count and timings of one request, in milliseconds."""
+    __slots__ = ('queries', 'db', 'view', 'render', 'total', 'budget', '_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = self.view = self.render = self.total = 0.0
+        self.budget = None
+        self._started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += (time.perf_counter() - start) * 1000
+            self.queries += 1
+
+    def start(self, name):
+        self._started = (name, time.perf_counter())
+
+    def stop(self):
+        if self._started is not None:
+            name, start = self._started
+            setattr(self, name, getattr(self, name) + (time.perf_counter() - start) * 1000)
+            self._started = None
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.db:.1f};desc="{self.queries} queries", view;dur={self.view:.1f}, '
+            f'render;dur={self.render:.1f}, total;dur={self.total:.1f}'
+        )
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db, 2),
+            'view_ms': round(self.view, 2),
+            'render_ms': round(self.render, 2),
+            'total_ms': round(self.total, 2),
+            'query_budget': self.budget,
+        }
@@ -0,0 +1,142 @@
+# pollpro_backend/core/middleware.py
+import json
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .db import allow_replica_reads, reset_replica_reads
+from .metrics import QueryBudgetExceeded, RequestMetrics, budget_of, start_recording, stop_recording
+
+logger = logging.getLogger('pollpro.requests')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'pin_primary'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let safe requests read from replicas, with read-your-writes stickiness: a successful
+    write sets a short-lived cookie that keeps the client on the primary until replication
+    has caught up, so e.g. `user_vote` reflects a vote cast a moment ago.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = allow_replica_reads(self.reads_from_replica(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica_reads(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = allow_replica_reads(self.reads_from_replica(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_replica_reads(token)
+        return self.pin(request, response)
+
+    def reads_from_replica(self, request):
+        if not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return False
+        try:
+            pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+        except ValueError:
+            pinned_until = 0
+        return pinned_until <= time.time()
+
+    def pin(self, request, response):
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS and response.status_code < 400:
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(time.time() + seconds), max_age=seconds, httponly=True, samesite='Lax'
+            )
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Count the DB queries of every request and time its DB work, view and rendering of
+    DRF/template responses (serializer .data is built in the view, so it counts as view time).
+    Reports them in a Server-Timing header and one JSON log line on the `pollpro.requests`
+    logger, and checks the view's @query_budget: a breach is logged as a warning, or raised as
+    QueryBudgetExceeded when settings.QUERY_BUDGET_STRICT is on.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = self.begin(request)
+        token = start_recording(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_recording(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.begin(request)
+        token = start_recording(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_recording(token)
+        return self.finish(request, response, metrics)
+
+    def begin(self, request):
+        metrics = request.metrics = RequestMetrics()
+        # The view timer also covers the inner middleware; rendering is timed separately below
+        metrics.start('view')
+        return metrics
+
+    def process_template_response(self, request, response):
+        metrics = request.metrics
+        metrics.stop()
+        metrics.start('render')
+        response.add_post_render_callback(lambda rendered: metrics.stop())
+        return response
+
+    def finish(self, request, response, metrics):
+        # Responses that were not rendered by Django leave the view timer running until here
+        metrics.stop()
+        metrics.total = metrics.view + metrics.render
+        match = request.resolver_match
+        if match is not None:
+            metrics.budget = budget_of(match.func)
+        self.report(request, response, metrics)
+        return response
+
+    def report(self, request, response, metrics):
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = metrics.server_timing()
+        over_budget = metrics.budget is not None and metrics.queries > metrics.budget
+        match = request.resolver_match
+        view = match.view_name if match else None
+        if over_budget and settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(f"{view} ran {metrics.queries} queries, over its budget of {metrics.budget}")
+        level = logging.WARNING if over_budget else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'view': view,
+                'status': response.status_code,
+                **metrics.as_dict(),
+                'over_budget': over_budget,
+            }))
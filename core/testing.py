@@ -0,0 +1,11 @@
+# pollpro_backend/core/testing.py
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """Run the suite with query budgets enforced, so a view that grows extra queries fails its tests."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_BUDGET_STRICT = True
@@ -1,3 +1,183 @@
-from django.test import TestCase
+import json
+from contextlib import ExitStack
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+from rest_framework.test import APIClient
+from users.authentication import revocations
+from users.models import CustomUser
+from users.tokens import access_token_for
+from polls.models import Poll, Option
+from .benchmark import is_local_database
+from .metrics import QueryBudgetExceeded, query_budget
+from .middleware import PIN_COOKIE, ReplicaRoutingMiddleware
 
-# Create your tests here.
+
+def read_alias(request):
+    return HttpResponse(router.db_for_read(Poll) or 'default')
+
+
+def write_alias(request):
+    return HttpResponse(router.db_for_write(Poll))
+
+
+@query_budget(1)
+def two_queries(request):
+    return HttpResponse(f"{Poll.objects.count()} polls, {Option.objects.count()} options")
+
+
+urlpatterns = [path('two-queries/', two_queries)]
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'], REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def alias(self, request, view=read_alias):
+        response = ReplicaRoutingMiddleware(view)(request)
+        return response.content.decode(), response
+
+    def test_safe_requests_read_from_replicas(self):
+        self.assertEqual(self.alias(self.factory.get('/'))[0], 'replica_0')
+
+    def test_unsafe_requests_stay_on_primary(self):
+        self.assertEqual(self.alias(self.factory.post('/'))[0], 'default')
+
+    def test_writes_always_go_to_primary(self):
+        self.assertEqual(self.alias(self.factory.get('/'), view=write_alias)[0], 'default')
+
+    def test_write_pins_client_to_primary(self):
+        _, response = self.alias(self.factory.post('/'))
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = cookie.value
+        self.assertEqual(self.alias(request)[0], 'default')
+
+    def test_expired_pin_reads_from_replicas_again(self):
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1000.0'
+        self.assertEqual(self.alias(request)[0], 'replica_0')
+
+    def test_failed_writes_do_not_pin(self):
+        def rejected(request):
+            return HttpResponse(status=400)
+        _, response = self.alias(self.factory.post('/'), view=rejected)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(router.db_for_read(Poll), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        _, response = self.alias(self.factory.post('/'))
+        self.assertEqual(self.alias(self.factory.get('/'))[0], 'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "Set DATABASE_REPLICA_URLS to run against a real replica alias")
+class ReplicaIntegrationTests(TransactionTestCase):
+    # The replica is a second connection: it only sees committed rows
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='voter', password='pass12345')
+        self.poll = Poll.objects.create(question="Replicated?", creator=self.user)
+        self.option = Option.objects.create(poll=self.poll, text="Yes")
+        self.client.force_authenticate(self.user)
+
+    def replica_queries(self, method, url, **kwargs):
+        replica = connections[settings.DATABASE_REPLICAS[0]]
+        with CaptureQueriesContext(replica) as ctx:
+            getattr(self.client, method)(url, **kwargs)
+        return len(ctx.captured_queries)
+
+    def test_voter_reads_own_vote_from_primary(self):
+        self.assertGreater(self.replica_queries('get', reverse('poll_list')), 0)
+        self.client.post(reverse('poll_vote', args=[self.poll.id]), {'option': self.option.id})
+        self.assertEqual(self.replica_queries('get', reverse('poll_list')), 0)
+
+
+class RequestMetricsTests(TestCase):
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def test_server_timing_reports_queries(self):
+        # Reads may go to a replica alias
+        contexts = [CaptureQueriesContext(connections[alias]) for alias in self.databases]
+        with ExitStack() as stack:
+            for ctx in contexts:
+                stack.enter_context(ctx)
+            response = self.client.get(reverse('poll_list'))
+        timing = response.headers['Server-Timing']
+        self.assertIn(f'desc="{sum(len(ctx.captured_queries) for ctx in contexts)} queries"', timing)
+        for metric in ('db;dur=', 'view;dur=', 'render;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_turned_off(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('poll_list')).headers)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_budget_breach_fails_under_test_runner(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'ran 2 queries, over its budget of 1'):
+            self.client.get('/two-queries/')
+
+    @override_settings(ROOT_URLCONF=__name__, QUERY_BUDGET_STRICT=False)
+    def test_budget_breach_is_logged_in_production(self):
+        with self.assertLogs('pollpro.requests', 'WARNING') as logs:
+            response = self.client.get('/two-queries/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('"over_budget": true', logs.output[0])
+        self.assertIn('"queries": 2', logs.output[0])
+
+    def test_revocation_reload_is_not_charged_to_the_request(self):
+        headers = {'authorization': f'Bearer {access_token_for(CustomUser.objects.create_user(username="u", password="x"))}'}
+
+        def queries():
+            with self.assertLogs('pollpro.requests', 'INFO') as logs:
+                self.client.get(reverse('poll_list'), headers=headers)
+            return json.loads(logs.records[0].getMessage())['queries']
+
+        revocations.clear()
+        reloading = queries()
+        self.assertFalse(revocations.is_stale())
+        self.assertEqual(reloading, queries())
+
+    def test_class_based_views_carry_their_budget(self):
+        with self.assertLogs('pollpro.requests', 'INFO') as logs:
+            self.client.get(reverse('poll_list'))
+        self.assertIn('"query_budget": 5', logs.output[0])
+
+
+class BenchmarkSafetyTests(TestCase):
+    def test_local_databases(self):
+        def postgres(host):
+            return SimpleNamespace(vendor='postgresql', settings_dict={'HOST': host})
+        self.assertTrue(is_local_database(connections['default']))
+        for host in ('', 'localhost', '127.0.0.1', '::1', '/var/run/postgresql'):
+            self.assertTrue(is_local_database(postgres(host)), host)
+        self.assertFalse(is_local_database(postgres('db.example.com')))
+
+    def test_remote_database_needs_allow_remote(self):
+        with mock.patch('core.management.commands.benchmark_api.is_local_database', return_value=False):
+            with self.assertRaisesMessage(CommandError, '--allow-remote'):
+                call_command('benchmark_api', stdout=StringIO())
+
+    def test_seeded_data_is_deleted(self):
+        call_command(
+            'benchmark_api', '--polls', '3', '--users', '5', '--votes-per-poll', '2', '--requests', '2',
+            '--concurrency', '1', '--only', 'category_choices', stdout=StringIO(),
+        )
+        self.assertFalse(CustomUser.objects.filter(username__startswith='__').exists())
+        self.assertFalse(Poll.objects.exists())
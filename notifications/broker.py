@@ -0,0 +1,111 @@
+# pollpro_backend/notifications/broker.py
+import asyncio
+import json
+import threading
+import uuid
+from collections import defaultdict, deque
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class Subscription:
+    def __init__(self, topic, loop, queue_size):
+        self.topic = topic
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+
+class Broker:
+    """
+    In-process pub/sub for Server-Sent Events. Publishing formats an event once and hands
+    it to every subscriber's event loop, so one change reaches any number of open streams
+    without touching the database. A short per-topic history lets reconnecting clients
+    resume from Last-Event-ID.
+
+    Event ids are `<epoch>-<seq>`: the epoch changes with every process, so an id issued by
+    another worker or before a restart is never mistaken for a resumable position.
+    """
+
+    def __init__(self, history=500, queue_size=256):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._history = defaultdict(lambda: deque(maxlen=history))
+        self._seq = defaultdict(int)
+
+    def subscribe(self, topic, max_subscribers=None):
+        """Return a Subscription bound to the running loop, or None when the topic is full."""
+        subscription = Subscription(topic, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if max_subscribers is not None and len(self._subscribers[topic]) >= max_subscribers:
+                return None
+            self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+
+    def subscriber_count(self, topic):
+        with self._lock:
+            return len(self._subscribers.get(topic, ()))
+
+    def last_seq(self, topic):
+        with self._lock:
+            return self._seq[topic]
+
+    def format(self, seq, event, data):
+        payload = json.dumps(data, cls=DjangoJSONEncoder)
+        return f"id: {self.epoch}-{seq}\nevent: {event}\ndata: {payload}\n\n"
+
+    def publish(self, topic, event, data):
+        """Thread-safe: may be called from sync request threads as well as from event loops."""
+        with self._lock:
+            self._seq[topic] += 1
+            seq = self._seq[topic]
+            message = (seq, self.format(seq, event, data))
+            self._history[topic].append(message)
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(self._deliver, subscription, message)
+            except RuntimeError:
+                # The subscriber's event loop is gone
+                self.unsubscribe(subscription)
+
+    def _deliver(self, subscription, message):
+        try:
+            subscription.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client this far behind is dropped: swap its backlog for the end-of-stream
+            # marker, and it resumes or resyncs when it reconnects
+            self.unsubscribe(subscription)
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(None)
+
+    def replay(self, topic, last_event_id):
+        """
+        Messages published after `last_event_id`, or None when that position cannot be
+        resumed (unknown epoch, malformed id, or already evicted from the history).
+        """
+        epoch, _, seq = (last_event_id or '').partition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        with self._lock:
+            history = list(self._history.get(topic, ()))
+            current = self._seq[topic]
+        if seq > current:
+            return None
+        missed = [message for message in history if message[0] > seq]
+        if current - seq > len(missed):
+            return None
+        return missed
+
+
+broker = Broker()
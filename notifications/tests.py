@@ -1,3 +1,144 @@
-from django.test import TestCase
+import asyncio
+import json
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from users.models import CustomUser
+from polls.models import Poll, Option
+from polls.counters import results_topic
+from polls.voting import cast_vote
+from .broker import Broker, broker
 
-# Create your tests here.
+
+class BrokerTests(SimpleTestCase):
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_publish_fans_out_to_every_subscriber(self):
+        async def scenario():
+            broker = Broker()
+            subscriptions = [broker.subscribe('topic') for _ in range(3)]
+            broker.publish('topic', 'delta', {'n': 1})
+            await asyncio.sleep(0)
+            return [s.queue.get_nowait()[1] for s in subscriptions]
+
+        messages = self.run_async(scenario())
+        self.assertEqual(len(set(messages)), 1)
+        self.assertIn('event: delta', messages[0])
+
+    def test_subscriber_cap(self):
+        async def scenario():
+            broker = Broker()
+            first = broker.subscribe('topic', max_subscribers=1)
+            second = broker.subscribe('topic', max_subscribers=1)
+            broker.unsubscribe(first)
+            third = broker.subscribe('topic', max_subscribers=1)
+            return first, second, third
+
+        first, second, third = self.run_async(scenario())
+        self.assertIsNotNone(first)
+        self.assertIsNone(second)
+        self.assertIsNotNone(third)
+
+    def test_replay_from_last_event_id(self):
+        broker = Broker(history=2)
+        for n in range(3):
+            broker.publish('topic', 'delta', {'n': n})
+        self.assertEqual([seq for seq, _ in broker.replay('topic', f'{broker.epoch}-2')], [3])
+        self.assertEqual(broker.replay('topic', f'{broker.epoch}-3'), [])
+        # Event 2 was evicted, and ids from another process cannot be resumed
+        self.assertIsNone(broker.replay('topic', f'{broker.epoch}-0'))
+        self.assertIsNone(broker.replay('topic', 'deadbeef-2'))
+
+    def test_slow_subscriber_is_dropped(self):
+        async def scenario():
+            broker = Broker(queue_size=1)
+            subscription = broker.subscribe('topic')
+            broker.publish('topic', 'delta', {})
+            broker.publish('topic', 'delta', {})
+            await asyncio.sleep(0)
+            return broker, subscription
+
+        broker, subscription = self.run_async(scenario())
+        self.assertIsNone(subscription.queue.get_nowait())
+        self.assertEqual(broker.subscriber_count('topic'), 0)
+
+
+def event(message):
+    fields = dict(line.split(': ', 1) for line in message.strip().splitlines())
+    return fields['id'], fields['event'], json.loads(fields['data'])
+
+
+class ResultsStreamViewTests(TestCase):
+    def setUp(self):
+        self.creator = CustomUser.objects.create_user(username='creator', password='pass12345')
+        self.poll = Poll.objects.create(question="Live", creator=self.creator)
+        self.option = Option.objects.create(poll=self.poll, text="Yes")
+        Option.objects.create(poll=self.poll, text="No")
+        self.url = reverse('poll_results_stream', args=[self.poll.id])
+
+    def vote(self, username):
+        voter = CustomUser.objects.create_user(username=username, password='pass12345')
+        with self.captureOnCommitCallbacks(execute=True):
+            cast_vote(self.poll.id, self.option.id, voter.id)
+
+    async def open(self, **headers):
+        return await self.async_client.get(self.url, headers=headers)
+
+    async def next_message(self, stream):
+        return (await asyncio.wait_for(anext(stream), 5)).decode()
+
+    def test_snapshot_then_delta_after_a_committed_vote(self):
+        async def scenario():
+            response = await self.open()
+            stream = response.streaming_content
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            self.assertTrue((await self.next_message(stream)).startswith('retry: '))
+            snapshot = event(await self.next_message(stream))
+            await sync_to_async(self.vote)('voter')
+            delta = event(await self.next_message(stream))
+            await stream.aclose()
+            return snapshot, delta
+
+        snapshot, delta = async_to_sync(scenario)()
+        self.assertEqual(snapshot[1], 'snapshot')
+        self.assertEqual([option['votes'] for option in snapshot[2]['options']], [0, 0])
+        self.assertEqual(delta[1], 'delta')
+        self.assertEqual(delta[2]['options'], [{'id': self.option.id, 'delta': 1}])
+        self.assertEqual(broker.subscriber_count(results_topic(self.poll.id)), 0)
+
+    def test_last_event_id_resumes_without_a_snapshot(self):
+        last_seen = f'{broker.epoch}-{broker.last_seq(results_topic(self.poll.id))}'
+        self.vote('missed')
+
+        async def scenario():
+            stream = (await self.open(last_event_id=last_seen)).streaming_content
+            await self.next_message(stream)
+            replayed = event(await self.next_message(stream))
+            await stream.aclose()
+            return replayed
+
+        replayed = async_to_sync(scenario)()
+        self.assertEqual(replayed[1], 'delta')
+        self.assertEqual(replayed[2]['total_delta'], 1)
+
+    @override_settings(RESULTS_STREAM_MAX_CONNECTIONS_PER_POLL=1)
+    def test_connection_cap(self):
+        async def scenario():
+            stream = (await self.open()).streaming_content
+            # The slot is taken once the stream is read, not when the response is built
+            unread = await self.open()
+            await self.next_message(stream)
+            await self.next_message(stream)
+            refused = await self.open()
+            await stream.aclose()
+            return unread, refused
+
+        unread, refused = async_to_sync(scenario)()
+        self.assertEqual(unread.status_code, 200)
+        self.assertEqual(refused.status_code, 503)
+        self.assertIn('Retry-After', refused)
+
+    def test_wsgi_requests_are_refused(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 501)
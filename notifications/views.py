@@ -1,3 +1,90 @@
-from django.shortcuts import render
+# pollpro_backend/notifications/views.py
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from polls.models import Poll
+from polls.cache import get_cached_results, cache_results
+from polls.payloads import results_payload
+from polls.counters import results_topic
+from .broker import broker
 
-# Create your views here.
+
+def _load_results(poll_id):
+    # Same cache as PollResultView, so a reconnect storm does not turn into a query storm
+    version, entry = get_cached_results(poll_id)
+    if entry is None:
+        # From the primary, like PollResultView: the entry is cached under the current version
+        found = results_payload(poll_id, using='default')
+        if found is None:
+            raise Poll.DoesNotExist
+        entry = cache_results(poll_id, version, *found)
+    return entry['data']
+
+
+async def _event_stream(topic, poll_id, last_event_id):
+    yield f"retry: {settings.RESULTS_STREAM_RETRY_MS}\n\n"
+    # Subscribed only once the stream is iterated: the finally below cannot run for a response
+    # that never is (client gone first, middleware short-circuit), which would hold the slot
+    subscription = broker.subscribe(topic, settings.RESULTS_STREAM_MAX_CONNECTIONS_PER_POLL)
+    if subscription is None:
+        # The last slot went since the view checked; the client reconnects after `retry`
+        return
+    try:
+        backlog = broker.replay(topic, last_event_id) if last_event_id else None
+        if backlog is None:
+            # Fresh connection, or a position we can no longer resume: send the full tally
+            sent = broker.last_seq(topic)
+            data = await sync_to_async(_load_results)(poll_id)
+            yield broker.format(sent, 'snapshot', data)
+        else:
+            sent = int(last_event_id.rpartition('-')[2])
+            for seq, message in backlog:
+                sent = seq
+                yield message
+
+        while True:
+            try:
+                item = await asyncio.wait_for(subscription.queue.get(), settings.RESULTS_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if item is None:
+                break
+            seq, message = item
+            # Anything already covered by the snapshot or the replayed backlog is skipped
+            if seq > sent:
+                sent = seq
+                yield message
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def poll_results_stream(request, pk):
+    """
+    Server-Sent Events stream of a poll's results: a `snapshot` event with the full tally,
+    then a `delta` event per committed vote or retraction (and a new `snapshot` when the
+    options are edited). Honors Last-Event-ID on reconnect. Only served through ASGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would drain this endless async generator and never return
+        return JsonResponse({"error": "Results streams are only served through ASGI"}, status=501)
+    if request.method != 'GET':
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    if not await Poll.objects.filter(pk=pk).aexists():
+        return JsonResponse({"error": "Poll not found"}, status=404)
+
+    topic = results_topic(pk)
+    if broker.subscriber_count(topic) >= settings.RESULTS_STREAM_MAX_CONNECTIONS_PER_POLL:
+        response = JsonResponse({"error": "Too many listeners on this poll, retry later"}, status=503)
+        response['Retry-After'] = str(settings.RESULTS_STREAM_RETRY_MS // 1000 or 1)
+        return response
+
+    response = StreamingHttpResponse(
+        _event_stream(topic, pk, request.headers.get('Last-Event-ID')),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
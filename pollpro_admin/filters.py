@@ -0,0 +1,59 @@
+# pollpro_backend/pollpro_admin/filters.py
+"""
+Query parameters of the admin list endpoints, applied by the default DjangoFilterBackend.
+`since` is inclusive and `until` exclusive, as on the export and analytics endpoints.
+"""
+import django_filters
+from drf_yasg import openapi
+from users.models import CustomUser
+from polls.models import Poll, Vote
+
+
+class UserFilter(django_filters.FilterSet):
+    role = django_filters.ChoiceFilter(field_name='roles', choices=CustomUser.ROLE_CHOICES)
+    is_active = django_filters.BooleanFilter()
+    since = django_filters.IsoDateTimeFilter(field_name='date_joined', lookup_expr='gte', help_text="Joined at or after")
+    until = django_filters.IsoDateTimeFilter(field_name='date_joined', lookup_expr='lt', help_text="Joined before")
+
+    class Meta:
+        model = CustomUser
+        fields = ('role', 'is_active', 'since', 'until')
+
+
+class PollFilter(django_filters.FilterSet):
+    category = django_filters.ChoiceFilter(choices=Poll.CATEGORY_CHOICES)
+    creator = django_filters.NumberFilter(field_name='creator_id', help_text="Creator user id")
+    since = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte', help_text="Created at or after")
+    until = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt', help_text="Created before")
+
+    class Meta:
+        model = Poll
+        fields = ('category', 'creator', 'since', 'until')
+
+
+class VoteFilter(django_filters.FilterSet):
+    poll = django_filters.NumberFilter(field_name='poll_id')
+    user = django_filters.NumberFilter(field_name='user_id')
+    category = django_filters.ChoiceFilter(field_name='poll__category', choices=Poll.CATEGORY_CHOICES)
+    since = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte', help_text="Cast at or after")
+    until = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt', help_text="Cast before")
+
+    class Meta:
+        model = Vote
+        fields = ('poll', 'user', 'category', 'since', 'until')
+
+
+def filter_parameters(filterset_class):
+    """Query parameters of a FilterSet for swagger_auto_schema; drf_yasg cannot read FilterSets itself."""
+    parameters = []
+    for name, field in filterset_class.base_filters.items():
+        if isinstance(field, django_filters.ChoiceFilter):
+            extra = {'type': openapi.TYPE_STRING, 'enum': [value for value, _ in field.extra['choices']]}
+        elif isinstance(field, django_filters.BooleanFilter):
+            extra = {'type': openapi.TYPE_BOOLEAN}
+        elif isinstance(field, django_filters.NumberFilter):
+            extra = {'type': openapi.TYPE_INTEGER}
+        else:
+            extra = {'type': openapi.TYPE_STRING, 'format': openapi.FORMAT_DATETIME}
+        parameters.append(openapi.Parameter(name, openapi.IN_QUERY, description=field.extra.get('help_text'), **extra))
+    return parameters
@@ -0,0 +1,105 @@
+# pollpro_backend/pollpro_admin/imports.py
+"""
+Bulk import of polls with their options, e.g. an event night's question bank. Every row is
+validated before anything is written. Valid rows are then inserted in chunks: each chunk is
+one transaction of two bulk_create()s (polls, then options) plus a search index refresh.
+"""
+import csv
+import json
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+from polls.models import Poll, Option
+from polls.search import index_polls
+
+FORMATS = ('csv', 'json')
+# Separates the options of a poll inside the CSV `options` column
+OPTION_SEPARATOR = '|'
+CSV_COLUMNS = ('question', 'category', 'expiry_date', 'options')
+
+
+class PollImportItemSerializer(serializers.Serializer):
+    question = serializers.CharField(max_length=255)
+    category = serializers.ChoiceField(choices=Poll.CATEGORY_CHOICES, default='TECH')
+    expiry_date = serializers.DateTimeField(required=False, allow_null=True)
+    options = serializers.ListField(child=serializers.CharField(max_length=255), min_length=2)
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be parsed at all, as opposed to rows that fail validation."""
+
+
+def read_rows(stream, format):
+    """
+    Parse polls from a text file object. JSON is a list of polls or {"polls": [...]}; CSV has
+    a header row with the CSV_COLUMNS and the options of a poll separated by OPTION_SEPARATOR.
+    Blank CSV cells are left out so the field defaults apply.
+    """
+    if format == 'json':
+        try:
+            data = json.load(stream)
+        except ValueError as exc:
+            raise ImportFormatError(f"Invalid JSON: {exc}")
+        if isinstance(data, dict):
+            data = data.get('polls')
+        if not isinstance(data, list):
+            raise ImportFormatError('Expected a list of polls or {"polls": [...]}.')
+        return data
+    reader = csv.DictReader(stream)
+    if reader.fieldnames is None or not {'question', 'options'} <= set(reader.fieldnames):
+        raise ImportFormatError(f"The CSV header must name the columns {', '.join(CSV_COLUMNS)}.")
+    rows = []
+    for record in reader:
+        row = {column: record[column].strip() for column in CSV_COLUMNS if (record.get(column) or '').strip()}
+        if 'options' in row:
+            row['options'] = [text.strip() for text in row['options'].split(OPTION_SEPARATOR) if text.strip()]
+        rows.append(row)
+    return rows
+
+
+def validate_rows(rows):
+    """Split parsed rows into [(row number, validated data)] and [{'row', 'errors'}]; rows count from 1."""
+    valid, errors = [], []
+    for number, row in enumerate(rows, 1):
+        item = PollImportItemSerializer(data=row)
+        if item.is_valid():
+            valid.append((number, item.validated_data))
+        else:
+            errors.append({'row': number, 'errors': item.errors})
+    return valid, errors
+
+
+def import_polls(items, creator, chunk_size=500, progress=None):
+    """
+    Insert validated (row number, data) items as polls of `creator`, `chunk_size` polls per
+    transaction. A chunk the database rejects is rolled back and reported; later chunks still
+    run. `progress(done, total)` is called after every chunk. Returns the report.
+    """
+    report = {'created': 0, 'options': 0, 'poll_ids': [], 'failed_chunks': []}
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        try:
+            with transaction.atomic():
+                polls = Poll.objects.bulk_create(
+                    Poll(
+                        question=data['question'],
+                        category=data['category'],
+                        expiry_date=data.get('expiry_date'),
+                        creator=creator,
+                    )
+                    for _, data in chunk
+                )
+                options = Option.objects.bulk_create(
+                    Option(poll=poll, text=text)
+                    for poll, (_, data) in zip(polls, chunk)
+                    for text in data['options']
+                )
+                index_polls(poll.id for poll in polls)
+        except DatabaseError as exc:
+            report['failed_chunks'].append({'rows': [chunk[0][0], chunk[-1][0]], 'error': str(exc)})
+        else:
+            report['created'] += len(polls)
+            report['options'] += len(options)
+            report['poll_ids'] += [poll.id for poll in polls]
+        if progress is not None:
+            progress(start + len(chunk), len(items))
+    return report
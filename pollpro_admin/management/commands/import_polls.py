@@ -0,0 +1,66 @@
+# pollpro_backend/pollpro_admin/management/commands/import_polls.py
+import json
+import os
+from django.core.management.base import BaseCommand, CommandError
+from users.models import CustomUser
+from pollpro_admin.imports import FORMATS, ImportFormatError, import_polls, read_rows, validate_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import polls with their options from a CSV or JSON file (see pollpro_admin.imports for the "
+        "layout). Every row is validated first; nothing is written while any row is invalid unless "
+        "--skip-invalid is given. Polls are inserted in one transaction per --chunk-size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON file to import.")
+        parser.add_argument('--creator', required=True, help="Username the polls are created by.")
+        parser.add_argument('--format', choices=FORMATS, help="File format (default: from the file extension).")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Polls inserted per transaction.")
+        parser.add_argument('--skip-invalid', action='store_true', help="Import the valid rows when others are invalid.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only.")
+        parser.add_argument('--report', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if format not in FORMATS:
+            raise CommandError(f"Cannot tell the format of {options['path']}; pass --format.")
+        try:
+            creator = CustomUser.objects.get(username=options['creator'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f"No user named {options['creator']!r}.")
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as fh:
+                rows = read_rows(fh, format)
+        except (OSError, UnicodeDecodeError, ImportFormatError) as exc:
+            raise CommandError(str(exc))
+
+        valid, invalid = validate_rows(rows)
+        self.stdout.write(f"Validated {len(rows)} rows: {len(valid)} valid, {len(invalid)} invalid.")
+        for error in invalid[:20]:
+            self.stderr.write(f"  row {error['row']}: {json.dumps(error['errors'])}")
+        if len(invalid) > 20:
+            self.stderr.write(f"  ... and {len(invalid) - 20} more")
+
+        report = {'rows': len(rows), 'invalid': invalid, 'created': 0, 'options': 0, 'failed_chunks': []}
+        if invalid and not options['skip_invalid']:
+            self.write_report(report, options['report'])
+            raise CommandError("Nothing was imported; fix the rows above or pass --skip-invalid.")
+        if not options['dry_run']:
+            def progress(done, total):
+                self.stdout.write(f"  {done}/{total} polls")
+            report.update(import_polls(valid, creator, chunk_size=options['chunk_size'], progress=progress))
+            del report['poll_ids']
+            for failure in report['failed_chunks']:
+                self.stderr.write(f"  rows {failure['rows'][0]}-{failure['rows'][1]} failed: {failure['error']}")
+
+        self.write_report(report, options['report'])
+        style = self.style.WARNING if report['failed_chunks'] or invalid else self.style.SUCCESS
+        self.stdout.write(style(f"Imported {report['created']} polls with {report['options']} options."))
+
+    def write_report(self, report, path):
+        if path:
+            with open(path, 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Wrote {path}")
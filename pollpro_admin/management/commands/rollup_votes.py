@@ -0,0 +1,29 @@
+# pollpro_backend/pollpro_admin/management/commands/rollup_votes.py
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from pollpro_admin.rollups import rebuild_rollups, roll_up_votes
+
+
+class Command(BaseCommand):
+    help = (
+        "Count votes cast since the last run into the hourly analytics rollups. Idempotent and "
+        "resumable: schedule it every few minutes. Retracted or deleted votes are only "
+        "subtracted by a --rebuild."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50000, help="Vote ids rolled up per transaction.")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches (default: catch up fully).")
+        parser.add_argument('--lag', type=int, default=60, help="Seconds a vote id must have been visible before it is counted.")
+        parser.add_argument('--rebuild', action='store_true', help="Drop all rollups and recount every vote.")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuild_rollups()
+            self.stdout.write("Dropped existing rollups.")
+        counted, batches = roll_up_votes(
+            batch_size=options['batch_size'],
+            lag=timedelta(seconds=options['lag']),
+            max_batches=options['max_batches'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {counted} votes in {batches} batches."))
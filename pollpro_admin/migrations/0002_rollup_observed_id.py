@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pollpro_admin', '0001_vote_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rollupcheckpoint',
+            name='seen_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='rollupcheckpoint',
+            name='seen_id',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
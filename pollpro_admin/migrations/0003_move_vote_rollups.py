@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """VoteHourlyRollup now belongs to polls (polls 0009), which keeps using its table."""
+
+    dependencies = [
+        ('pollpro_admin', '0002_rollup_observed_id'),
+        ('polls', '0009_vote_hourly_rollup'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.DeleteModel(name='VoteHourlyRollup'),
+            ],
+        ),
+    ]
@@ -1,3 +1,18 @@
+# pollpro_backend/pollpro_admin/models.py
 from django.db import models
 
-# Create your models here.
+
+class RollupCheckpoint(models.Model):
+    """
+    High-water mark of a rollup: every vote with id <= last_id has been counted. seen_id is
+    the newest vote id at seen_at; ids up to it are counted once that observation is older
+    than the rollup's lag.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    seen_id = models.BigIntegerField(default=0)
+    seen_at = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
@@ -0,0 +1,86 @@
+# pollpro_backend/pollpro_admin/pagination.py
+import json
+from django.conf import settings
+from django.db import connections
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+def planner_estimate(queryset):
+    """
+    The number of rows PostgreSQL expects `queryset` to return, without reading them: the
+    table's pg_class.reltuples when it is unfiltered, else the planner's estimate from EXPLAIN.
+    None on other backends and for tables that were never analyzed.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            rows = cursor.fetchone()[0]
+            # -1 until the first ANALYZE
+            return rows if rows >= 0 else None
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimated_count(queryset, exact_below=None):
+    """
+    (count, is_estimate) of a queryset. Results the planner puts under `exact_below` rows
+    (ADMIN_EXACT_COUNT_THRESHOLD) are counted exactly; bigger ones keep the estimate, as
+    COUNT(*) has to read every matching row.
+    """
+    exact_below = settings.ADMIN_EXACT_COUNT_THRESHOLD if exact_below is None else exact_below
+    estimate = planner_estimate(queryset)
+    if estimate is not None and estimate >= exact_below:
+        return estimate, True
+    return queryset.count(), False
+
+
+class AdminCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the admin tables, newest first: each page seeks past the last id
+    seen instead of using OFFSET, so a deep page of a huge table costs the same as the first.
+    Pages also carry the total `count` of the filtered table, which is the planner's estimate
+    when `count_is_estimate` is true (see estimated_count).
+    """
+    ordering = '-id'
+    page_size = settings.ADMIN_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.ADMIN_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count, self.count_is_estimate = estimated_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'count_is_estimate': self.count_is_estimate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties'] = {
+            'count': {'type': 'integer', 'example': 123},
+            'count_is_estimate': {'type': 'boolean'},
+            **response_schema['properties'],
+        }
+        response_schema['required'] = ['count', 'count_is_estimate', *response_schema.get('required', [])]
+        return response_schema
+
+
+class AdminPollCursorPagination(AdminCursorPagination):
+    # Served by the (-created_at, id) indexes of Poll, also per category and per creator
+    ordering = ('-created_at', 'id')
@@ -0,0 +1,86 @@
+# pollpro_backend/pollpro_admin/rollups.py
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from polls.models import Vote, VoteHourlyRollup
+from .models import RollupCheckpoint
+
+CHECKPOINT = 'vote_hourly'
+
+
+def _merge(rows):
+    """Add aggregated vote counts onto the stored hourly rows, creating missing ones."""
+    if not rows:
+        return
+    stored = {
+        (hour, option_id): votes
+        for hour, option_id, votes in VoteHourlyRollup.objects.filter(
+            hour__in={row['hour'] for row in rows},
+            option_id__in={row['option_id'] for row in rows},
+        ).values_list('hour', 'option_id', 'votes')
+    }
+    VoteHourlyRollup.objects.bulk_create(
+        [
+            VoteHourlyRollup(
+                hour=row['hour'],
+                poll_id=row['poll_id'],
+                option_id=row['option_id'],
+                category=row['poll__category'],
+                votes=stored.get((row['hour'], row['option_id']), 0) + row['votes'],
+            )
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=['hour', 'option'],
+        update_fields=['votes'],
+    )
+
+
+def roll_up_votes(batch_size=50000, lag=timedelta(minutes=1), max_batches=None):
+    """
+    Count votes past the high-water mark into VoteHourlyRollup, one id range per transaction.
+    The rows and the new mark commit together, so an interrupted or repeated run never counts
+    a vote twice. Only ids that were already the newest `lag` ago are counted, giving
+    transactions that held a lower id time to commit below the mark; vote timestamps play no
+    part, as they need not follow id order. Returns (votes counted, batches).
+    """
+    now = timezone.now()
+    newest = Vote.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT)
+        aged = checkpoint.seen_at is None or checkpoint.seen_at <= now - lag
+        # Observe again once the previous observation is fully counted
+        if aged and checkpoint.last_id >= checkpoint.seen_id:
+            checkpoint.seen_id, checkpoint.seen_at = newest, now
+            checkpoint.save(update_fields=['seen_id', 'seen_at'])
+        settled = checkpoint.seen_id if checkpoint.seen_at <= now - lag else checkpoint.last_id
+    counted = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            # Serializes concurrent runs; the loser resumes from the winner's mark
+            checkpoint = RollupCheckpoint.objects.select_for_update().get(name=CHECKPOINT)
+            if checkpoint.last_id >= settled:
+                break
+            upper = min(checkpoint.last_id + batch_size, settled)
+            rows = list(
+                Vote.objects.filter(id__gt=checkpoint.last_id, id__lte=upper)
+                .annotate(hour=TruncHour('created_at'))
+                .values('hour', 'poll_id', 'option_id', 'poll__category')
+                .annotate(votes=Count('id'))
+                .order_by()
+            )
+            _merge(rows)
+            checkpoint.last_id = upper
+            checkpoint.save(update_fields=['last_id', 'updated_at'])
+        counted += sum(row['votes'] for row in rows)
+        batches += 1
+    return counted, batches
+
+
+def rebuild_rollups():
+    """Recount every hour from scratch, e.g. after votes were retracted or deleted."""
+    with transaction.atomic():
+        RollupCheckpoint.objects.update_or_create(name=CHECKPOINT, defaults={'last_id': 0, 'seen_id': 0, 'seen_at': None})
+        VoteHourlyRollup.objects.all().delete()
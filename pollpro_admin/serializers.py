@@ -1,7 +1,12 @@
+from django.db import transaction
 from rest_framework import serializers
 from users.models import CustomUser
 from polls.models import Poll, Vote, Option
-from polls.serializers import OptionSerializer, PollSerializer
+from polls.serializers import MAX_ID, OptionSerializer, PollSerializer
+from polls.cache import bump_results_version, forget_poll_meta
+from polls.snapshots import thaw_results
+from polls.search import index_polls
+from polls.counters import compact_poll_counters
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,7 +24,32 @@ class UserSerializer(serializers.ModelSerializer):
 
 class AdminPollSerializer(PollSerializer):
     class Meta(PollSerializer.Meta):
-        fields = ('id', 'question', 'creator', 'category', 'created_at', 'expiry_date', 'options')
+        fields = ('id', 'question', 'creator', 'category', 'created_at', 'expiry_date', 'options', 'counter_shards')
+        extra_kwargs = {'counter_shards': {'max_value': 256, 'help_text': "Shard the vote counters of a viral poll (0 = off)"}}
+
+    def update(self, instance, validated_data):
+        instance.question = validated_data.get('question', instance.question)
+        instance.expiry_date = validated_data.get('expiry_date', instance.expiry_date)
+        was_sharded = instance.counter_shards
+        instance.counter_shards = validated_data.get('counter_shards', instance.counter_shards)
+        if 'expiry_date' in validated_data:
+            thaw_results(instance.id)
+            forget_poll_meta(instance.id)
+        # Never write the denormalized total_votes back from a possibly stale instance
+        with transaction.atomic():
+            instance.save(update_fields=['question', 'expiry_date', 'counter_shards'])
+            if was_sharded and not instance.counter_shards:
+                # Reads stop adding up shards once a poll is no longer sharded
+                compact_poll_counters(instance.id)
+        if 'question' in validated_data:
+            index_polls([instance.id])
+        bump_results_version(instance.id)
+        return instance
+
+    def create(self, validated_data):
+        poll = super().create(validated_data)
+        index_polls([poll.id])
+        return poll
 
 class VoteSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField()
@@ -29,4 +59,24 @@ class VoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vote
         fields = ('id', 'user', 'poll', 'option', 'created_at')
-        ref_name = 'AdminVoteSerializer'
\ No newline at end of file
+        ref_name = 'AdminVoteSerializer'
+
+class ExportFilterSerializer(serializers.Serializer):
+    """Query parameters accepted by the streaming export endpoints."""
+    output = serializers.ChoiceField(choices=('csv', 'ndjson'), default='csv')
+    poll = serializers.IntegerField(required=False, min_value=1, max_value=MAX_ID)
+    category = serializers.ChoiceField(choices=Poll.CATEGORY_CHOICES, required=False)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if 'since' in attrs and 'until' in attrs and attrs['since'] > attrs['until']:
+            raise serializers.ValidationError({"until": "Must not be earlier than 'since'."})
+        return attrs
+
+
+class AnalyticsFilterSerializer(ExportFilterSerializer):
+    """Query parameters accepted by the analytics endpoints; bounds apply to hourly buckets."""
+    output = None
+    interval = serializers.ChoiceField(choices=('hour', 'day', 'week', 'month'), default='day')
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=100)
@@ -1,3 +1,313 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import CustomUser
+from users.tokens import access_token_for
+from polls.models import Poll, Option, Vote, VoteHourlyRollup
+from polls.search import search_polls
+from polls.tests import cast_vote
+from .rollups import roll_up_votes
+from .views import AnalyticsView, VoteDetailView
 
-# Create your tests here.
+
+class AdminPollListQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(username='admin', password='pass12345', roles='admin')
+        self.client.force_authenticate(self.admin)
+
+    def create_polls(self, count):
+        for i in range(count):
+            poll = Poll.objects.create(question=f"Question {i}", creator=self.admin)
+            option = Option.objects.create(poll=poll, text="Yes")
+            Option.objects.create(poll=poll, text="No")
+            cast_vote(poll, option, self.admin)
+
+    def test_poll_list_constant_queries(self):
+        self.create_polls(3)
+        # count + polls joined with creator + options
+        with self.assertNumQueries(3):
+            self.client.get(reverse('admin_poll_list'))
+        self.create_polls(6)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('admin_poll_list'))
+        self.assertEqual(len(response.data['results']), 9)
+
+
+class AdminVoteDeleteTests(TestCase):
+    def test_racing_deletes_decrement_once(self):
+        admin = CustomUser.objects.create_user(username='admin', password='pass12345', roles='admin')
+        poll = Poll.objects.create(question="Race", creator=admin)
+        option = Option.objects.create(poll=poll, text="Yes")
+        vote = cast_vote(poll, option, admin)
+        view = VoteDetailView()
+        view.perform_destroy(vote)
+        view.perform_destroy(vote)
+        option.refresh_from_db()
+        poll.refresh_from_db()
+        self.assertEqual((option.vote_count, poll.total_votes), (0, 0))
+
+
+class AdminUserDeleteTests(TestCase):
+    def test_deleting_a_voter_takes_their_votes_off_the_results(self):
+        client = APIClient()
+        admin = CustomUser.objects.create_user(username='admin', password='pass12345', roles='admin')
+        voter = CustomUser.objects.create_user(username='voter', password='pass12345')
+        poll = Poll.objects.create(question="Voters", creator=admin)
+        option = Option.objects.create(poll=poll, text="Yes")
+        Option.objects.create(poll=poll, text="No")
+        cast_vote(poll, option, voter)
+        results_url = reverse('poll_results', args=[poll.id])
+        self.assertEqual(client.get(results_url).json()['options'][0]['votes'], 1)
+
+        client.force_authenticate(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.delete(reverse('admin_user_detail', args=[voter.id])).status_code, 204)
+        option.refresh_from_db()
+        poll.refresh_from_db()
+        self.assertEqual((option.vote_count, poll.total_votes), (0, 0))
+        self.assertEqual(client.get(results_url).json()['options'][0]['votes'], 0)
+
+
+class ExportStreamTests(TestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(username='admin', password='pass12345', roles='admin')
+        poll = Poll.objects.create(question="Export", creator=self.admin)
+        option = Option.objects.create(poll=poll, text="Yes")
+        voters = [CustomUser.objects.create_user(username=f"voter{i}", password='x') for i in range(2)]
+        self.votes = [cast_vote(poll, option, voter) for voter in voters]
+
+    async def read_async(self, response):
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    def test_sync_export(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get(reverse('admin_vote_export'), {'output': 'ndjson'})
+        self.assertFalse(response.is_async)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [vote.id for vote in self.votes])
+
+    def test_asgi_export_streams_from_an_async_iterator(self):
+        response = async_to_sync(self.async_client.get)(
+            reverse('admin_vote_export'), headers={'authorization': f'Bearer {access_token_for(self.admin)}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        lines = async_to_sync(self.read_async)(response).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'id')
+        self.assertEqual([int(line.split(',')[0]) for line in lines[1:]], [vote.id for vote in self.votes])
+
+
+class AdminListFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(username='admin', password='pass12345', roles='admin')
+        self.client.force_authenticate(self.admin)
+        self.old = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        self.users = [CustomUser.objects.create_user(username=f"user{i}", password='x') for i in range(4)]
+        CustomUser.objects.filter(pk=self.users[0].pk).update(is_active=False, date_joined=self.old)
+        self.tech = Poll.objects.create(question="Tech", creator=self.admin, category='TECH')
+        self.sport = Poll.objects.create(question="Sport", creator=self.users[1], category='SPRT')
+        Poll.objects.filter(pk=self.sport.pk).update(created_at=self.old)
+        for poll in (self.tech, self.sport):
+            option = Option.objects.create(poll=poll, text="Yes")
+            for user in self.users[1:]:
+                cast_vote(poll, option, user)
+
+    def ids(self, url, **params):
+        response = self.client.get(reverse(url), params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_user_filters(self):
+        self.assertEqual(self.ids('admin_user_list', role='admin'), [self.admin.id])
+        self.assertEqual(self.ids('admin_user_list', is_active='false'), [self.users[0].id])
+        self.assertEqual(self.ids('admin_user_list', until='2026-01-01T00:00:00Z'), [self.users[0].id])
+        self.assertEqual(len(self.ids('admin_user_list', since='2026-01-01T00:00:00Z')), 4)
+        self.assertEqual(self.client.get(reverse('admin_user_list'), {'role': 'owner'}).status_code, 400)
+
+    def test_poll_filters(self):
+        self.assertEqual(self.ids('admin_poll_list'), [self.tech.id, self.sport.id])
+        self.assertEqual(self.ids('admin_poll_list', category='SPRT'), [self.sport.id])
+        self.assertEqual(self.ids('admin_poll_list', creator=self.admin.id), [self.tech.id])
+        self.assertEqual(self.ids('admin_poll_list', since='2026-01-01T00:00:00Z'), [self.tech.id])
+
+    def test_vote_filters(self):
+        tech_votes = list(Vote.objects.filter(poll=self.tech).order_by('-id').values_list('id', flat=True))
+        self.assertEqual(self.ids('admin_vote_list', poll=self.tech.id), tech_votes)
+        self.assertEqual(self.ids('admin_vote_list', category='TECH'), tech_votes)
+        self.assertEqual(len(self.ids('admin_vote_list', user=self.users[1].id)), 2)
+        Vote.objects.filter(poll=self.sport).update(created_at=self.old)
+        self.assertEqual(self.ids('admin_vote_list', until='2026-01-01T00:00:00Z', poll=self.tech.id), [])
+
+    def test_keyset_pages_and_count(self):
+        # count + votes joined with their user, poll and option
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('admin_vote_list'), {'page_size': 4})
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (6, False))
+        seen = [row['id'] for row in response.data['results']]
+        next_page = self.client.get(response.data['next'])
+        seen += [row['id'] for row in next_page.data['results']]
+        self.assertIsNone(next_page.data['next'])
+        self.assertEqual(seen, list(Vote.objects.order_by('-id').values_list('id', flat=True)))
+
+    def test_large_counts_are_estimated(self):
+        with mock.patch('pollpro_admin.pagination.planner_estimate', return_value=2_000_000):
+            response = self.client.get(reverse('admin_vote_list'))
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (2_000_000, True))
+        with mock.patch('pollpro_admin.pagination.planner_estimate', return_value=40):
+            response = self.client.get(reverse('admin_vote_list'))
+        self.assertEqual((response.data['count'], response.data['count_is_estimate']), (6, False))
+
+
+
+class VoteRollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(username='admin', password='pass12345', roles='admin')
+        self.client.force_authenticate(self.admin)
+        self.tech = Poll.objects.create(question="Tech", creator=self.admin, category='TECH')
+        self.sport = Poll.objects.create(question="Sport", creator=self.admin, category='SPRT')
+        self.tech_option = Option.objects.create(poll=self.tech, text="Yes")
+        self.sport_option = Option.objects.create(poll=self.sport, text="Yes")
+        self.start = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        # Tech gets a vote at 00:10, 00:50 and 01:10 on Jan 1st; sport one vote a month later
+        self.vote(self.tech_option, minutes=10)
+        self.vote(self.tech_option, minutes=50)
+        self.vote(self.tech_option, minutes=70)
+        self.vote(self.sport_option, minutes=31 * 24 * 60)
+
+    def vote(self, option, minutes):
+        user = CustomUser.objects.create_user(username=f"voter{Vote.objects.count()}", password='x')
+        vote = Vote.objects.create(poll=option.poll, option=option, user=user)
+        Vote.objects.filter(pk=vote.pk).update(created_at=self.start + timedelta(minutes=minutes))
+
+    def test_rollup_buckets_by_hour(self):
+        self.assertEqual(roll_up_votes(lag=timedelta(0)), (4, 1))
+        rows = VoteHourlyRollup.objects.filter(poll=self.tech).order_by('hour').values_list('hour', 'votes')
+        self.assertEqual(list(rows), [(self.start, 2), (self.start + timedelta(hours=1), 1)])
+
+    def test_rollup_is_incremental_and_idempotent(self):
+        roll_up_votes(lag=timedelta(0), batch_size=1)
+        self.assertEqual(roll_up_votes(lag=timedelta(0)), (0, 0))
+        self.vote(self.tech_option, minutes=20)
+        self.assertEqual(roll_up_votes(lag=timedelta(0)), (1, 1))
+        self.assertEqual(VoteHourlyRollup.objects.get(poll=self.tech, hour=self.start).votes, 3)
+
+    def test_recent_votes_wait_for_the_lag(self):
+        lag = timedelta(minutes=5)
+        self.assertEqual(roll_up_votes(lag=lag), (0, 0))
+        now = datetime.now(dt_timezone.utc)
+        # Committed after the first run, with a timestamp older than every vote counted so far
+        self.vote(self.sport_option, minutes=-60)
+        with mock.patch('pollpro_admin.rollups.timezone.now', return_value=now + lag):
+            self.assertEqual(roll_up_votes(lag=lag), (4, 1))
+            self.assertEqual(roll_up_votes(lag=lag), (0, 0))
+        with mock.patch('pollpro_admin.rollups.timezone.now', return_value=now + 2 * lag):
+            self.assertEqual(roll_up_votes(lag=lag), (1, 1))
+        self.assertEqual(VoteHourlyRollup.objects.filter(poll=self.sport).count(), 2)
+
+    def test_default_summary_totals_the_votes(self):
+        roll_up_votes(lag=timedelta(0))
+        self.assertEqual(AnalyticsView().summarize(VoteHourlyRollup.objects.filter(category='TECH'), {}), {'votes': 3})
+
+    def test_time_series_endpoint(self):
+        roll_up_votes(lag=timedelta(0))
+        response = self.client.get(reverse('admin_vote_analytics'), {'interval': 'month'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['votes'] for row in response.data['series']], [3, 1])
+
+        response = self.client.get(reverse('admin_vote_analytics'), {'interval': 'hour', 'category': 'TECH'})
+        self.assertEqual([row['votes'] for row in response.data['series']], [2, 1])
+
+    def test_top_polls_endpoint(self):
+        roll_up_votes(lag=timedelta(0))
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('admin_top_polls'))
+        self.assertEqual([(row['poll'], row['votes']) for row in response.data['results']], [(self.tech.id, 3), (self.sport.id, 1)])
+
+        response = self.client.get(reverse('admin_top_polls'), {'since': '2026-01-15T00:00:00Z'})
+        self.assertEqual([row['poll'] for row in response.data['results']], [self.sport.id])
+
+    def test_analytics_require_admin(self):
+        self.client.force_authenticate(CustomUser.objects.create_user(username='someone', password='x'))
+        self.assertEqual(self.client.get(reverse('admin_top_polls')).status_code, 403)
+
+
+class PollImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(username='admin', password='pass12345', roles='admin')
+        self.client.force_authenticate(self.admin)
+        self.polls = [
+            {'question': f"Trivia question {i}", 'category': 'ENT', 'options': ['Red', 'Green', 'Blue']}
+            for i in range(5)
+        ]
+
+    def test_json_import_creates_polls_and_options(self):
+        self.polls[0]['expiry_date'] = '2030-01-01T00:00:00Z'
+        response = self.client.post(reverse('admin_poll_import'), {'polls': self.polls}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['options']), (5, 15))
+        self.assertEqual(Poll.objects.filter(creator=self.admin, category='ENT').count(), 5)
+        first = Poll.objects.get(question="Trivia question 0")
+        self.assertEqual(first.expiry_date, datetime(2030, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(list(first.options.order_by('id').values_list('text', flat=True)), ['Red', 'Green', 'Blue'])
+        # Imported polls are searchable straight away
+        self.assertEqual(search_polls(Poll.objects.all(), 'trivia').count(), 5)
+
+    def test_invalid_rows_abort_the_import(self):
+        self.polls[1]['options'] = ['Only one']
+        self.polls[3]['category'] = 'NOPE'
+        response = self.client.post(reverse('admin_poll_import'), self.polls, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['row'] for error in response.data['invalid']], [2, 4])
+        self.assertFalse(Poll.objects.exists())
+
+        response = self.client.post(reverse('admin_poll_import') + '?skip_invalid=true', self.polls, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(Poll.objects.count(), 3)
+
+    def test_csv_upload(self):
+        content = "question,category,expiry_date,options\nTabs or spaces?,TECH,,Tabs|Spaces\nBest pet?,,,Cat | Dog | Fish\n"
+        upload = SimpleUploadedFile('bank.csv', content.encode(), content_type='text/csv')
+        response = self.client.post(reverse('admin_poll_import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['options'], 5)
+        pet = Poll.objects.get(question="Best pet?")
+        self.assertEqual(pet.category, 'TECH')
+        self.assertEqual(list(pet.options.order_by('id').values_list('text', flat=True)), ['Cat', 'Dog', 'Fish'])
+
+    def test_import_requires_admin(self):
+        self.client.force_authenticate(CustomUser.objects.create_user(username='someone', password='x'))
+        response = self.client.post(reverse('admin_poll_import'), self.polls, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_command_imports_in_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bank.json')
+            with open(path, 'w') as fh:
+                json.dump(self.polls, fh)
+            out = StringIO()
+            call_command('import_polls', path, creator='admin', chunk_size=2, stdout=out)
+            self.assertIn("5/5 polls", out.getvalue())
+            self.assertEqual(Option.objects.count(), 15)
+
+            self.polls.append({'question': '', 'options': ['A', 'B']})
+            with open(path, 'w') as fh:
+                json.dump(self.polls, fh)
+            with self.assertRaises(CommandError):
+                call_command('import_polls', path, creator='admin', stdout=StringIO(), stderr=StringIO())
+            self.assertEqual(Poll.objects.count(), 5)
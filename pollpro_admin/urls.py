@@ -5,8 +5,15 @@ from .views import (
     UserDetailView,
     PollListCreateView,
     PollDetailView,
+    PollImportView,
     VoteListView,
     VoteDetailView,
+    VoteQueueStatusView,
+    VoteExportView,
+    PollExportView,
+    UserExportView,
+    VoteTimeSeriesView,
+    TopPollsView,
 )
 
 urlpatterns = [
@@ -14,6 +21,13 @@ urlpatterns = [
     path('users/<int:pk>/', UserDetailView.as_view(), name='admin_user_detail'),
     path('polls/', PollListCreateView.as_view(), name='admin_poll_list'),
     path('polls/<int:pk>/', PollDetailView.as_view(), name='admin_poll_detail'),
+    path('polls/import/', PollImportView.as_view(), name='admin_poll_import'),
     path('votes/', VoteListView.as_view(), name='admin_vote_list'),
     path('votes/<int:pk>/', VoteDetailView.as_view(), name='admin_vote_detail'),
+    path('votes/queue/', VoteQueueStatusView.as_view(), name='admin_vote_queue'),
+    path('export/votes/', VoteExportView.as_view(), name='admin_vote_export'),
+    path('export/polls/', PollExportView.as_view(), name='admin_poll_export'),
+    path('export/users/', UserExportView.as_view(), name='admin_user_export'),
+    path('analytics/votes/', VoteTimeSeriesView.as_view(), name='admin_vote_analytics'),
+    path('analytics/top-polls/', TopPollsView.as_view(), name='admin_top_polls'),
 ]
\ No newline at end of file
@@ -1,9 +1,33 @@
 # pollpro_backend/pollpro_admin/views.py
-from rest_framework import generics
+import csv
+import io
+import itertools
+import json
+import os
+from rest_framework import generics, status
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncHour, TruncDay, TruncWeek, TruncMonth
+from django.http import StreamingHttpResponse
 from users.models import CustomUser  # Updated from django.contrib.auth.models
-from polls.models import Poll, Vote
-from .serializers import UserSerializer, AdminPollSerializer, VoteSerializer
+from polls.models import Poll, Vote, VoteHourlyRollup
+from .serializers import UserSerializer, AdminPollSerializer, VoteSerializer, ExportFilterSerializer, AnalyticsFilterSerializer
+from .models import RollupCheckpoint
+from .rollups import CHECKPOINT
+from .filters import UserFilter, PollFilter, VoteFilter, filter_parameters
+from .pagination import AdminCursorPagination, AdminPollCursorPagination
+from .imports import FORMATS, ImportFormatError, import_polls, read_rows, validate_rows
 from polls.permissions import IsAdmin
+from polls.counters import adjust_vote_counters
+from polls.cache import bump_results_version, user_votes_changed
+from polls.snapshots import thaw_results
+from polls.ingest import vote_queue_status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -11,10 +35,16 @@ class UserListCreateView(generics.ListCreateAPIView):
     queryset = CustomUser.objects.all()  
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
+    filterset_class = UserFilter
+    pagination_class = AdminCursorPagination
 
     @swagger_auto_schema(
-        operation_description="List all users or create a new user (admin only)",
-        responses={200: UserSerializer(many=True), 201: UserSerializer, 403: 'Permission denied'}
+        operation_description=(
+            "List users, newest first, or create a new user (admin only). Filter by `role`, "
+            "`is_active` and date joined (`since`, `until`)"
+        ),
+        manual_parameters=filter_parameters(UserFilter),
+        responses={403: 'Permission denied'}
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
@@ -53,13 +83,19 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
 
 class PollListCreateView(generics.ListCreateAPIView):
-    queryset = Poll.objects.all()
+    queryset = Poll.objects.for_listing()
     serializer_class = AdminPollSerializer
     permission_classes = [IsAdmin]
+    filterset_class = PollFilter
+    pagination_class = AdminPollCursorPagination
 
     @swagger_auto_schema(
-        operation_description="List all polls or create a new poll (admin only)",
-        responses={200: AdminPollSerializer(many=True), 201: AdminPollSerializer, 403: 'Permission denied'}
+        operation_description=(
+            "List polls, newest first, or create a new poll (admin only). Filter by `category`, "
+            "`creator` and creation date (`since`, `until`)"
+        ),
+        manual_parameters=filter_parameters(PollFilter),
+        responses={403: 'Permission denied'}
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
@@ -72,7 +108,7 @@ class PollListCreateView(generics.ListCreateAPIView):
         return super().post(request, *args, **kwargs)
 
 class PollDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Poll.objects.all()
+    queryset = Poll.objects.select_related('result_snapshot')
     serializer_class = AdminPollSerializer
     permission_classes = [IsAdmin]
 
@@ -97,14 +133,84 @@ class PollDetailView(generics.RetrieveUpdateDestroyAPIView):
     def delete(self, request, *args, **kwargs):
         return super().delete(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        bump_results_version(instance.id)
+        instance.delete()
+
+class PollImportView(APIView):
+    """
+    Create polls with their options in bulk, from an uploaded CSV or JSON file (see
+    pollpro_admin.imports) or a JSON body. Nothing is written while any row is invalid,
+    unless skip_invalid is set.
+    """
+    permission_classes = [IsAdmin]
+    parser_classes = [JSONParser, MultiPartParser]
+
+    def load_rows(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            data = request.data
+            if isinstance(data, dict):
+                data = data.get('polls')
+            if not isinstance(data, list):
+                raise ImportFormatError('Send a file, a list of polls or {"polls": [...]}.')
+            return data
+        format = request.data.get('format') or os.path.splitext(upload.name)[1].lstrip('.').lower()
+        if format not in FORMATS:
+            raise ImportFormatError(f"Unknown format {format!r}; use one of {', '.join(FORMATS)}.")
+        return read_rows(io.TextIOWrapper(upload.file, encoding='utf-8-sig'), format)
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Import polls with their options (admin only). Send a CSV or JSON `file` (multipart), or a JSON "
+            "body {\"polls\": [{\"question\", \"category\", \"expiry_date\", \"options\": [...]}]}. "
+            "Set skip_invalid=true to import the valid rows when others fail validation."
+        ),
+        manual_parameters=[
+            openapi.Parameter('skip_invalid', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description='Import the valid rows anyway'),
+        ],
+        responses={201: 'Import report', 400: 'Invalid file or rows', 403: 'Permission denied'}
+    )
+    def post(self, request, *args, **kwargs):
+        try:
+            rows = self.load_rows(request)
+        except ImportFormatError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except UnicodeDecodeError:
+            return Response({"error": "The file must be UTF-8 encoded."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > settings.POLL_IMPORT_MAX_ITEMS:
+            return Response(
+                {"error": f"At most {settings.POLL_IMPORT_MAX_ITEMS} polls per import."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        valid, invalid = validate_rows(rows)
+        skip_invalid = request.query_params.get('skip_invalid', '').lower() in ('1', 'true', 'yes')
+        if invalid and not skip_invalid:
+            return Response(
+                {"error": f"{len(invalid)} of {len(rows)} rows are invalid; nothing was imported.", "invalid": invalid},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        report = import_polls(valid, request.user, chunk_size=settings.POLL_IMPORT_CHUNK_SIZE)
+        report.update(rows=len(rows), invalid=invalid)
+        return Response(report, status=status.HTTP_201_CREATED)
+
+
 class VoteListView(generics.ListAPIView):
-    queryset = Vote.objects.all()
+    # Option.__str__ reads its poll too
+    queryset = Vote.objects.select_related('user', 'poll', 'option__poll')
     serializer_class = VoteSerializer
     permission_classes = [IsAdmin]
+    filterset_class = VoteFilter
+    pagination_class = AdminCursorPagination
 
     @swagger_auto_schema(
-        operation_description="List all votes (admin only)",
-        responses={200: VoteSerializer(many=True), 403: 'Permission denied'}
+        operation_description=(
+            "List votes, newest first (admin only). Filter by `poll`, `user`, `category` and "
+            "date cast (`since`, `until`)"
+        ),
+        manual_parameters=filter_parameters(VoteFilter),
+        responses={403: 'Permission denied'}
     )
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
@@ -119,4 +225,278 @@ class VoteDetailView(generics.DestroyAPIView):
         responses={204: 'No content', 403: 'Permission denied', 404: 'Not found'}
     )
     def delete(self, request, *args, **kwargs):
-        return super().delete(request, *args, **kwargs)
\ No newline at end of file
+        return super().delete(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # A concurrent delete may have removed it already; only the one that did counts it
+            deleted, _ = Vote.objects.filter(pk=instance.pk).delete()
+            if not deleted:
+                return
+            adjust_vote_counters([(instance.poll_id, instance.option_id)], delta=-1)
+            user_votes_changed(instance.user_id, {instance.poll_id: None})
+            # The final tallies of a closed poll just changed
+            thaw_results(instance.poll_id)
+
+class VoteQueueStatusView(APIView):
+    permission_classes = [IsAdmin]
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Status of the queued vote ingestion (admin only): votes waiting in the queue, the "
+            "lag of the oldest one in seconds and when `drain_vote_queue` last ran"
+        ),
+        responses={200: openapi.Response('Queue status', openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'mode': openapi.Schema(type=openapi.TYPE_STRING),
+                'pending': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'oldest_accepted_at': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+                'lag_seconds': openapi.Schema(type=openapi.TYPE_NUMBER),
+                'last_drain_at': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+            }
+        )), 403: 'Permission denied'}
+    )
+    def get(self, request, *args, **kwargs):
+        return Response(vote_queue_status())
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted CSV line straight back."""
+    def write(self, value):
+        return value
+
+
+EXPORT_PARAMETERS = [
+    openapi.Parameter('output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['csv', 'ndjson'], description='Output format (default csv)'),
+    openapi.Parameter('poll', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Restrict to one poll'),
+    openapi.Parameter('category', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=[choice[0] for choice in Poll.CATEGORY_CHOICES]),
+    openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='Inclusive lower bound'),
+    openapi.Parameter('until', openapi.IN_QUERY, type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, description='Exclusive upper bound'),
+]
+
+
+class StreamingExportView(APIView):
+    """
+    Stream a table as CSV or NDJSON. Rows are read as tuples through a single joined
+    values_list() query in chunks, so memory stays flat however large the table is. Under
+    ASGI the rows come from an async iterator, since Django would buffer a sync one whole.
+    """
+    permission_classes = [IsAdmin]
+    export_name = None
+    model = None
+    columns = ()  # (header, lookup) pairs
+    date_field = 'created_at'
+    chunk_size = 2000
+
+    def get_queryset(self, filters):
+        """The exported rows; subclasses add their own filters to this."""
+        queryset = self.model._default_manager.all()
+        if 'since' in filters:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': filters['since']})
+        if 'until' in filters:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': filters['until']})
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        params = ExportFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = params.validated_data
+        headers = [header for header, _ in self.columns]
+        rows = self.get_queryset(filters).order_by('pk')
+        lookups = [lookup for _, lookup in self.columns]
+
+        if filters['output'] == 'ndjson':
+            first, format_row = [], lambda row: json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+            content_type = 'application/x-ndjson'
+        else:
+            writer = csv.writer(_Echo())
+            first, format_row = [writer.writerow(headers)], writer.writerow
+            content_type = 'text/csv'
+        if isinstance(request._request, ASGIRequest):
+            # named=True: plain values_list() runs its query as soon as aiterator() starts it,
+            # outside the sync_to_async thread, which async code is not allowed to do
+            rows = rows.values_list(*lookups, named=True).aiterator(chunk_size=self.chunk_size)
+            content = _astream(first, rows, format_row)
+        else:
+            rows = rows.values_list(*lookups).iterator(chunk_size=self.chunk_size)
+            content = itertools.chain(first, map(format_row, rows))
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.export_name}.{filters["output"]}"'
+        return response
+
+
+async def _astream(first, rows, format_row):
+    for line in first:
+        yield line
+    async for row in rows:
+        yield format_row(row)
+
+
+class VoteExportView(StreamingExportView):
+    export_name = 'votes'
+    model = Vote
+    columns = (
+        ('id', 'id'),
+        ('user_id', 'user_id'),
+        ('username', 'user__username'),
+        ('poll_id', 'poll_id'),
+        ('poll', 'poll__question'),
+        ('category', 'poll__category'),
+        ('option_id', 'option_id'),
+        ('option', 'option__text'),
+        ('created_at', 'created_at'),
+    )
+
+    def get_queryset(self, filters):
+        queryset = super().get_queryset(filters)
+        if 'poll' in filters:
+            queryset = queryset.filter(poll_id=filters['poll'])
+        if 'category' in filters:
+            queryset = queryset.filter(poll__category=filters['category'])
+        return queryset
+
+    @swagger_auto_schema(
+        operation_description="Stream all votes as CSV or NDJSON (admin only)",
+        manual_parameters=EXPORT_PARAMETERS,
+        responses={200: 'CSV or NDJSON stream', 400: 'Invalid filter', 403: 'Permission denied'}
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class PollExportView(StreamingExportView):
+    export_name = 'polls'
+    model = Poll
+    columns = (
+        ('id', 'id'),
+        ('question', 'question'),
+        ('creator', 'creator__username'),
+        ('category', 'category'),
+        ('created_at', 'created_at'),
+        ('expiry_date', 'expiry_date'),
+        ('total_votes', 'total_votes'),
+    )
+
+    def get_queryset(self, filters):
+        queryset = super().get_queryset(filters)
+        if 'poll' in filters:
+            queryset = queryset.filter(pk=filters['poll'])
+        if 'category' in filters:
+            queryset = queryset.filter(category=filters['category'])
+        return queryset
+
+    @swagger_auto_schema(
+        operation_description="Stream all polls as CSV or NDJSON (admin only)",
+        manual_parameters=EXPORT_PARAMETERS,
+        responses={200: 'CSV or NDJSON stream', 400: 'Invalid filter', 403: 'Permission denied'}
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class UserExportView(StreamingExportView):
+    export_name = 'users'
+    model = CustomUser
+    date_field = 'date_joined'
+    columns = (
+        ('id', 'id'),
+        ('username', 'username'),
+        ('email', 'email'),
+        ('roles', 'roles'),
+        ('is_active', 'is_active'),
+        ('date_joined', 'date_joined'),
+    )
+
+    @swagger_auto_schema(
+        operation_description="Stream all users as CSV or NDJSON (admin only). Only since/until apply, on date_joined.",
+        manual_parameters=[p for p in EXPORT_PARAMETERS if p.name in ('output', 'since', 'until')],
+        responses={200: 'CSV or NDJSON stream', 400: 'Invalid filter', 403: 'Permission denied'}
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+ANALYTICS_PARAMETERS = [p for p in EXPORT_PARAMETERS if p.name != 'output']
+TRUNCATE = {'hour': TruncHour, 'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+
+
+class AnalyticsView(APIView):
+    """
+    Base for the analytics endpoints. They read only the hourly rollups maintained by
+    `manage.py rollup_votes`, so a range spanning months costs a few thousand rows per poll
+    instead of a scan of polls_vote; `rolled_up_at` tells how fresh the figures are.
+    """
+    permission_classes = [IsAdmin]
+
+    def get_rollups(self, filters):
+        queryset = VoteHourlyRollup.objects.all()
+        if 'poll' in filters:
+            queryset = queryset.filter(poll_id=filters['poll'])
+        if 'category' in filters:
+            queryset = queryset.filter(category=filters['category'])
+        if 'since' in filters:
+            queryset = queryset.filter(hour__gte=filters['since'])
+        if 'until' in filters:
+            queryset = queryset.filter(hour__lt=filters['until'])
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        params = AnalyticsFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        checkpoint = RollupCheckpoint.objects.filter(name=CHECKPOINT).first()
+        data = {'rolled_up_at': checkpoint.updated_at if checkpoint else None}
+        data.update(self.summarize(self.get_rollups(params.validated_data), params.validated_data))
+        return Response(data)
+
+    def summarize(self, rollups, filters):
+        """The response body for the filtered rollups; the total vote count unless overridden."""
+        return {'votes': rollups.aggregate(votes=Sum('votes'))['votes'] or 0}
+
+
+class VoteTimeSeriesView(AnalyticsView):
+    def summarize(self, rollups, filters):
+        series = (
+            rollups.annotate(bucket=TRUNCATE[filters['interval']]('hour'))
+            .values('bucket')
+            .annotate(votes=Sum('votes'))
+            .order_by('bucket')
+        )
+        return {'interval': filters['interval'], 'series': list(series)}
+
+    @swagger_auto_schema(
+        operation_description="Votes per hour, day, week or month, optionally for one poll or category (admin only)",
+        manual_parameters=ANALYTICS_PARAMETERS + [
+            openapi.Parameter('interval', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(TRUNCATE), description='Bucket size (default day)'),
+        ],
+        responses={200: 'Time series', 400: 'Invalid filter', 403: 'Permission denied'}
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+class TopPollsView(AnalyticsView):
+    def summarize(self, rollups, filters):
+        top = list(
+            rollups.values('poll_id').annotate(votes=Sum('votes')).order_by('-votes', 'poll_id')[:filters['limit']]
+        )
+        polls = Poll.objects.only('question', 'category').in_bulk([row['poll_id'] for row in top])
+        return {'results': [
+            {
+                'poll': row['poll_id'],
+                'question': polls[row['poll_id']].question,
+                'category': polls[row['poll_id']].category,
+                'votes': row['votes'],
+            }
+            for row in top if row['poll_id'] in polls
+        ]}
+
+    @swagger_auto_schema(
+        operation_description="Most voted polls over a period, optionally within one category (admin only)",
+        manual_parameters=ANALYTICS_PARAMETERS + [
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, description='Number of polls (default 10, max 100)'),
+        ],
+        responses={200: 'Top polls', 400: 'Invalid filter', 403: 'Permission denied'}
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
@@ -3,6 +3,9 @@ ASGI config for pollpro_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests served through it are routed by pollpro_backend.asgi_urls, which answers the hot
+poll reads with async views (polls.async_views) instead of the sync DRF views.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -10,7 +13,14 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.core.handlers.asgi import ASGIRequest
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pollpro_backend.settings')
 
+
+class AsyncRoutedRequest(ASGIRequest):
+    urlconf = 'pollpro_backend.asgi_urls'
+
+
 application = get_asgi_application()
+application.request_class = AsyncRoutedRequest
@@ -0,0 +1,10 @@
+# pollpro_backend/asgi_urls.py
+# URLconf of requests served through asgi.py: the same routes and names as urls.py, with the
+# polls app switched to its async read views (polls.async_urls)
+from django.urls import include, path
+from .urls import urlpatterns as wsgi_urlpatterns
+
+urlpatterns = [
+    path('api/polls/', include('polls.async_urls')) if str(pattern.pattern) == 'api/polls/' else pattern
+    for pattern in wsgi_urlpatterns
+]
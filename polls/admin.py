@@ -1,16 +1,16 @@
 # pollpro_backend/polls/admin.py
 from django.contrib import admin
-from .models import Poll, Option, Vote
+from .models import Poll, Option, Vote, PollResultSnapshot
 
 @admin.register(Poll)
 class PollAdmin(admin.ModelAdmin):
-    list_display = ('question', 'creator', 'category', 'created_at', 'expiry_date', 'is_active')
+    list_display = ('question', 'creator', 'category', 'created_at', 'expiry_date', 'total_votes', 'counter_shards', 'is_active')
     list_filter = ('category', 'created_at', 'expiry_date')
     search_fields = ('question', 'creator__username')
 
 @admin.register(Option)
 class OptionAdmin(admin.ModelAdmin):
-    list_display = ('poll', 'text')
+    list_display = ('poll', 'text', 'vote_count')
     list_filter = ('poll',)
     search_fields = ('text', 'poll__question')
 
@@ -18,4 +18,9 @@ class OptionAdmin(admin.ModelAdmin):
 class VoteAdmin(admin.ModelAdmin):
     list_display = ('poll', 'option', 'user', 'created_at')
     list_filter = ('poll', 'created_at')
-    search_fields = ('user__username', 'option__text')
\ No newline at end of file
+    search_fields = ('user__username', 'option__text')
+
+@admin.register(PollResultSnapshot)
+class PollResultSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('poll', 'total_votes', 'frozen_at')
+    readonly_fields = ('poll', 'options', 'total_votes', 'frozen_at')
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PollsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'polls'
+
+    def ready(self):
+        from django.db.models.signals import pre_delete
+        from users.models import CustomUser
+        from .voting import voter_deleted
+        pre_delete.connect(voter_deleted, sender=CustomUser, dispatch_uid='polls.voter_deleted')
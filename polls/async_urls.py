@@ -0,0 +1,18 @@
+# pollpro_backend/polls/async_urls.py
+# polls.urls with the hot reads answered by polls.async_views; used for requests served through ASGI
+from django.urls import path
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+ASYNC_VIEWS = {
+    'poll_list': async_views.poll_list,
+    'category_choices': async_views.category_choices,
+    'poll_detail': async_views.poll_detail,
+    'poll_results': async_views.poll_results,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
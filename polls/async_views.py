@@ -0,0 +1,155 @@
+# pollpro_backend/polls/async_views.py
+"""
+Async twins of the hot poll reads, answering requests that come in through
+pollpro_backend/asgi.py (see pollpro_backend/asgi_urls.py) so a slow read no longer holds a
+worker thread. They keep the URLs, status codes, headers and JSON bodies of PollListView,
+PollDetailView, PollResultView and CategoryChoicesView; every other method is handed to
+the DRF view.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from core.metrics import query_budget
+from core.renderers import ORJSONRenderer
+from users.authentication import ClaimsJWTAuthentication
+from .cache import aget_user_votes, get_cached_results, cache_results, etag_matches
+from .counters import afold_pending
+from .models import Poll
+from .pagination import PollCursorPagination
+from .payloads import apoll_payloads, aresults_payload, poll_rows
+from .serializers import PollSerializer
+from .views import CategoryChoicesView, PollDetailView, PollListView, PollResultView, poll_not_found
+
+READ_METHODS = ('GET', 'HEAD')
+_renderer = ORJSONRenderer()
+_sync_views = {
+    view_class: sync_to_async(view_class.as_view())
+    for view_class in (CategoryChoicesView, PollDetailView, PollListView, PollResultView)
+}
+
+
+def _allow(view_class):
+    view = view_class()
+    view.head = view.get  # As View.setup() does for every DRF view instance
+    return ', '.join(view.allowed_methods)
+
+
+_allowed_methods = {view_class: _allow(view_class) for view_class in _sync_views}
+
+
+def _response(view_class, data, status_code=status.HTTP_200_OK, headers=None):
+    # The same bytes and headers as the DRF view's JSON response
+    response = HttpResponse(
+        _renderer.render(data), status=status_code, content_type=_renderer.media_type, headers=headers
+    )
+    if data is None:
+        # DRF drops the content type of empty bodies
+        del response['Content-Type']
+    response['Allow'] = _allowed_methods[view_class]
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+async def _authenticate(request):
+    """The DRF request of the view, authenticated like the DRF views are."""
+    authenticator = ClaimsJWTAuthentication()
+    drf_request = Request(request, authenticators=())
+    result = await authenticator.aauthenticate(request)
+    drf_request.user = result[0] if result else AnonymousUser()
+    return drf_request
+
+
+def _error(view_class, request, exc):
+    headers = {}
+    if isinstance(exc, exceptions.AuthenticationFailed):
+        headers['WWW-Authenticate'] = ClaimsJWTAuthentication().authenticate_header(request)
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return _response(view_class, data, exc.status_code, headers)
+
+
+@csrf_exempt
+async def category_choices(request):
+    if request.method not in READ_METHODS:
+        return await _sync_views[CategoryChoicesView](request)
+    try:
+        await _authenticate(request)
+    except exceptions.APIException as exc:
+        return _error(CategoryChoicesView, request, exc)
+    choices = [{'value': value, 'label': label} for value, label in Poll.CATEGORY_CHOICES]
+    return _response(CategoryChoicesView, choices)
+
+
+@csrf_exempt
+@query_budget(PollListView.query_budget)
+async def poll_list(request):
+    if request.method not in READ_METHODS:
+        return await _sync_views[PollListView](request)
+    try:
+        drf_request = await _authenticate(request)
+    except exceptions.APIException as exc:
+        return _error(PollListView, request, exc)
+
+    queryset = Poll.objects.order_by('-created_at')
+    category = request.GET.get('category')
+    if category:
+        if category in dict(Poll.CATEGORY_CHOICES):
+            queryset = queryset.filter(category=category)
+        else:
+            queryset = Poll.objects.none()
+
+    paginator = PollCursorPagination()
+    try:
+        page = await paginator.apaginate_queryset(poll_rows(queryset), drf_request)
+    except exceptions.APIException as exc:
+        return _error(PollListView, request, exc)
+    data = await apoll_payloads(page, drf_request.user)
+    return _response(PollListView, paginator.get_paginated_response(data).data)
+
+
+@csrf_exempt
+async def poll_detail(request, pk):
+    if request.method not in READ_METHODS:
+        return await _sync_views[PollDetailView](request, pk=pk)
+    try:
+        drf_request = await _authenticate(request)
+        try:
+            # Everything the serializer reads is loaded up front: lazy relations cannot be awaited
+            poll = await Poll.objects.for_listing().aget(pk=pk)
+        except Poll.DoesNotExist:
+            raise poll_not_found()
+    except exceptions.APIException as exc:
+        return _error(PollDetailView, request, exc)
+    await afold_pending([poll])
+    context = {'request': drf_request}
+    if drf_request.user.is_authenticated:
+        context['user_votes'] = await aget_user_votes(drf_request.user.id)
+    return _response(PollDetailView, PollSerializer(poll, context=context).data)
+
+
+@csrf_exempt
+@query_budget(PollResultView.query_budget)
+async def poll_results(request, pk):
+    if request.method not in READ_METHODS:
+        return await _sync_views[PollResultView](request, pk=pk)
+    try:
+        await _authenticate(request)
+        # The cache is called directly: the built-in backends' async methods only wrap the
+        # sync ones in a thread hop, which costs more than a locmem or Redis round trip
+        version, entry = get_cached_results(pk)
+        if entry is None:
+            # From the primary, like PollResultView
+            found = await aresults_payload(pk, using='default')
+            if found is None:
+                raise poll_not_found()
+            entry = cache_results(pk, version, *found)
+    except exceptions.APIException as exc:
+        return _error(PollResultView, request, exc)
+
+    headers = {'ETag': entry['etag']}
+    if etag_matches(request.headers.get('If-None-Match'), entry['etag']):
+        return _response(PollResultView, None, status.HTTP_304_NOT_MODIFIED, headers)
+    return _response(PollResultView, entry['data'], headers=headers)
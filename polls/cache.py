@@ -0,0 +1,171 @@
+# pollpro_backend/polls/cache.py
+import hashlib
+import json
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.http import parse_etags
+from .models import Poll, Vote
+
+
+def _version_key(poll_id):
+    return f"poll:{poll_id}:results:version"
+
+
+def _results_key(poll_id, version):
+    return f"poll:{poll_id}:results:v{version}"
+
+
+def _initial_version():
+    # Time-based rather than 1, so a version restarted after an eviction never addresses an
+    # entry cached under the evicted counter
+    return time.time_ns()
+
+
+def get_results_version(poll_id):
+    version = cache.get(_version_key(poll_id))
+    if version is None:
+        initial = _initial_version()
+        cache.add(_version_key(poll_id), initial, timeout=None)
+        version = cache.get(_version_key(poll_id), initial)
+    return version
+
+
+def bump_results_version(poll_id):
+    """
+    Invalidate the cached results of a poll once the surrounding transaction commits.
+    Old entries are never deleted; they simply stop being addressed and age out.
+    """
+    def bump():
+        try:
+            cache.incr(_version_key(poll_id))
+        except ValueError:
+            # No version yet (or it was evicted)
+            cache.set(_version_key(poll_id), _initial_version(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def get_cached_results(poll_id):
+    """Return (version, entry) where entry is {'data': ..., 'etag': ...} or None on a miss."""
+    version = get_results_version(poll_id)
+    return version, cache.get(_results_key(poll_id, version))
+
+
+def cache_results(poll_id, version, data, active):
+    """
+    Store serialized results under the version read before they were computed, so a vote
+    landing mid-computation leaves the entry unreachable instead of stale.
+    Results of expired (no longer `active`) polls can no longer change and are kept indefinitely.
+    """
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    entry = {'data': data, 'etag': f'"{hashlib.sha1(payload).hexdigest()}"'}
+    timeout = settings.POLL_RESULTS_CACHE_TIMEOUT if active else None
+    cache.set(_results_key(poll_id, version), entry, timeout=timeout)
+    return entry
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value (weak or strong validators) covers `etag`."""
+    if not if_none_match:
+        return False
+    etags = [candidate.removeprefix('W/') for candidate in parse_etags(if_none_match)]
+    return '*' in etags or etag in etags
+
+
+# Per-user voted sets: {poll_id: option_id} of every vote of a user. Built lazily from one
+# query, patched when the user's votes are cast or removed, and all dropped at once by
+# forget_user_votes (which bumps the generation).
+_USER_VOTES_GENERATION_KEY = "user_votes:generation"
+
+
+def _user_votes_key(user_id):
+    generation = cache.get(_USER_VOTES_GENERATION_KEY)
+    if generation is None:
+        # Time-based like the results versions, so sets of an evicted generation stay unreachable
+        initial = _initial_version()
+        cache.add(_USER_VOTES_GENERATION_KEY, initial, timeout=None)
+        generation = cache.get(_USER_VOTES_GENERATION_KEY, initial)
+    return f"user:{user_id}:votes:g{generation}"
+
+
+def _user_votes_query(user_id):
+    # The set is cached until the next vote patches it: a lagging replica would cache a vote
+    # as missing, so read from the primary
+    return Vote.objects.using('default').filter(user_id=user_id).values_list('poll_id', 'option_id')
+
+
+def get_user_votes(user_id):
+    """{poll_id: option_id} of every poll the user voted on, from one query on a cache miss."""
+    key = _user_votes_key(user_id)
+    votes = cache.get(key)
+    if votes is None:
+        votes = dict(_user_votes_query(user_id))
+        cache.add(key, votes, timeout=settings.USER_VOTES_CACHE_TIMEOUT)
+    return votes
+
+
+async def aget_user_votes(user_id):
+    # The cache is called directly, as in polls.async_views; only a miss awaits the database
+    key = _user_votes_key(user_id)
+    votes = cache.get(key)
+    if votes is None:
+        votes = {poll_id: option_id async for poll_id, option_id in _user_votes_query(user_id)}
+        cache.add(key, votes, timeout=settings.USER_VOTES_CACHE_TIMEOUT)
+    return votes
+
+
+def user_votes_changed(user_id, changes):
+    """
+    Patch a cached voted set once the surrounding transaction commits. `changes` maps poll id
+    -> the option voted for, or None for a retracted vote. A set that is not cached is left to
+    be built on its next read.
+    """
+    def patch():
+        key = _user_votes_key(user_id)
+        votes = cache.get(key)
+        if votes is None:
+            return
+        for poll_id, option_id in changes.items():
+            if option_id is None:
+                votes.pop(poll_id, None)
+            else:
+                votes[poll_id] = option_id
+        cache.set(key, votes, timeout=settings.USER_VOTES_CACHE_TIMEOUT)
+
+    transaction.on_commit(patch)
+
+
+def forget_user_votes():
+    """Drop every cached voted set once the surrounding transaction commits."""
+    def bump():
+        try:
+            cache.incr(_USER_VOTES_GENERATION_KEY)
+        except ValueError:
+            cache.set(_USER_VOTES_GENERATION_KEY, _initial_version(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+# Poll metadata for queued vote ingestion: (expiry_date, frozenset of option ids), or False
+# for a poll that does not exist. Dropped when options or the expiry change; otherwise a
+# stale entry only lets through votes that the queue drain rejects.
+def _poll_meta_key(poll_id):
+    return f"poll:{poll_id}:meta"
+
+
+def get_poll_meta(poll_id):
+    """(expiry_date, option ids) of a poll, or None when it does not exist; one query on a miss."""
+    meta = cache.get(_poll_meta_key(poll_id))
+    if meta is None:
+        rows = list(Poll.objects.filter(pk=poll_id).values_list('expiry_date', 'options__id'))
+        meta = (rows[0][0], frozenset(option_id for _, option_id in rows if option_id)) if rows else False
+        cache.set(_poll_meta_key(poll_id), meta, timeout=settings.VOTE_METADATA_CACHE_TIMEOUT)
+    return meta or None
+
+
+def forget_poll_meta(poll_id):
+    """Drop the cached metadata of a poll once the surrounding transaction commits."""
+    transaction.on_commit(lambda: cache.delete(_poll_meta_key(poll_id)))
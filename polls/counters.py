@@ -0,0 +1,171 @@
+# pollpro_backend/polls/counters.py
+import random
+from collections import Counter, defaultdict
+from django.db import connection, transaction
+from django.db.models import Case, F, Prefetch, Q, Sum, Value, When, prefetch_related_objects
+from notifications.broker import broker
+from .models import Poll, Option, OptionCounterShard
+from .cache import bump_results_version
+
+
+def results_topic(poll_id):
+    return f"poll:{poll_id}:results"
+
+
+def votes_changed(poll_id, option_deltas):
+    """
+    Announce committed tally changes of one poll: invalidate its cached results and push
+    a `delta` event to open results streams. `option_deltas` maps option id -> delta.
+    """
+    bump_results_version(poll_id)
+    event = {
+        'poll': poll_id,
+        'options': [{'id': option_id, 'delta': delta} for option_id, delta in option_deltas.items()],
+        'total_delta': sum(option_deltas.values()),
+    }
+    transaction.on_commit(lambda: broker.publish(results_topic(poll_id), 'delta', event))
+
+
+def publish_results_snapshot(poll_id, data):
+    """Push a full `snapshot` event once the transaction commits, e.g. after options are replaced."""
+    transaction.on_commit(lambda: broker.publish(results_topic(poll_id), 'snapshot', data))
+
+
+def adjust_vote_counters(votes, delta=1):
+    """
+    Apply a vote delta to the denormalized Option.vote_count / Poll.total_votes columns.
+    `votes` is an iterable of (poll_id, option_id) pairs; use delta=-1 when votes are removed.
+    Updates are F-expressions so concurrent voters never overwrite each other. Polls with
+    sharded counters get the delta on a random shard row per option instead.
+    """
+    per_poll = defaultdict(Counter)
+    for poll_id, option_id in votes:
+        per_poll[poll_id][option_id] += delta
+
+    for poll_id, option_deltas in per_poll.items():
+        counted = 0
+        for option_id, change in option_deltas.items():
+            # Matches nothing on a sharded poll, which costs no extra query on the usual path
+            counted += Option.objects.filter(pk=option_id, poll__counter_shards=0).update(
+                vote_count=F('vote_count') + change
+            )
+        if counted:
+            Poll.objects.filter(pk=poll_id).update(total_votes=F('total_votes') + sum(option_deltas.values()))
+        else:
+            add_to_shards(poll_id, option_deltas)
+        votes_changed(poll_id, option_deltas)
+
+
+def _shard_upsert_sql(count):
+    qn = connection.ops.quote_name
+    table, poll = qn(OptionCounterShard._meta.db_table), qn(Poll._meta.db_table)
+    # The shard is a random number modulo the poll's current shard count, picked in the same
+    # statement; a poll that is not sharded (any more) selects no row and so gets nothing
+    rows = ' UNION ALL '.join(['SELECT %s AS option_id, %s AS pick, %s AS votes'] * count)
+    return f"""
+        INSERT INTO {table} (poll_id, option_id, shard, votes)
+        SELECT p.id, d.option_id, d.pick %% p.counter_shards, d.votes
+        FROM ({rows}) d INNER JOIN {poll} p ON p.id = %s AND p.counter_shards > 0
+        WHERE true
+        ON CONFLICT (option_id, shard) DO UPDATE SET votes = {table}.votes + excluded.votes
+    """
+
+
+def add_to_shards(poll_id, option_deltas):
+    """Add {option_id: delta} to random shards of a sharded poll, in one statement."""
+    params = []
+    for option_id, change in option_deltas.items():
+        params += [option_id, random.randrange(1 << 30), change]
+    with connection.cursor() as cursor:
+        cursor.execute(_shard_upsert_sql(len(option_deltas)), params + [poll_id])
+
+
+def _pending_rows(poll_ids, using=None):
+    return (
+        OptionCounterShard.objects.using(using).filter(poll_id__in=poll_ids)
+        .values_list('poll_id', 'option_id')
+        .annotate(votes=Sum('votes'))
+        .order_by()
+    )
+
+
+def _pending(rows):
+    options, polls = {}, Counter()
+    for poll_id, option_id, votes in rows:
+        options[option_id] = votes
+        polls[poll_id] += votes
+    return options, polls
+
+
+def pending_counts(poll_ids, using=None):
+    """Deltas still in the shards of the given polls, as ({option_id: delta}, {poll_id: delta})."""
+    return _pending(_pending_rows(poll_ids, using))
+
+
+async def apending_counts(poll_ids, using=None):
+    return _pending([row async for row in _pending_rows(poll_ids, using)])
+
+
+def _unfolded(polls):
+    return [poll for poll in polls if poll.counter_shards and not getattr(poll, '_pending_folded', False)]
+
+
+def _fold(polls, pending):
+    options, totals = pending
+    for poll in polls:
+        poll.total_votes += totals.get(poll.id, 0)
+        for option in poll.options.all():
+            option.vote_count += options.get(option.id, 0)
+        poll._pending_folded = True
+
+
+def fold_pending(polls):
+    """
+    Add the shard deltas onto loaded Poll instances and their prefetched options, in one query
+    when any of them has sharded counters and none otherwise.
+    """
+    sharded = _unfolded(polls)
+    if sharded:
+        # A no-op for options prefetched already, as by Poll.objects.for_listing()
+        prefetch_related_objects(sharded, Prefetch('options', queryset=Option.objects.order_by('id')))
+        _fold(sharded, pending_counts([poll.id for poll in sharded]))
+
+
+async def afold_pending(polls):
+    sharded = _unfolded(polls)
+    if sharded:
+        _fold(sharded, await apending_counts([poll.id for poll in sharded]))
+
+
+def compact_poll_counters(poll_id):
+    """
+    Fold the shard deltas of one poll into Option.vote_count and Poll.total_votes in one
+    transaction, so reads see the same totals before and after. Exactly the amounts read are
+    subtracted from the shards: increments landing meanwhile stay for the next run. Spent rows
+    of polls that are no longer sharded are dropped. Returns the net votes folded.
+    """
+    with transaction.atomic():
+        shards = list(
+            OptionCounterShard.objects.filter(poll_id=poll_id).exclude(votes=0).values_list('id', 'option_id', 'votes')
+        )
+        per_option = Counter()
+        for _, option_id, votes in shards:
+            per_option[option_id] += votes
+        if shards:
+            OptionCounterShard.objects.filter(pk__in=[shard_id for shard_id, _, _ in shards]).update(
+                votes=F('votes') - Case(*[When(pk=shard_id, then=Value(votes)) for shard_id, _, votes in shards])
+            )
+            for option_id, votes in per_option.items():
+                Option.objects.filter(pk=option_id).update(vote_count=F('vote_count') + votes)
+            Poll.objects.filter(pk=poll_id).update(total_votes=F('total_votes') + sum(per_option.values()))
+        OptionCounterShard.objects.filter(poll_id=poll_id, votes=0, poll__counter_shards=0).delete()
+    return sum(per_option.values())
+
+
+def compact_counters():
+    """Compact every poll with unfolded shard deltas, one transaction per poll. Returns (polls, votes)."""
+    poll_ids = list(
+        OptionCounterShard.objects.filter(~Q(votes=0) | Q(poll__counter_shards=0))
+        .order_by().values_list('poll_id', flat=True).distinct()
+    )
+    return len(poll_ids), sum(compact_poll_counters(poll_id) for poll_id in poll_ids)
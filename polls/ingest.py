@@ -0,0 +1,73 @@
+# pollpro_backend/polls/ingest.py
+"""
+Queued vote ingestion for voting windows with huge bursts (VOTE_INGESTION_MODE = 'queued').
+The vote endpoint only checks a vote against cached poll metadata and the voter's cached
+voted set, appends it to the QueuedVote table and answers 202. `manage.py drain_vote_queue`
+applies the queue in batches with polls.voting.record_votes, which re-checks every vote:
+one that turns out invalid or duplicate is dropped there and counted as rejected.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from .cache import get_poll_meta, get_user_votes
+from .models import QueuedVote
+from .voting import VoteRejected, record_votes
+
+_LAST_DRAIN_KEY = "vote_queue:last_drain"
+
+
+def queued_ingestion():
+    return settings.VOTE_INGESTION_MODE == 'queued'
+
+
+def enqueue_vote(poll_id, option_id, user_id):
+    """
+    Accept a vote into the queue with a single INSERT when the caches are warm. Raises
+    VoteRejected with the same errors as cast_vote. Returns the queue entry id.
+    """
+    now = timezone.now()
+    meta = get_poll_meta(poll_id)
+    if meta is None:
+        raise VoteRejected({"error": "Poll not found"}, status.HTTP_404_NOT_FOUND)
+    expiry_date, option_ids = meta
+    if expiry_date is not None and expiry_date <= now:
+        raise VoteRejected({"error": "Cannot vote on an expired poll"})
+    if poll_id in get_user_votes(user_id):
+        raise VoteRejected({"error": "You have already voted on this poll"})
+    if option_id not in option_ids:
+        raise VoteRejected({"option": ["Option does not belong to this poll."]})
+    return QueuedVote.objects.create(poll_id=poll_id, option_id=option_id, user_id=user_id, accepted_at=now).id
+
+
+def drain_vote_queue(batch_size):
+    """
+    Apply the oldest `batch_size` queued votes in one transaction and delete them. Rows
+    locked by another drain are skipped, so several workers can run at once. Returns
+    (drained, recorded).
+    """
+    with transaction.atomic():
+        batch = list(
+            QueuedVote.objects.select_for_update(skip_locked=True).order_by('id')
+            .values_list('id', 'poll_id', 'option_id', 'user_id', 'accepted_at')[:batch_size]
+        )
+        recorded = record_votes(row[1:] for row in batch)
+        if batch:
+            queue = QueuedVote.objects.filter(pk__in=[row[0] for row in batch])
+            queue._raw_delete(queue.db)
+    cache.set(_LAST_DRAIN_KEY, timezone.now(), timeout=None)
+    return len(batch), len(recorded)
+
+
+def vote_queue_status():
+    """Queue length and lag: how long ago the oldest waiting vote was accepted."""
+    now = timezone.now()
+    oldest = QueuedVote.objects.order_by('id').values_list('accepted_at', flat=True).first()
+    return {
+        'mode': settings.VOTE_INGESTION_MODE,
+        'pending': QueuedVote.objects.count(),
+        'oldest_accepted_at': oldest,
+        'lag_seconds': round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+        'last_drain_at': cache.get(_LAST_DRAIN_KEY),
+    }
@@ -0,0 +1,69 @@
+# pollpro_backend/polls/management/commands/benchmark_counters.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from users.models import CustomUser
+from polls.models import Poll, Option
+from polls.voting import VoteRejected, cast_vote
+
+BENCH_PREFIX = '__bench_counter_'
+
+
+def vote_worker(poll_id, option_ids, user_ids):
+    """Cast one vote per user id on its own connection; returns the number of failed votes."""
+    errors = 0
+    try:
+        for i, user_id in enumerate(user_ids):
+            try:
+                cast_vote(poll_id, option_ids[i % len(option_ids)], user_id)
+            except (VoteRejected, DatabaseError):
+                errors += 1
+    finally:
+        connection.close()
+    return errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress the vote counters of one hot poll with concurrent voters: a single counter row per "
+        "option against sharded counters (Poll.counter_shards). Reports votes/sec and failed votes "
+        "per thread count. Commits to the configured database and deletes its data afterwards; "
+        "run it against Postgres, as SQLite serializes every writer anyway."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16], help="Concurrent voter counts.")
+        parser.add_argument('--votes', type=int, default=200, help="Votes per voter thread.")
+        parser.add_argument('--options', type=int, default=2, help="Options of the hot poll.")
+        parser.add_argument('--shards', type=int, default=16, help="Counter shards of the sharded poll.")
+
+    def handle(self, *args, **options):
+        per_thread = options['votes']
+        voters = max(options['threads']) * per_thread
+        creator = CustomUser.objects.create(username=f"{BENCH_PREFIX}creator")
+        try:
+            CustomUser.objects.bulk_create(
+                (CustomUser(username=f"{BENCH_PREFIX}{i}", password='!') for i in range(voters)), batch_size=5000
+            )
+            user_ids = list(
+                CustomUser.objects.filter(username__startswith=BENCH_PREFIX).exclude(pk=creator.pk)
+                .order_by('id').values_list('id', flat=True)
+            )
+            self.stdout.write(f"{'counters':<14}{'threads':>8}{'votes/sec':>12}{'errors':>8}")
+            for label, shards in (('single row', 0), (f"{options['shards']} shards", options['shards'])):
+                for threads in options['threads']:
+                    poll = Poll.objects.create(question=f"Benchmark {label}", creator=creator, counter_shards=shards)
+                    option_ids = [o.id for o in Option.objects.bulk_create(
+                        Option(poll=poll, text=str(i)) for i in range(options['options'])
+                    )]
+                    chunks = [user_ids[i * per_thread:(i + 1) * per_thread] for i in range(threads)]
+                    started = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=threads) as pool:
+                        errors = sum(pool.map(lambda chunk: vote_worker(poll.id, option_ids, chunk), chunks))
+                    elapsed = time.perf_counter() - started
+                    rate = (threads * per_thread - errors) / elapsed
+                    self.stdout.write(f"{label:<14}{threads:>8}{rate:>12.0f}{errors:>8}")
+        finally:
+            # Cascades to the benchmark polls, their votes and shard rows
+            CustomUser.objects.filter(username__startswith=BENCH_PREFIX).delete()
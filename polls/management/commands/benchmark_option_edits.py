@@ -0,0 +1,64 @@
+# pollpro_backend/polls/management/commands/benchmark_option_edits.py
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from users.models import CustomUser
+from polls.models import Poll, Option, Vote
+from polls.options import edit_options
+
+TEXTS = ['Red', 'Green', 'Blue', 'Yellow']
+
+
+def legacy_replace_options(poll, texts):
+    """The pre-diff PollUpdateSerializer path: delete every option (cascading to every vote), then recreate."""
+    poll.total_votes = 0
+    poll.save(update_fields=['total_votes'])
+    poll.options.all().delete()
+    Option.objects.bulk_create(Option(poll=poll, text=text) for text in texts)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the latency and queries of editing the options of a heavily voted poll: the legacy "
+        "delete-and-recreate path against the incremental diff (polls.options). All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--votes', type=int, default=100000, help="Votes on each benchmarked poll.")
+
+    def handle(self, *args, **options):
+        count = options['votes']
+        typo = [{'id': None, 'text': text} for text in TEXTS[:-1]] + [{'id': None, 'text': 'Yelow'}]
+        scenarios = {
+            'legacy: fix a typo': lambda poll, ids: legacy_replace_options(poll, TEXTS[:-1] + ['Yelow']),
+            'diff: fix a typo': lambda poll, ids: edit_options(poll, typo[:-1] + [{'id': ids[-1], 'text': 'Yelow'}]),
+            'diff: add an option': lambda poll, ids: edit_options(poll, typo[:-1] + [{'id': None, 'text': 'Yellow'}, {'id': None, 'text': 'Pink'}]),
+            'diff: remove an option': lambda poll, ids: edit_options(poll, typo[:-1]),
+        }
+        with transaction.atomic():
+            creator = CustomUser.objects.create(username='__bench_creator')
+            CustomUser.objects.bulk_create(
+                (CustomUser(username=f"__bench_editor_{i}", password='!') for i in range(count)), batch_size=5000
+            )
+            users = list(CustomUser.objects.filter(username__startswith='__bench_editor_').values_list('id', flat=True))
+            results = {}
+            for label, edit in scenarios.items():
+                poll = Poll.objects.create(question=f"Benchmark {label}", creator=creator, total_votes=count)
+                option_ids = [o.id for o in Option.objects.bulk_create(
+                    Option(poll=poll, text=text, vote_count=(count + 3 - i) // 4) for i, text in enumerate(TEXTS)
+                )]
+                Vote.objects.bulk_create(
+                    (Vote(poll=poll, option_id=option_ids[i % 4], user_id=user) for i, user in enumerate(users)),
+                    batch_size=5000,
+                )
+                queries = []
+                with connection.execute_wrapper(lambda execute, sql, *rest: queries.append(sql) or execute(sql, *rest)):
+                    started = time.perf_counter()
+                    edit(poll, option_ids)
+                    elapsed = time.perf_counter() - started
+                results[label] = (elapsed * 1000, len(queries), Vote.objects.filter(poll=poll).count())
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'edit':<26}{'ms':>10}{'queries':>9}{'votes kept':>12}")
+        for label, (ms, queries, kept) in results.items():
+            self.stdout.write(f"{label:<26}{ms:>10.1f}{queries:>9}{kept:>12}")
@@ -0,0 +1,82 @@
+# pollpro_backend/polls/management/commands/benchmark_votes.py
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from users.models import CustomUser
+from polls.models import Poll, Option, Vote
+from polls.counters import adjust_vote_counters
+from polls.ingest import drain_vote_queue, enqueue_vote
+from polls.voting import cast_vote
+
+
+def legacy_vote(poll_id, option_id, user):
+    """The pre-cast_vote path: poll lookup, duplicate check, option validation, then insert."""
+    poll = Poll.objects.get(pk=poll_id)
+    if not poll.is_active():
+        return
+    if Vote.objects.filter(poll=poll, user=user).first():
+        return
+    option = Option.objects.get(pk=option_id)
+    if option.poll != poll or not Poll.objects.get(pk=option.poll_id).is_active():
+        return
+    vote = Vote.objects.create(poll=poll, user=user, option=option)
+    adjust_vote_counters([(vote.poll_id, vote.option_id)])
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure votes/sec and queries per vote of the legacy and current vote insertion paths, and of "
+        "queued ingestion: accepting votes into the queue, then draining it. All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--votes', type=int, default=2000, help="Votes to cast per path.")
+
+    def handle(self, *args, **options):
+        count = options['votes']
+        with transaction.atomic():
+            creator = CustomUser.objects.create(username='__bench_creator')
+            results = {}
+            # (label, untimed setup, timed runner); draining is timed on a queue filled beforehand
+            runners = (
+                ('legacy', None, self.run_legacy), ('cast_vote', None, self.run_cast_vote),
+                ('enqueue', None, self.run_enqueue), ('drain', self.run_enqueue, self.run_drain),
+            )
+            for label, setup, runner in runners:
+                poll = Poll.objects.create(question=f"Benchmark {label}", creator=creator)
+                option_ids = [o.id for o in Option.objects.bulk_create(Option(poll=poll, text=str(i)) for i in range(4))]
+                CustomUser.objects.bulk_create(
+                    CustomUser(username=f"__bench_{label}_{i}", password='!') for i in range(count)
+                )
+                # bulk_create does not return primary keys on every backend
+                users = list(CustomUser.objects.filter(username__startswith=f"__bench_{label}_"))
+                if setup is not None:
+                    setup(poll.id, option_ids, users)
+                queries = []
+                with connection.execute_wrapper(lambda execute, sql, *rest: queries.append(sql) or execute(sql, *rest)):
+                    started = time.perf_counter()
+                    runner(poll.id, option_ids, users)
+                    elapsed = time.perf_counter() - started
+                results[label] = (count / elapsed, len(queries) / count)
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'path':<12}{'votes/sec':>12}{'queries/vote':>15}")
+        for label, (rate, per_vote) in results.items():
+            self.stdout.write(f"{label:<12}{rate:>12.0f}{per_vote:>15.2f}")
+
+    def run_legacy(self, poll_id, option_ids, users):
+        for i, user in enumerate(users):
+            with transaction.atomic():
+                legacy_vote(poll_id, option_ids[i % len(option_ids)], user)
+
+    def run_cast_vote(self, poll_id, option_ids, users):
+        for i, user in enumerate(users):
+            cast_vote(poll_id, option_ids[i % len(option_ids)], user.id)
+
+    def run_enqueue(self, poll_id, option_ids, users):
+        for i, user in enumerate(users):
+            enqueue_vote(poll_id, option_ids[i % len(option_ids)], user.id)
+
+    def run_drain(self, poll_id, option_ids, users):
+        while drain_vote_queue(1000)[0]:
+            pass
@@ -0,0 +1,21 @@
+# pollpro_backend/polls/management/commands/compact_vote_counters.py
+from django.core.management.base import BaseCommand
+from polls.counters import compact_counters, compact_poll_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold the vote deltas of polls with sharded counters into Option.vote_count and "
+        "Poll.total_votes. Reads add up the shards either way, so this only keeps them short: "
+        "schedule it every minute or so while a poll is sharded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', type=int, action='append', dest='polls', help="Only compact the given poll id (repeatable).")
+
+    def handle(self, *args, **options):
+        if options['polls']:
+            polls, votes = len(options['polls']), sum(compact_poll_counters(poll_id) for poll_id in options['polls'])
+        else:
+            polls, votes = compact_counters()
+        self.stdout.write(self.style.SUCCESS(f"Folded {votes} votes of {polls} polls."))
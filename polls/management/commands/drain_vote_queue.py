@@ -0,0 +1,34 @@
+# pollpro_backend/polls/management/commands/drain_vote_queue.py
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from polls.ingest import drain_vote_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the votes queued in VOTE_INGESTION_MODE='queued', one transaction per batch, until "
+        "the queue is empty. With --follow it keeps polling as a worker; several workers may run "
+        "at once on PostgreSQL. Votes that turn out invalid or duplicate are dropped as rejected."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.VOTE_QUEUE_BATCH_SIZE, help="Votes applied per transaction.")
+        parser.add_argument('--follow', action='store_true', help="Keep draining as votes arrive.")
+        parser.add_argument('--interval', type=float, default=0.5, help="Seconds to wait when the queue is empty (with --follow).")
+
+    def handle(self, *args, **options):
+        totals = [0, 0]
+        while True:
+            drained, recorded = drain_vote_queue(options['batch_size'])
+            totals[0] += drained
+            totals[1] += recorded
+            if drained:
+                self.stdout.write(f"Applied {recorded} of {drained} queued votes ({drained - recorded} rejected).")
+            if drained < options['batch_size']:
+                if not options['follow']:
+                    break
+                close_old_connections()
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Drained {totals[0]} queued votes: {totals[1]} recorded, {totals[0] - totals[1]} rejected."))
@@ -0,0 +1,83 @@
+# pollpro_backend/polls/management/commands/explain_queries.py
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from polls.cache import _user_votes_query
+from polls.models import Poll, Option, Vote
+from polls.pagination import PollCursorPagination
+from polls.seeding import seed_polls
+from polls.voting import _insert_sql
+
+
+class Command(BaseCommand):
+    help = (
+        "Print the query plan of every hot endpoint query. By default a synthetic dataset is seeded "
+        "and rolled back afterwards, so plans can be compared between commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--polls', type=int, default=5000, help="Polls to seed.")
+        parser.add_argument('--users', type=int, default=500, help="Users to seed.")
+        parser.add_argument('--votes-per-poll', type=int, default=50, help="Votes to seed per poll.")
+        parser.add_argument('--no-seed', action='store_true', help="Explain against the existing data only.")
+        parser.add_argument('--analyze', action='store_true', help="Use EXPLAIN ANALYZE (Postgres only).")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if not options['no_seed']:
+                seed_polls(polls=options['polls'], users=options['users'], votes_per_poll=options['votes_per_poll'])
+                if connection.vendor == 'postgresql':
+                    with connection.cursor() as cursor:
+                        cursor.execute('ANALYZE')
+            for name, query in self.endpoint_queries():
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                self.stdout.write(self.explain(query, options['analyze']))
+                self.stdout.write('')
+            transaction.set_rollback(True)
+
+    def explain(self, query, analyze):
+        if isinstance(query, tuple):
+            return self.explain_sql(*query, analyze=analyze)
+        if analyze and connection.vendor == 'postgresql':
+            return query.explain(analyze=True, buffers=True)
+        return query.explain()
+
+    def explain_sql(self, sql, params, analyze):
+        # Raw statements (the vote insert) have no queryset to call .explain() on
+        if connection.vendor == 'postgresql':
+            prefix = 'EXPLAIN (ANALYZE, BUFFERS)' if analyze else 'EXPLAIN'
+        elif connection.vendor == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN'
+        else:
+            prefix = 'EXPLAIN'
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def endpoint_queries(self):
+        poll = Poll.objects.order_by('-total_votes').first()
+        voter = Vote.objects.filter(poll=poll).values_list('user_id', flat=True).first() if poll else None
+        option_id = Option.objects.filter(poll=poll).values_list('id', flat=True).first() if poll else None
+        db_now = connection.ops.adapt_datetimefield_value(timezone.now())
+        # Same statement and parameters as polls.voting.cast_vote
+        vote_insert = (
+            _insert_sql(connection.vendor == 'postgresql'),
+            [voter, db_now, option_id, poll.id if poll else None, db_now],
+        )
+        page = PollCursorPagination.page_size + 1
+        ordering = PollCursorPagination.ordering
+        page_ids = list(Poll.objects.order_by(*ordering).values_list('id', flat=True)[:page])
+
+        return [
+            ('poll_list', Poll.objects.order_by(*ordering)[:page]),
+            ('poll_list?category=', Poll.objects.filter(category='TECH').order_by(*ordering)[:page]),
+            ('poll_list options prefetch', Option.objects.filter(poll_id__in=page_ids).order_by('id')),
+            ('voted set (cache miss)', _user_votes_query(voter)),
+            ('user_poll_list_create', Poll.objects.filter(creator_id=poll.creator_id if poll else None).order_by(*ordering)[:page]),
+            ('user_poll_history', Poll.objects.filter(votes__user_id=voter).distinct().order_by(*ordering)[:page]),
+            ('poll_results options', Option.objects.filter(poll=poll)),
+            ('poll_vote insert', vote_insert),
+            ('votes by option', Vote.objects.filter(poll=poll).values('option').annotate(votes=Count('id')).order_by()),
+            ('active polls', Poll.objects.filter(expiry_date__gt=timezone.now()).order_by('expiry_date')[:page]),
+        ]
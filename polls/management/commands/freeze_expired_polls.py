@@ -0,0 +1,28 @@
+# pollpro_backend/polls/management/commands/freeze_expired_polls.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from polls.snapshots import freeze_polls, pending_polls
+
+
+class Command(BaseCommand):
+    help = (
+        "Freeze the final results of polls that have expired since the last run. "
+        "Meant to be scheduled (e.g. every minute from cron); a backlog is worked through in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Polls frozen per transaction.")
+        parser.add_argument('--max-batches', type=int, help="Stop after this many batches (default: drain the backlog).")
+
+    def handle(self, *args, **options):
+        # Polls closing while the sweep runs are left for the next run
+        now = timezone.now()
+        frozen = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            poll_ids = list(pending_polls(now).values_list('id', flat=True)[:options['batch_size']])
+            if not poll_ids:
+                break
+            frozen += freeze_polls(poll_ids)
+            batches += 1
+            self.stdout.write(f"Batch {batches}: froze {len(poll_ids)} polls")
+        self.stdout.write(self.style.SUCCESS(f"Froze {frozen} expired polls."))
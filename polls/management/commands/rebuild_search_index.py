@@ -0,0 +1,24 @@
+# pollpro_backend/polls/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+from polls.models import Poll
+from polls.search import index_polls
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents of all polls, e.g. after a bulk import."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Polls indexed per statement.")
+
+    def handle(self, *args, **options):
+        poll_ids = Poll.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=options['batch_size'])
+        batch, indexed = [], 0
+        for poll_id in poll_ids:
+            batch.append(poll_id)
+            if len(batch) == options['batch_size']:
+                index_polls(batch)
+                indexed += len(batch)
+                batch = []
+        index_polls(batch)
+        indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} polls."))
@@ -0,0 +1,73 @@
+# pollpro_backend/polls/management/commands/rebuild_vote_counters.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value, F
+from django.db.models.functions import Coalesce
+from polls.models import Poll, Option, OptionCounterShard, Vote
+
+
+def _vote_count_subquery(field):
+    counts = (
+        Vote.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(c=Count('*'))
+        .values('c')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def _pending_subquery(field):
+    # Deltas of sharded polls not compacted yet count towards the stored value
+    pending = (
+        OptionCounterShard.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(s=Sum('votes'))
+        .values('s')
+    )
+    return Coalesce(Subquery(pending, output_field=IntegerField()), Value(0))
+
+
+class Command(BaseCommand):
+    help = "Check and rebuild the denormalized Option.vote_count and Poll.total_votes counters from polls_vote."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help="Only report drifted counters; exit non-zero if any are found.")
+        parser.add_argument('--poll', type=int, action='append', dest='polls', help="Restrict to the given poll id (repeatable).")
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.all()
+        option_qs = Option.objects.all()
+        if options['polls']:
+            polls = polls.filter(pk__in=options['polls'])
+            option_qs = option_qs.filter(poll_id__in=options['polls'])
+
+        drifted_options = option_qs.annotate(
+            stored=F('vote_count') + _pending_subquery('option'), actual=_vote_count_subquery('option'),
+        ).exclude(stored=F('actual'))
+        drifted_polls = polls.annotate(
+            stored=F('total_votes') + _pending_subquery('poll'), actual=_vote_count_subquery('poll'),
+        ).exclude(stored=F('actual'))
+
+        if options['check']:
+            option_rows = list(drifted_options.values_list('pk', 'stored', 'actual'))
+            poll_rows = list(drifted_polls.values_list('pk', 'stored', 'actual'))
+            for pk, stored, actual in option_rows:
+                self.stdout.write(f"Option {pk}: stored {stored}, actual {actual}")
+            for pk, stored, actual in poll_rows:
+                self.stdout.write(f"Poll {pk}: stored {stored}, actual {actual}")
+            if option_rows or poll_rows:
+                raise CommandError(f"{len(option_rows)} option and {len(poll_rows)} poll counters have drifted.")
+            self.stdout.write(self.style.SUCCESS("All vote counters are consistent."))
+            return
+
+        with transaction.atomic():
+            # The counters are recounted in full, so the shard deltas are spent
+            shards = OptionCounterShard.objects.all()
+            if options['polls']:
+                shards = shards.filter(poll_id__in=options['polls'])
+            shards.update(votes=0)
+            fixed_options = option_qs.update(vote_count=_vote_count_subquery('option'))
+            fixed_polls = polls.update(total_votes=_vote_count_subquery('poll'))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {fixed_options} options and {fixed_polls} polls."))
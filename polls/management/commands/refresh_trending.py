@@ -0,0 +1,14 @@
+# pollpro_backend/polls/management/commands/refresh_trending.py
+from django.core.management.base import BaseCommand
+from polls.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the trending feed (top polls overall and per category) from the hourly vote "
+        "rollups. Schedule it right after `rollup_votes`."
+    )
+
+    def handle(self, *args, **options):
+        written = refresh_trending()
+        self.stdout.write(self.style.SUCCESS(f"Ranked {written} trending entries."))
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:31
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Poll = apps.get_model('polls', 'Poll')
+    Option = apps.get_model('polls', 'Option')
+    Vote = apps.get_model('polls', 'Vote')
+
+    def counts(field):
+        qs = Vote.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(c=Count('*')).values('c')
+        return Coalesce(Subquery(qs, output_field=IntegerField()), Value(0))
+
+    Option.objects.update(vote_count=counts('option'))
+    Poll.objects.update(total_votes=counts('poll'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='option',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='poll',
+            name='total_votes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollResultSnapshot',
+            fields=[
+                ('poll', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='result_snapshot', serialize=False, to='polls.poll')),
+                ('options', models.JSONField()),
+                ('total_votes', models.PositiveIntegerField()),
+                ('frozen_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
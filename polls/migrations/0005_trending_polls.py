@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_result_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPoll',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(blank=True, max_length=4)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='polls.poll')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'rank'), name='trending_scope_rank_uniq')],
+            },
+        ),
+    ]
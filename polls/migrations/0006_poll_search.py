@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 20:07
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+OPTIONS_TEXT = "COALESCE((SELECT string_agg(o.text, ' ') FROM polls_option o WHERE o.poll_id = p.id), '')"
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        config = settings.SEARCH_CONFIG
+        schema_editor.execute(
+            "UPDATE polls_poll p SET search_vector = "
+            f"setweight(to_tsvector('{config}', p.question), 'A') || "
+            f"setweight(to_tsvector('{config}', {OPTIONS_TEXT}), 'B')"
+        )
+        schema_editor.execute("CREATE INDEX poll_search_vector_idx ON polls_poll USING gin (search_vector)")
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute("CREATE VIRTUAL TABLE polls_poll_fts USING fts5(question, options)")
+        schema_editor.execute(
+            "INSERT INTO polls_poll_fts (rowid, question, options) SELECT p.id, p.question, "
+            + OPTIONS_TEXT.replace("string_agg", "group_concat") + " FROM polls_poll p"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS poll_search_vector_idx")
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS polls_poll_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_trending_polls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # The GIN index (PostgreSQL) and the FTS5 fallback (SQLite) are backend-specific
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
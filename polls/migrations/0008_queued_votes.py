@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_sharded_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('poll_id', models.BigIntegerField()),
+                ('option_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField()),
+                ('accepted_at', models.DateTimeField()),
+            ],
+        ),
+    ]
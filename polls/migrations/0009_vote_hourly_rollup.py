@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Take over VoteHourlyRollup from pollpro_admin, so polls no longer imports the admin app.
+    The table stays where pollpro_admin created it; only the migration state moves.
+    """
+
+    dependencies = [
+        ('polls', '0008_queued_votes'),
+        ('pollpro_admin', '0002_rollup_observed_id'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='VoteHourlyRollup',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('hour', models.DateTimeField()),
+                        ('category', models.CharField(choices=[('TECH', 'Technology'), ('ENT', 'Entertainment'), ('SPRT', 'Sports'), ('POL', 'Politics'), ('LIFE', 'Lifestyle'), ('EDU', 'Education')], max_length=4)),
+                        ('votes', models.PositiveIntegerField(default=0)),
+                        ('option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='polls.option')),
+                        ('poll', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='polls.poll')),
+                    ],
+                    options={
+                        'db_table': 'pollpro_admin_votehourlyrollup',
+                        'indexes': [models.Index(fields=['poll', 'hour'], name='rollup_poll_hour_idx'), models.Index(fields=['category', 'hour'], name='rollup_category_hour_idx')],
+                        'constraints': [models.UniqueConstraint(fields=('hour', 'option'), name='rollup_hour_option_uniq')],
+                    },
+                ),
+            ],
+        ),
+    ]
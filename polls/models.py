@@ -1,8 +1,28 @@
 # pollpro_backend/polls/models.py
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from users.models import CustomUser as User  
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.utils.functional import cached_property
+
+class PollQuerySet(models.QuerySet):
+    def for_listing(self):
+        """
+        Load everything PollSerializer touches in a constant number of queries:
+        the creator and the frozen results via a join and the options in one prefetch.
+        The requesting user's own votes come from their cached voted set (polls.cache.get_user_votes).
+        """
+        return self.select_related('creator', 'result_snapshot').prefetch_related(
+            models.Prefetch('options', queryset=Option.objects.order_by('id'))
+        )
+
+
+class PollManager(models.Manager.from_queryset(PollQuerySet)):
+    def get_queryset(self):
+        # The search document is only ever read inside the database
+        return super().get_queryset().defer('search_vector')
+
 
 class Poll(models.Model):
     CATEGORY_CHOICES = (
@@ -14,10 +34,41 @@ class Poll(models.Model):
         ('EDU', 'Education'),
     )
     question = models.CharField(max_length=255)
-    creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='polls')
+    # Covered by the (creator, -created_at) index below
+    creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='polls', db_index=False)
     category = models.CharField(max_length=4, choices=CATEGORY_CHOICES, default='TECH')
     created_at = models.DateTimeField(auto_now_add=True)
     expiry_date = models.DateTimeField(null=True, blank=True)
+    # Denormalized tally, maintained by polls.counters; rebuild with `manage.py rebuild_vote_counters`
+    total_votes = models.PositiveIntegerField(default=0, editable=False)
+    # Set on viral polls: vote increments are spread over this many OptionCounterShard rows per
+    # option instead of contending on the option and poll rows (0 = off, see polls.counters)
+    counter_shards = models.PositiveSmallIntegerField(default=0)
+    # Weighted question + options document maintained by polls.search (PostgreSQL only; other
+    # backends use an FTS5 table). Its GIN index is created by migration 0006.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PollManager()
+
+    class Meta:
+        indexes = [
+            # Listings page on (-created_at, id), see polls.pagination
+            models.Index(fields=['-created_at', 'id'], name='poll_created_idx'),
+            models.Index(fields=['category', '-created_at', 'id'], name='poll_category_created_idx'),
+            models.Index(fields=['creator', '-created_at', 'id'], name='poll_creator_created_idx'),
+            # now() is not immutable and cannot appear in an index predicate, so "not expired"
+            # is served by the pending-deadline range below plus the open-ended partial index.
+            models.Index(
+                fields=['expiry_date'],
+                name='poll_expiry_pending_idx',
+                condition=models.Q(expiry_date__isnull=False),
+            ),
+            models.Index(
+                fields=['-created_at', 'id'],
+                name='poll_open_created_idx',
+                condition=models.Q(expiry_date__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return self.question
@@ -25,9 +76,22 @@ class Poll(models.Model):
     def is_active(self):
         return self.expiry_date is None or self.expiry_date > timezone.now()
 
+    def frozen_results(self):
+        """
+        The PollResultSnapshot of a closed poll, or None while the poll is open or not frozen yet.
+        Open polls never have one, so only closed polls may cost a lookup.
+        """
+        if self.is_active():
+            return None
+        try:
+            return self.result_snapshot
+        except PollResultSnapshot.DoesNotExist:
+            return None
+
 class Option(models.Model):
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='options')
     text = models.CharField(max_length=255)
+    vote_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return f"{self.poll.question} - {self.text}"
@@ -35,15 +99,136 @@ class Option(models.Model):
 class Vote(models.Model):
     poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='votes')
     option = models.ForeignKey(Option, on_delete=models.CASCADE, related_name='votes')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='votes')
+    # Covered by the (user, -created_at) index below
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='votes', db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ('poll', 'user')
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='vote_user_created_idx'),
+        ]
 
     def clean(self):
         if not self.poll.is_active():
             raise ValidationError("Cannot vote on an expired poll.")
 
     def __str__(self):
-        return f"{self.user.username} voted for {self.option.text} in {self.poll.question}"
\ No newline at end of file
+        return f"{self.user.username} voted for {self.option.text} in {self.poll.question}"
+
+class PollResultSnapshot(models.Model):
+    """
+    Final tallies of a closed poll, frozen by `manage.py freeze_expired_polls` so its results
+    are served from one row. `options` holds compact [option_id, text, votes] triples.
+    """
+    poll = models.OneToOneField(Poll, on_delete=models.CASCADE, primary_key=True, related_name='result_snapshot')
+    options = models.JSONField()
+    total_votes = models.PositiveIntegerField()
+    frozen_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Results of {self.poll_id}"
+
+    @cached_property
+    def results(self):
+        """Option results keyed by option id, shaped like OptionSerializer output."""
+        return self.results_of(self.options, self.total_votes)
+
+    @staticmethod
+    def results_of(options, total):
+        return {
+            option_id: {
+                'id': option_id,
+                'text': text,
+                'votes': votes,
+                'percentage': (votes / total * 100) if total > 0 else 0,
+            }
+            for option_id, text, votes in options
+        }
+
+
+class VoteHourlyRollup(models.Model):
+    """
+    Votes cast per option per hour, maintained incrementally by `manage.py rollup_votes`
+    so analytics never scan polls_vote. `category` is copied from the poll at rollup time.
+    """
+    hour = models.DateTimeField()
+    # Covered by the (poll, hour) index below
+    poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='+', db_index=False)
+    option = models.ForeignKey(Option, on_delete=models.CASCADE, related_name='+')
+    category = models.CharField(max_length=4, choices=Poll.CATEGORY_CHOICES)
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Created by pollpro_admin before the model moved here; the table kept its name
+        db_table = 'pollpro_admin_votehourlyrollup'
+        constraints = [
+            # Also serves hour-range scans such as the top-N polls
+            models.UniqueConstraint(fields=['hour', 'option'], name='rollup_hour_option_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['poll', 'hour'], name='rollup_poll_hour_idx'),
+            models.Index(fields=['category', 'hour'], name='rollup_category_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} option {self.option_id}: {self.votes}"
+
+
+class TrendingPoll(models.Model):
+    """
+    Precomputed top-K of open polls by time-decayed vote velocity, overall (scope '') and per
+    category. Rebuilt by `manage.py refresh_trending`; the feed reads at most K rows by index.
+    """
+    scope = models.CharField(max_length=4, blank=True)
+    rank = models.PositiveSmallIntegerField()
+    poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='trending')
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'rank'], name='trending_scope_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope or 'all'} #{self.rank}: {self.poll_id}"
+
+
+class OptionCounterShard(models.Model):
+    """
+    Vote deltas of an option of a poll with sharded counters, not yet folded into
+    Option.vote_count and Poll.total_votes. Each increment lands on one of the poll's
+    counter_shards rows at random; reads add them up and `manage.py compact_vote_counters`
+    folds them back.
+    """
+    poll = models.ForeignKey(Poll, on_delete=models.CASCADE, related_name='+')
+    # Covered by the (option, shard) constraint below
+    option = models.ForeignKey(Option, on_delete=models.CASCADE, related_name='+', db_index=False)
+    shard = models.PositiveSmallIntegerField()
+    # Retractions make a shard negative
+    votes = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['option', 'shard'], name='option_counter_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Option {self.option_id} shard {self.shard}: {self.votes}"
+
+
+class QueuedVote(models.Model):
+    """
+    A vote accepted in queued ingestion mode (VOTE_INGESTION_MODE = 'queued') and not applied
+    yet. Plain ids instead of foreign keys keep the append cheap; validity is checked again
+    when `manage.py drain_vote_queue` inserts the votes in batches and deletes these rows.
+    """
+    poll_id = models.BigIntegerField()
+    option_id = models.BigIntegerField()
+    user_id = models.BigIntegerField()
+    # Expiry is judged at this time, however late the vote is applied
+    accepted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"User {self.user_id} on poll {self.poll_id}: option {self.option_id}"
@@ -0,0 +1,73 @@
+# pollpro_backend/polls/options.py
+"""
+Incremental edits of a poll's options. Options that stay keep their id and their votes; only
+removed options lose theirs, in a handful of set-based deletes however many votes the poll has.
+"""
+from django.db import transaction
+from django.db.models import F
+from .cache import user_votes_changed
+from .counters import compact_poll_counters
+from .models import Poll, Option, OptionCounterShard, Vote, VoteHourlyRollup
+
+
+def plan_option_edits(existing, edits):
+    """
+    Diff the current options, {id: text}, against `edits`: dicts with a `text` and an `id`
+    that is None for a plain text. An id renames that option in place. A plain text keeps an
+    existing option with the same text, if one is not claimed yet, and is added otherwise.
+    Returns (renamed {id: text}, added [text], removed [id]).
+    """
+    kept, renamed, added = set(), {}, []
+    for edit in edits:
+        if edit['id'] is not None:
+            kept.add(edit['id'])
+            if existing[edit['id']] != edit['text']:
+                renamed[edit['id']] = edit['text']
+    unclaimed = {}
+    for option_id, text in sorted(existing.items()):
+        if option_id not in kept:
+            unclaimed.setdefault(text, []).append(option_id)
+    for edit in edits:
+        if edit['id'] is None:
+            if unclaimed.get(edit['text']):
+                kept.add(unclaimed[edit['text']].pop(0))
+            else:
+                added.append(edit['text'])
+    removed = sorted(option_id for option_id in existing if option_id not in kept)
+    return renamed, added, removed
+
+
+def _raw_delete(queryset):
+    # A single DELETE ... WHERE, without the collector loading rows to cascade or send signals for
+    return queryset._raw_delete(queryset.db)
+
+
+@transaction.atomic
+def edit_options(poll, edits):
+    """
+    Apply `edits` (see plan_option_edits) to the options of `poll`. Votes on removed options
+    are deleted and taken off poll.total_votes. Returns whether any option changed.
+    """
+    # Locking the options holds off votes for an option that is about to be removed
+    existing = dict(Option.objects.select_for_update().filter(poll=poll).values_list('id', 'text'))
+    renamed, added, removed = plan_option_edits(existing, edits)
+    if removed and poll.counter_shards:
+        # Fold the shards first, so total_votes is exact before the removed votes come off it
+        compact_poll_counters(poll.id)
+
+    if renamed:
+        Option.objects.bulk_update([Option(id=option_id, text=text) for option_id, text in renamed.items()], ['text'])
+    if removed:
+        voters = list(Vote.objects.filter(option_id__in=removed).values_list('user_id', 'poll_id'))
+        deleted = _raw_delete(Vote.objects.filter(option_id__in=removed))
+        _raw_delete(VoteHourlyRollup.objects.filter(option_id__in=removed))
+        _raw_delete(OptionCounterShard.objects.filter(option_id__in=removed))
+        _raw_delete(Option.objects.filter(pk__in=removed))
+        if deleted:
+            Poll.objects.filter(pk=poll.pk).update(total_votes=F('total_votes') - deleted)
+            poll.refresh_from_db(fields=['total_votes'])
+        for user_id, poll_id in voters:
+            user_votes_changed(user_id, {poll_id: None})
+    if added:
+        Option.objects.bulk_create(Option(poll=poll, text=text) for text in added)
+    return bool(renamed or added or removed)
@@ -0,0 +1,103 @@
+# pollpro_backend/polls/pagination.py
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class PollCursorPagination(CursorPagination):
+    """
+    Keyset pagination for poll listings: each page seeks past the previous cursor
+    instead of using OFFSET, so deep pages cost the same as the first and cursors
+    stay stable while new polls are being created.
+    """
+    ordering = ('-created_at', 'id')
+    page_size = settings.POLL_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.POLL_MAX_PAGE_SIZE
+
+    # CursorPagination.paginate_queryset, split around its one query so the async views
+    # (polls.async_views) can await it
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.page_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.take_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        window = self.page_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.take_page([instance async for instance in window])
+
+    def page_window(self, queryset, request, view=None):
+        """The queryset of the requested page plus one row to detect a following page."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, self._reverse, self._current_position) = (0, False, None)
+        else:
+            (offset, self._reverse, self._current_position) = self.cursor
+        self._offset = offset
+
+        if self._reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self._current_position is not None:
+            order = self.ordering[0]
+            is_reversed = order.startswith('-')
+            order_attr = order.lstrip('-')
+            # (cursor reversed) XOR (queryset reversed)
+            if self.cursor.reverse != is_reversed:
+                queryset = queryset.filter(**{order_attr + '__lt': self._current_position})
+            else:
+                queryset = queryset.filter(**{order_attr + '__gt': self._current_position})
+
+        return queryset[offset:offset + self.page_size + 1]
+
+    def take_page(self, results):
+        """Set the page and the cursor positions around it from the rows of page_window()."""
+        current_position, offset = self._current_position, self._offset
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if self._reverse:
+            # The query ran in reverse order, so flip the page back
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class PollSearchPagination(PollCursorPagination):
+    """Keyset pagination over search results, best match first (see polls.search)."""
+    ordering = ('-rank', 'id')
@@ -0,0 +1,170 @@
+# pollpro_backend/polls/payloads.py
+"""
+Fast-path serialization of the hot reads. Payloads are built straight from `.values()` rows
+instead of model instances and ModelSerializer fields, and are byte-for-byte what
+PollSerializer and PollResultSerializer produce (see PollPayloadTests). Keep them in step
+when those serializers change.
+"""
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+from .cache import aget_user_votes, get_user_votes
+from .counters import apending_counts, pending_counts
+from .models import Poll, Option, PollResultSnapshot
+
+# Formats datetimes exactly like the serializers' DateTimeFields
+_datetime = serializers.DateTimeField()
+
+POLL_FIELDS = (
+    'id', 'question', 'creator_name', 'category', 'created_at', 'expiry_date', 'total_votes',
+    'counter_shards', 'snapshot_options', 'snapshot_total',
+)
+RESULT_FIELDS = (
+    'id', 'question', 'expiry_date', 'total_votes', 'counter_shards', 'snapshot_options', 'snapshot_total',
+)
+NO_PENDING = ({}, {})
+
+
+def poll_rows(queryset, fields=POLL_FIELDS):
+    """`.values()` of a Poll queryset with the creator name and frozen results joined in."""
+    return queryset.annotate(
+        creator_name=F('creator__username'),
+        snapshot_options=F('result_snapshot__options'),
+        snapshot_total=F('result_snapshot__total_votes'),
+    ).values(*fields)
+
+
+def option_rows(poll_ids):
+    return Option.objects.filter(poll_id__in=poll_ids).order_by('id').values_list('poll_id', 'id', 'text', 'vote_count')
+
+
+def _frozen(row, now):
+    # Poll.frozen_results(): only closed polls answer from a snapshot
+    if row['snapshot_total'] is None or row['expiry_date'] is None or row['expiry_date'] > now:
+        return None
+    return PollResultSnapshot.results_of(row['snapshot_options'], row['snapshot_total'])
+
+
+def _option(option_id, text, votes, total, frozen):
+    if frozen is not None and option_id in frozen:
+        return frozen[option_id]
+    return {'id': option_id, 'text': text, 'votes': votes, 'percentage': (votes / total * 100) if total > 0 else 0}
+
+
+def _sharded(rows):
+    return [row['id'] for row in rows if row['counter_shards']]
+
+
+def build_polls(rows, options, user_votes=None, pending=NO_PENDING):
+    """
+    PollSerializer output for `rows` from poll_rows(), given their option_rows(), for an
+    authenticated user their {poll_id: option_id} voted set (None for anonymous requests), and
+    the pending_counts() of the sharded ones.
+    """
+    now = timezone.now()
+    pending_options, pending_totals = pending
+    options_by_poll = {}
+    for poll_id, option_id, text, votes in options:
+        options_by_poll.setdefault(poll_id, []).append((option_id, text, votes + pending_options.get(option_id, 0)))
+    voted = user_votes or {}
+
+    payloads = []
+    for row in rows:
+        poll_id = row['id']
+        total = row['total_votes'] + pending_totals.get(poll_id, 0)
+        frozen = _frozen(row, now)
+        poll_options = [
+            _option(option_id, text, votes, total, frozen) for option_id, text, votes in options_by_poll.get(poll_id, ())
+        ]
+        user_vote = None
+        if poll_id in voted:
+            user_vote = next((option for option in poll_options if option['id'] == voted[poll_id]), None)
+        payloads.append({
+            'id': poll_id,
+            'question': row['question'],
+            'creator': row['creator_name'],
+            'category': row['category'],
+            'created_at': _datetime.to_representation(row['created_at']),
+            'expiry_date': _datetime.to_representation(row['expiry_date']),
+            'options': poll_options,
+            'user_vote': user_vote,
+        })
+    return payloads
+
+
+def poll_payloads(rows, user):
+    """Serialize a page of poll_rows() like PollSerializer, in one more query (two on a voted-set cache miss)."""
+    rows = list(rows)
+    poll_ids = [row['id'] for row in rows]
+    if not poll_ids:
+        return []
+    user_votes = get_user_votes(user.id) if user.is_authenticated else None
+    sharded = _sharded(rows)
+    pending = pending_counts(sharded) if sharded else NO_PENDING
+    return build_polls(rows, option_rows(poll_ids), user_votes, pending)
+
+
+async def apoll_payloads(rows, user):
+    rows = list(rows)
+    poll_ids = [row['id'] for row in rows]
+    if not poll_ids:
+        return []
+    user_votes = await aget_user_votes(user.id) if user.is_authenticated else None
+    sharded = _sharded(rows)
+    pending = await apending_counts(sharded) if sharded else NO_PENDING
+    return build_polls(rows, [option async for option in option_rows(poll_ids)], user_votes, pending)
+
+
+def _results(row, options, pending=NO_PENDING):
+    pending_options, pending_totals = pending
+    total = row['total_votes'] + pending_totals.get(row['id'], 0)
+    return {
+        'id': row['id'],
+        'question': row['question'],
+        'options': [
+            _option(option_id, text, votes + pending_options.get(option_id, 0), total, None)
+            for _, option_id, text, votes in options
+        ],
+    }
+
+
+def _frozen_results(row):
+    frozen = _frozen(row, timezone.now())
+    if frozen is None:
+        return None
+    return {'id': row['id'], 'question': row['question'], 'options': list(frozen.values())}
+
+
+def build_results(row, options, pending=NO_PENDING):
+    """PollResultSerializer output for a poll_rows(..., RESULT_FIELDS) row, its option_rows() and pending_counts()."""
+    return _frozen_results(row) or _results(row, options, pending)
+
+
+def results_payload(poll_id, using=None):
+    """
+    PollResultSerializer output for one poll and whether the poll is still open, or None when
+    it does not exist. Frozen results need no options query.
+    """
+    row = poll_rows(Poll.objects.using(using).filter(pk=poll_id), RESULT_FIELDS).first()
+    if row is None:
+        return None
+    results = _frozen_results(row)
+    if results is None:
+        pending = pending_counts([poll_id], using) if row['counter_shards'] else NO_PENDING
+        results = _results(row, option_rows([poll_id]).using(using), pending)
+    return results, _is_open(row)
+
+
+async def aresults_payload(poll_id, using=None):
+    row = await poll_rows(Poll.objects.using(using).filter(pk=poll_id), RESULT_FIELDS).afirst()
+    if row is None:
+        return None
+    results = _frozen_results(row)
+    if results is None:
+        pending = await apending_counts([poll_id], using) if row['counter_shards'] else NO_PENDING
+        results = _results(row, [option async for option in option_rows([poll_id]).using(using)], pending)
+    return results, _is_open(row)
+
+
+def _is_open(row):
+    return row['expiry_date'] is None or row['expiry_date'] > timezone.now()
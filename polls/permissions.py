@@ -14,9 +14,9 @@ class IsAdminOrCreator(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # Allow deletion if user is admin or the poll's creator
-        return request.user.roles == 'admin' or obj.creator == request.user
+        return request.user.roles == 'admin' or obj.creator_id == request.user.id
 
 class IsPollCreator(BasePermission):
     def has_object_permission(self, request, view, obj):
         # Allow action only if the user is the poll's creator
-        return request.user and request.user.is_authenticated and obj.creator == request.user
\ No newline at end of file
+        return request.user and request.user.is_authenticated and obj.creator_id == request.user.id
\ No newline at end of file
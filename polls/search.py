@@ -0,0 +1,84 @@
+# pollpro_backend/polls/search.py
+"""
+Full-text search over poll questions and option texts.
+
+On PostgreSQL each poll keeps a weighted tsvector (question 'A', options 'B') in
+Poll.search_vector behind a GIN index. Other backends fall back to an SQLite FTS5 table,
+polls_poll_fts, so the same API works in tests. Both are refreshed by index_polls()
+whenever a poll's question or options change; `manage.py rebuild_search_index` backfills.
+"""
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Subquery, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+from .models import Poll, Option
+
+FTS_TABLE = 'polls_poll_fts'
+
+
+def _document():
+    options = (
+        Option.objects.filter(poll=OuterRef('pk'))
+        .order_by()
+        .values('poll')
+        .annotate(text=StringAgg('text', delimiter=' '))
+        .values('text')
+    )
+    config = settings.SEARCH_CONFIG
+    return (
+        SearchVector('question', weight='A', config=config)
+        + SearchVector(Coalesce(Subquery(options), Value(''), output_field=TextField()), weight='B', config=config)
+    )
+
+
+def index_polls(poll_ids):
+    """Refresh the search document of the given polls."""
+    poll_ids = list(poll_ids)
+    if not poll_ids:
+        return
+    if connection.vendor == 'postgresql':
+        Poll.objects.filter(pk__in=poll_ids).update(search_vector=_document())
+        return
+    qn = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(poll_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", poll_ids)
+        cursor.execute(
+            f"""
+            INSERT INTO {FTS_TABLE} (rowid, question, options)
+            SELECT p.id, p.question,
+                   COALESCE((SELECT group_concat(o.text, ' ') FROM {qn(Option._meta.db_table)} o WHERE o.poll_id = p.id), '')
+            FROM {qn(Poll._meta.db_table)} p WHERE p.id IN ({placeholders})
+            """,
+            poll_ids,
+        )
+
+
+def _fts5_query(query):
+    # Quote every term so user input can never be parsed as FTS5 syntax; terms are ANDed
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+
+
+def search_polls(queryset, query):
+    """Filter a Poll queryset to matches of `query`, annotated with a float `rank` (higher is better)."""
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, search_type='websearch', config=settings.SEARCH_CONFIG)
+        # ts_rank is a float4; a double keeps cursor positions exact when they round-trip as text
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        )
+    match = _fts5_query(query)
+    table = connection.ops.quote_name(Poll._meta.db_table)
+    return queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+    ).annotate(
+        # bm25() is lower for better matches; the question column weighs double like weight 'A'
+        rank=RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, 2.0, 1.0) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+            [match],
+            output_field=FloatField(),
+        )
+    )
@@ -0,0 +1,64 @@
+# pollpro_backend/polls/seeding.py
+import random
+from django.db import transaction
+from users.models import CustomUser
+from .models import Poll, Option, Vote
+from .search import index_polls
+
+SEED_PREFIX = '__seed_'
+
+
+@transaction.atomic
+def seed_polls(polls=1000, users=200, options_per_poll=4, votes_per_poll=50, batch_size=2000, rng=None):
+    """
+    Bulk-load a synthetic dataset with consistent denormalized counters.
+    Seeded users are named `__seed_<n>` so they can be told apart from (and cleaned up
+    after) real accounts. Returns the seeded users.
+    """
+    rng = rng or random.Random(0)
+    categories = [choice[0] for choice in Poll.CATEGORY_CHOICES]
+    CustomUser.objects.bulk_create(
+        (CustomUser(username=f"{SEED_PREFIX}{i}", password='!') for i in range(users)),
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    seeded_users = list(CustomUser.objects.filter(username__startswith=SEED_PREFIX).order_by('id'))
+    votes_per_poll = min(votes_per_poll, len(seeded_users))
+
+    created = Poll.objects.bulk_create(
+        (
+            Poll(
+                question=f"Seeded question {i}",
+                creator=rng.choice(seeded_users),
+                category=rng.choice(categories),
+            )
+            for i in range(polls)
+        ),
+        batch_size=batch_size,
+    )
+
+    options, ballots = [], []
+    for poll in created:
+        choices = [rng.randrange(options_per_poll) for _ in range(votes_per_poll)]
+        poll_options = [
+            Option(poll=poll, text=f"Option {j}", vote_count=choices.count(j)) for j in range(options_per_poll)
+        ]
+        options += poll_options
+        voters = rng.sample(seeded_users, votes_per_poll)
+        ballots += [(poll, poll_options[choice], voter) for choice, voter in zip(choices, voters)]
+        poll.total_votes = votes_per_poll
+
+    Poll.objects.bulk_update(created, ['total_votes'], batch_size=batch_size)
+    Option.objects.bulk_create(options, batch_size=batch_size)
+    Vote.objects.bulk_create(
+        (Vote(poll=poll, option=option, user=user) for poll, option, user in ballots),
+        batch_size=batch_size,
+    )
+    for start in range(0, len(created), batch_size):
+        index_polls(poll.id for poll in created[start:start + batch_size])
+    return seeded_users
+
+
+def delete_seeded_data():
+    """Delete the seeded users; their polls, options and votes cascade with them."""
+    CustomUser.objects.filter(username__startswith=SEED_PREFIX).delete()
@@ -1,9 +1,16 @@
 # pollpro_backend/polls/serializers.py
+from django.db import models
 from rest_framework import serializers
 from .models import Poll, Option, Vote
+from .cache import bump_results_version, forget_poll_meta, get_user_votes
+from .counters import fold_pending, publish_results_snapshot
+from .snapshots import thaw_results
+from .search import index_polls
+from .options import edit_options
 from django.utils import timezone
+from django.conf import settings
 class OptionSerializer(serializers.ModelSerializer):
-    votes = serializers.IntegerField(source='votes.count', read_only=True)
+    votes = serializers.IntegerField(source='vote_count', read_only=True)
     percentage = serializers.SerializerMethodField()
 
     class Meta:
@@ -11,9 +18,22 @@ class OptionSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'votes', 'percentage')
 
     def get_percentage(self, obj):
-        total_votes = obj.poll.votes.count()
-        option_votes = obj.votes.count()
-        return (option_votes / total_votes * 100) if total_votes > 0 else 0
+        total_votes = obj.poll.total_votes
+        return (obj.vote_count / total_votes * 100) if total_votes > 0 else 0
+
+    def to_representation(self, obj):
+        # Closed polls answer from their frozen final tallies
+        snapshot = obj.poll.frozen_results()
+        if snapshot is not None and obj.id in snapshot.results:
+            return snapshot.results[obj.id]
+        return super().to_representation(obj)
+
+class PollListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # The shard deltas of every sharded poll on the page in one query
+        polls = list(data.all() if isinstance(data, models.Manager) else data)
+        fold_pending(polls)
+        return super().to_representation(polls)
 
 class PollSerializer(serializers.ModelSerializer):
     options = OptionSerializer(many=True, read_only=True)
@@ -24,16 +44,26 @@ class PollSerializer(serializers.ModelSerializer):
     class Meta:
         model = Poll
         fields = ('id', 'question', 'creator', 'category', 'created_at', 'expiry_date', 'options', 'user_vote')
+        list_serializer_class = PollListSerializer
+
+    def to_representation(self, instance):
+        # Counts of polls with sharded counters include the deltas not compacted yet
+        fold_pending([instance])
+        return super().to_representation(instance)
 
     def get_user_vote(self, obj):
         user = self.context['request'].user
-        if user.is_authenticated:
-            try:
-                vote = obj.votes.get(user=user)
-                return OptionSerializer(vote.option).data
-            except Vote.DoesNotExist:
-                return None
-        return None
+        if not user.is_authenticated:
+            return None
+        # The user's cached voted set, read once per request however many polls are serialized
+        if 'user_votes' not in self.context:
+            self.context['user_votes'] = get_user_votes(user.id)
+        option_id = self.context['user_votes'].get(obj.id)
+        if option_id is None:
+            return None
+        # Resolved from the options prefetched by Poll.objects.for_listing()
+        option = next((o for o in obj.options.all() if o.id == option_id), None)
+        return OptionSerializer(option).data if option else None
 
 class PollCreateSerializer(serializers.ModelSerializer):
     options = serializers.ListField(child=serializers.CharField(), write_only=True)
@@ -46,8 +76,8 @@ class PollCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         options_data = validated_data.pop('options')
         poll = Poll.objects.create(creator=self.context['request'].user, **validated_data)
-        for option_text in options_data:
-            Option.objects.create(poll=poll, text=option_text)
+        Option.objects.bulk_create(Option(poll=poll, text=option_text) for option_text in options_data)
+        index_polls([poll.id])
         return poll
 
     def validate_options(self, value):
@@ -55,18 +85,46 @@ class PollCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Poll must have at least 2 options.")
         return value
 
+# Largest BigAutoField id: bigger ids are a 400 instead of an out-of-range database error
+MAX_ID = 2 ** 63 - 1
+
+
 class VoteSerializer(serializers.ModelSerializer):
+    # A bare id: ownership and expiry are enforced by the insert in polls.voting.cast_vote
+    option = serializers.IntegerField(min_value=1, max_value=MAX_ID)
+
     class Meta:
         model = Vote
         fields = ('option',)
         ref_name = 'PollsVoteSerializer'  # Unique ref_name for polls app
 
-    def validate_option(self, value):
-        if value.poll != self.context['poll']:
-            raise serializers.ValidationError("Option does not belong to this poll.")
-        if not value.poll.is_active():
-            raise serializers.ValidationError("Poll is expired.")
-        return value
+class BulkVoteItemSerializer(serializers.Serializer):
+    poll = serializers.IntegerField(min_value=1, max_value=MAX_ID)
+    option = serializers.IntegerField(min_value=1, max_value=MAX_ID)
+    user = serializers.IntegerField(min_value=1, max_value=MAX_ID, required=False, help_text="Admins only: vote on behalf of this user")
+
+
+class BulkVoteSerializer(serializers.Serializer):
+    votes = BulkVoteItemSerializer(many=True, allow_empty=False, max_length=settings.BULK_VOTE_MAX_ITEMS)
+
+
+class UserVoteLookupSerializer(serializers.Serializer):
+    ids = serializers.CharField(help_text="Comma-separated poll ids")
+
+    def validate_ids(self, value):
+        try:
+            # Deduplicated, in the order asked
+            ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+        except ValueError:
+            raise serializers.ValidationError("Expected comma-separated poll ids.")
+        if not ids:
+            raise serializers.ValidationError("At least one poll id is required.")
+        if any(abs(poll_id) > MAX_ID for poll_id in ids):
+            raise serializers.ValidationError("Expected comma-separated poll ids.")
+        if len(ids) > settings.USER_VOTES_LOOKUP_MAX_IDS:
+            raise serializers.ValidationError(f"At most {settings.USER_VOTES_LOOKUP_MAX_IDS} poll ids per lookup.")
+        return ids
+
 
 class PollResultSerializer(serializers.ModelSerializer):
     options = serializers.SerializerMethodField()
@@ -75,33 +133,87 @@ class PollResultSerializer(serializers.ModelSerializer):
         model = Poll
         fields = ('id', 'question', 'options')
 
+    def to_representation(self, instance):
+        fold_pending([instance])
+        return super().to_representation(instance)
+
     def get_options(self, obj):
-        total_votes = obj.votes.count()
+        snapshot = obj.frozen_results()
+        if snapshot is not None:
+            return list(snapshot.results.values())
+        total_votes = obj.total_votes
         options = obj.options.all()
         return [
             {
                 'id': option.id,
                 'text': option.text,
-                'votes': option.votes.count(),
-                'percentage': (option.votes.count() / total_votes * 100) if total_votes > 0 else 0
+                'votes': option.vote_count,
+                'percentage': (option.vote_count / total_votes * 100) if total_votes > 0 else 0
             } for option in options
         ]
     
+class OptionEditField(serializers.Field):
+    """
+    One option of a poll update: a text, which keeps the poll's option with that text or adds
+    one, or {"id": ..., "text": ...} to rename an option in place. Either way the options kept
+    keep their votes.
+    """
+    default_error_messages = {'invalid': 'Expected an option text or {{"id": ..., "text": ...}}.'}
+
+    def to_internal_value(self, data):
+        option_id = None
+        if isinstance(data, dict):
+            option_id, data = data.get('id'), data.get('text')
+            if not isinstance(option_id, int) or isinstance(option_id, bool):
+                self.fail('invalid')
+        if not isinstance(data, str):
+            self.fail('invalid')
+        return {'id': option_id, 'text': serializers.CharField(max_length=255).run_validation(data)}
+
+    def to_representation(self, value):
+        return {'id': value.id, 'text': value.text}
+
+class OptionEditListField(serializers.ListField):
+    child = OptionEditField()
+
+    def to_representation(self, data):
+        # The poll's related manager: answer with the ids an update can rename
+        return super().to_representation(data.order_by('id'))
+
 class PollUpdateSerializer(serializers.ModelSerializer):
-    options = serializers.ListField(child=serializers.CharField(), required=False)
+    options = OptionEditListField(required=False)
 
     class Meta:
         model = Poll
         fields = ('question', 'expiry_date', 'options')
         extra_kwargs = {'question': {'required': False}, 'expiry_date': {'required': False}}
 
+    def validate_options(self, value):
+        if len(value) < 2:
+            raise serializers.ValidationError("Poll must have at least 2 options.")
+        ids = [edit['id'] for edit in value if edit['id'] is not None]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("An option id may appear only once.")
+        unknown = set(ids) - set(self.instance.options.values_list('id', flat=True)) if ids else set()
+        if unknown:
+            raise serializers.ValidationError(f"Not options of this poll: {', '.join(map(str, sorted(unknown)))}.")
+        return value
+
     def update(self, instance, validated_data):
         options_data = validated_data.pop('options', None)
         instance.question = validated_data.get('question', instance.question)
         instance.expiry_date = validated_data.get('expiry_date', instance.expiry_date)
-        instance.save()
-        if options_data:
-            instance.options.all().delete()
-            for option_text in options_data:
-                Option.objects.create(poll=instance, text=option_text)
-        return instance
\ No newline at end of file
+        # update_fields keeps concurrent F() increments of total_votes intact
+        instance.save(update_fields=['question', 'expiry_date'])
+        # Only the options that changed are touched, and only removed ones lose their votes
+        options_changed = options_data is not None and edit_options(instance, options_data)
+        if options_changed or 'expiry_date' in validated_data:
+            thaw_results(instance.id)
+            forget_poll_meta(instance.id)
+        if options_changed:
+            # Open results streams cannot apply deltas to options they do not know
+            publish_results_snapshot(instance.id, PollResultSerializer(instance).data)
+        if options_changed or 'question' in validated_data:
+            index_polls([instance.id])
+        bump_results_version(instance.id)
+        return instance
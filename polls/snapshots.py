@@ -0,0 +1,48 @@
+# pollpro_backend/polls/snapshots.py
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from .models import Poll, Option, PollResultSnapshot
+from .cache import bump_results_version
+
+
+def pending_polls(now=None):
+    """Closed polls whose results are not frozen yet, oldest deadline first."""
+    now = now or timezone.now()
+    return Poll.objects.filter(expiry_date__lte=now, result_snapshot__isnull=True).order_by('expiry_date', 'id')
+
+
+def freeze_polls(poll_ids):
+    """
+    Freeze the final tallies of the given closed polls, counted from polls_vote with a single
+    GROUP BY rather than read from the counters. Returns the number of snapshots written.
+    """
+    poll_ids = list(poll_ids)
+    tallies = {poll_id: [] for poll_id in poll_ids}
+    rows = (
+        Option.objects.filter(poll_id__in=poll_ids)
+        .values_list('poll_id', 'id', 'text')
+        .annotate(votes=Count('votes'))
+        .order_by('poll_id', 'id')
+    )
+    for poll_id, option_id, text, votes in rows:
+        tallies[poll_id].append([option_id, text, votes])
+
+    snapshots = [
+        PollResultSnapshot(poll_id=poll_id, options=options, total_votes=sum(votes for _, _, votes in options))
+        for poll_id, options in tallies.items()
+    ]
+    with transaction.atomic():
+        # A poll frozen concurrently by another sweeper keeps its first snapshot
+        PollResultSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+        for poll_id in poll_ids:
+            bump_results_version(poll_id)
+    return len(snapshots)
+
+
+def thaw_results(poll_id):
+    """
+    Drop the snapshot of a poll whose tallies, options or deadline changed after it closed.
+    It is frozen again on the next sweep if it is still closed.
+    """
+    PollResultSnapshot.objects.filter(poll_id=poll_id).delete()
@@ -1,3 +1,893 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from core.db import allow_replica_reads, reset_replica_reads
+from core.renderers import ORJSONRenderer
+from users.models import CustomUser
+from users.tokens import access_token_for
+from .models import Poll, Option, OptionCounterShard, QueuedVote, Vote, VoteHourlyRollup, PollResultSnapshot
+from .cache import _user_votes_query, get_user_votes, user_votes_changed
+from .counters import adjust_vote_counters, compact_counters
+from .ingest import drain_vote_queue
+from .options import plan_option_edits
+from .pagination import PollCursorPagination
+from .payloads import poll_payloads, poll_rows, results_payload
+from .serializers import PollSerializer, PollResultSerializer
+from .snapshots import freeze_polls
+from .trending import refresh_trending
 
-# Create your tests here.
+
+def cast_vote(poll, option, user):
+    vote = Vote.objects.create(poll=poll, option=option, user=user)
+    adjust_vote_counters([(poll.id, option.id)])
+    user_votes_changed(user.id, {poll.id: option.id})
+    return vote
+
+
+class PollFixtureMixin:
+    poll_count = 5
+
+    def setUp(self):
+        # Cached voted sets and results are keyed by ids, which the rolled-back tests reuse
+        cache.clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(username='voter', password='pass12345')
+        self.creator = CustomUser.objects.create_user(username='creator', password='pass12345')
+        for i in range(self.poll_count):
+            poll = Poll.objects.create(question=f"Question {i}", creator=self.creator, category='TECH')
+            options = [Option.objects.create(poll=poll, text=f"Option {j}") for j in range(3)]
+            cast_vote(poll, options[0], self.user)
+            cast_vote(poll, options[1], self.creator)
+
+
+class PollListQueryCountTests(PollFixtureMixin, TestCase):
+    """
+    Each listing must serialize in a constant number of queries regardless of page size.
+    Authentication is forced, so the counts below cover only the view's own work.
+    """
+
+    def assertConstantQueries(self, num, url, user=None, method='get'):
+        if user is not None:
+            self.client.force_authenticate(user)
+            # The counts below are with a warm voted-set cache, as after the user's first request
+            get_user_votes(user.id)
+        with self.assertNumQueries(num):
+            response = getattr(self.client, method)(url)
+        self.assertEqual(response.status_code, 200)
+        # Doubling the data set must not change the query count
+        for i in range(self.poll_count):
+            poll = Poll.objects.create(question=f"Extra {i}", creator=self.creator, category='TECH')
+            option = Option.objects.create(poll=poll, text="Extra option")
+            cast_vote(poll, option, self.user)
+        with self.assertNumQueries(num):
+            getattr(self.client, method)(url)
+        return response
+
+    def test_poll_list_anonymous(self):
+        # polls + options
+        self.assertConstantQueries(2, reverse('poll_list'))
+
+    def test_poll_list_authenticated(self):
+        # polls + options; the requesting user's votes come from the cache
+        response = self.assertConstantQueries(2, reverse('poll_list'), user=self.user)
+        self.assertIsNotNone(response.data['results'][0]['user_vote'])
+
+    def test_poll_list_category_filter(self):
+        self.assertConstantQueries(2, reverse('poll_list') + '?category=TECH')
+
+    def test_user_poll_list(self):
+        # exists() + polls + options
+        self.assertConstantQueries(3, reverse('user_poll_list_create'), user=self.creator)
+
+    def test_user_poll_history(self):
+        self.assertConstantQueries(2, reverse('user_poll_history'), user=self.user)
+
+    def test_user_vote_matches_prefetched_option(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('poll_list'))
+        for poll in response.data['results']:
+            self.assertEqual(poll['user_vote']['text'], "Option 0")
+            self.assertEqual(poll['user_vote']['votes'], 1)
+            self.assertEqual(poll['user_vote']['percentage'], 50.0)
+
+
+
+class UserVoteCacheTests(PollFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.polls = list(Poll.objects.order_by('id'))
+        self.client.force_authenticate(self.user)
+
+    def lookup(self, ids):
+        return self.client.get(reverse('poll_user_votes'), {'ids': ','.join(map(str, ids))})
+
+    def test_lookup_is_built_once(self):
+        first, second = self.polls[0], self.polls[1]
+        with self.assertNumQueries(1):
+            response = self.lookup([first.id, second.id, 999999])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['votes'], {
+            first.id: first.options.get(text="Option 0").id,
+            second.id: second.options.get(text="Option 0").id,
+            999999: None,
+        })
+        with self.assertNumQueries(0):
+            self.lookup([first.id])
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'])
+    def test_cache_fill_reads_the_primary(self):
+        token = allow_replica_reads(True)
+        try:
+            self.assertEqual(_user_votes_query(self.user.id).db, 'default')
+        finally:
+            reset_replica_reads(token)
+
+    def test_vote_and_retract_patch_the_cached_set(self):
+        poll = Poll.objects.create(question="Fresh", creator=self.creator)
+        option = Option.objects.create(poll=poll, text="Yes")
+        get_user_votes(self.user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('poll_vote', args=[poll.id]), {'option': option.id})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.lookup([poll.id]).data['votes'], {poll.id: option.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('vote_retract', args=[poll.id]))
+        self.assertEqual(self.lookup([poll.id]).data['votes'], {poll.id: None})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('poll_vote_bulk'), {'votes': [{'poll': poll.id, 'option': option.id}]}, format='json')
+        self.assertEqual(get_user_votes(self.user.id)[poll.id], option.id)
+        self.assertEqual(self.client.get(reverse('poll_detail', args=[poll.id])).data['user_vote']['id'], option.id)
+
+    def test_removed_options_drop_cached_sets(self):
+        poll = self.polls[0]
+        self.assertIsNotNone(get_user_votes(self.user.id).get(poll.id))
+        creator_votes = get_user_votes(self.creator.id)
+        self.client.force_authenticate(self.creator)
+        url = reverse('user_poll_retrieve_update_destroy', args=[poll.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'options': ['Option 1', 'Option 2']}, format='json')
+        with self.assertNumQueries(0):
+            self.assertNotIn(poll.id, get_user_votes(self.user.id))
+            # Only the voters of the removed option are touched
+            self.assertEqual(get_user_votes(self.creator.id), creator_votes)
+
+    def test_evicted_generation_does_not_revive_old_sets(self):
+        poll = self.polls[0]
+        self.assertIn(poll.id, get_user_votes(self.user.id))
+        cache.delete("user_votes:generation")
+        Vote.objects.filter(poll=poll, user=self.user).delete()
+        self.assertNotIn(poll.id, get_user_votes(self.user.id))
+
+    def test_lookup_validation(self):
+        self.assertEqual(self.client.get(reverse('poll_user_votes')).status_code, 400)
+        self.assertEqual(self.lookup(['x']).status_code, 400)
+        self.assertEqual(self.lookup(range(1, 302)).status_code, 400)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.lookup([1]).status_code, 401)
+
+
+class PollCursorPaginationTests(PollFixtureMixin, TestCase):
+    def fetch(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_walk_newest_first_without_gaps(self):
+        page = self.fetch(reverse('poll_list') + '?page_size=2')
+        seen = []
+        while True:
+            seen += [poll['question'] for poll in page['results']]
+            if not page['next']:
+                break
+            page = self.fetch(page['next'])
+        self.assertEqual(seen, [f"Question {i}" for i in reversed(range(self.poll_count))])
+
+    def test_cursor_is_stable_across_inserts(self):
+        first = self.fetch(reverse('poll_list') + '?page_size=2')
+        Poll.objects.create(question="Brand new", creator=self.creator)
+        second = self.fetch(first['next'])
+        self.assertEqual([poll['question'] for poll in second['results']], ["Question 2", "Question 1"])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(PollCursorPagination, 'max_page_size', 3):
+            page = self.fetch(reverse('poll_list') + '?page_size=100000')
+        self.assertEqual(len(page['results']), 3)
+
+    def test_category_filter_is_kept_in_cursor(self):
+        Poll.objects.create(question="Sports poll", creator=self.creator, category='SPRT')
+        page = self.fetch(reverse('poll_list') + '?category=TECH&page_size=2')
+        self.assertIn('category=TECH', page['next'])
+        self.assertNotIn("Sports poll", [poll['question'] for poll in self.fetch(page['next'])['results']])
+
+
+class PollResultCacheTests(PollFixtureMixin, TestCase):
+    poll_count = 1
+
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+        self.poll = Poll.objects.get()
+        self.url = reverse('poll_results', args=[self.poll.id])
+
+    def test_repeat_requests_are_served_from_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_vote_and_retract_invalidate_results(self):
+        etag = self.client.get(self.url)['ETag']
+        voter = CustomUser.objects.create_user(username='late', password='pass12345')
+        self.client.force_authenticate(voter)
+        option = self.poll.options.order_by('id').last()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('poll_vote', args=[self.poll.id]), {'option': option.id})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['options'][2]['votes'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('vote_retract', args=[self.poll.id]))
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['options'][2]['votes'], 0)
+
+    def test_evicted_version_does_not_revive_old_entries(self):
+        self.client.get(self.url)
+        self.client.force_authenticate(CustomUser.objects.create_user(username='late', password='pass12345'))
+        option = self.poll.options.order_by('id').last()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('poll_vote', args=[self.poll.id]), {'option': option.id})
+        self.client.get(self.url)
+        cache.delete(f"poll:{self.poll.id}:results:version")
+        self.assertEqual(self.client.get(self.url).data['options'][2]['votes'], 1)
+
+    def test_deleted_poll_is_not_served_from_cache(self):
+        self.client.get(self.url)
+        self.client.force_authenticate(self.creator)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('poll_detail', args=[self.poll.id]))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class VoteViewTests(PollFixtureMixin, TestCase):
+    poll_count = 1
+
+    def setUp(self):
+        super().setUp()
+        self.poll = Poll.objects.get()
+        self.option = self.poll.options.order_by('id').last()
+        self.url = reverse('poll_vote', args=[self.poll.id])
+        self.voter = CustomUser.objects.create_user(username='new_voter', password='pass12345')
+        self.client.force_authenticate(self.voter)
+
+    def test_vote_updates_counters(self):
+        response = self.client.post(self.url, {'option': self.option.id})
+        self.assertEqual(response.status_code, 201)
+        self.option.refresh_from_db()
+        self.poll.refresh_from_db()
+        self.assertEqual((self.option.vote_count, self.poll.total_votes), (1, 3))
+
+    def test_duplicate_vote_is_a_clean_400(self):
+        self.client.post(self.url, {'option': self.option.id})
+        response = self.client.post(self.url, {'option': self.option.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "You have already voted on this poll"})
+        self.assertEqual(Vote.objects.filter(user=self.voter).count(), 1)
+
+    def test_option_from_another_poll_is_rejected(self):
+        other = Poll.objects.create(question="Other", creator=self.creator)
+        foreign = Option.objects.create(poll=other, text="Foreign")
+        response = self.client.post(self.url, {'option': foreign.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('option', response.data)
+
+    def test_out_of_range_option_is_rejected(self):
+        response = self.client.post(self.url, {'option': 2 ** 63})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('option', response.data)
+
+    def test_expired_poll_is_rejected(self):
+        Poll.objects.filter(pk=self.poll.pk).update(expiry_date=timezone.now() - timedelta(minutes=1))
+        response = self.client.post(self.url, {'option': self.option.id})
+        self.assertEqual(response.data, {"error": "Cannot vote on an expired poll"})
+
+    def test_missing_poll_is_404(self):
+        response = self.client.post(reverse('poll_vote', args=[self.poll.id + 100]), {'option': self.option.id})
+        self.assertEqual(response.status_code, 404)
+
+    def test_racing_retracts_decrement_once(self):
+        self.client.post(self.url, {'option': self.option.id})
+        stale = Vote.objects.get(user=self.voter)
+        # The other retract deleted the vote between this one's get() and delete()
+        Vote.objects.filter(pk=stale.pk).delete()
+        with mock.patch.object(Vote.objects, 'get', return_value=stale):
+            response = self.client.delete(reverse('vote_retract', args=[self.poll.id]))
+        self.assertEqual(response.data, {"error": "No vote found to retract"})
+        self.option.refresh_from_db()
+        self.assertEqual(self.option.vote_count, 1)
+
+
+class BulkVoteViewTests(PollFixtureMixin, TestCase):
+    poll_count = 3
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('poll_vote_bulk')
+        self.polls = list(Poll.objects.order_by('id'))
+        self.voter = CustomUser.objects.create_user(username='kiosk', password='pass12345')
+
+    def ballot(self, poll, index=2, **extra):
+        return {'poll': poll.id, 'option': poll.options.order_by('id')[index].id, **extra}
+
+    def test_batch_reports_per_item_status_and_keeps_counters(self):
+        self.client.force_authenticate(self.voter)
+        other_option = self.polls[1].options.first().id
+        payload = {'votes': [
+            self.ballot(self.polls[0]),
+            self.ballot(self.polls[1]),
+            self.ballot(self.polls[1]),
+            {'poll': self.polls[2].id, 'option': other_option},
+        ]}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['rejected']), (2, 2))
+        self.assertEqual(
+            [item['status'] for item in response.data['results']],
+            ['created', 'created', 'rejected', 'rejected'],
+        )
+        self.assertEqual(response.data['results'][2]['error'], "You have already voted on this poll")
+        self.assertEqual(response.data['results'][3]['error'], "Option does not belong to this poll.")
+        call_command('rebuild_vote_counters', check=True, stdout=StringIO())
+
+    def test_validation_uses_a_fixed_number_of_queries(self):
+        self.client.force_authenticate(self.voter)
+        payload = {'votes': [self.ballot(poll) for poll in self.polls]}
+        # polls, options, existing votes; savepoint, insert, then 2 counter updates per poll; release
+        with self.assertNumQueries(3 + 2 + 2 * len(self.polls) + 1):
+            self.client.post(self.url, payload, format='json')
+
+    def test_voting_for_others_requires_admin(self):
+        self.client.force_authenticate(self.voter)
+        payload = {'votes': [self.ballot(self.polls[0], user=self.creator.id)]}
+        self.assertEqual(self.client.post(self.url, payload, format='json').status_code, 403)
+
+    def test_admin_can_vote_for_many_users(self):
+        admin = CustomUser.objects.create_user(username='boss', password='pass12345', roles='admin')
+        self.client.force_authenticate(admin)
+        payload = {'votes': [
+            self.ballot(self.polls[0], user=self.voter.id),
+            self.ballot(self.polls[0], user=admin.id),
+            self.ballot(self.polls[0], user=self.user.id),
+            self.ballot(self.polls[0], user=999999),
+        ]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['results'][3]['error'], "User not found")
+
+
+class PollResultSnapshotTests(PollFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        Poll.objects.update(expiry_date=timezone.now() - timedelta(minutes=1))
+
+    def freeze(self, *args):
+        call_command('freeze_expired_polls', *args, stdout=StringIO())
+
+    def test_sweeper_freezes_expired_polls_in_batches(self):
+        out = StringIO()
+        call_command('freeze_expired_polls', '--batch-size', '2', stdout=out)
+        self.assertEqual(PollResultSnapshot.objects.count(), self.poll_count)
+        self.assertIn("Batch 3:", out.getvalue())
+        snapshot = PollResultSnapshot.objects.first()
+        self.assertEqual(snapshot.total_votes, 2)
+        self.assertEqual([votes for _, _, votes in snapshot.options], [1, 1, 0])
+
+    def test_max_batches_leaves_the_rest_for_the_next_run(self):
+        self.freeze('--batch-size', '2', '--max-batches', '1')
+        self.assertEqual(PollResultSnapshot.objects.count(), 2)
+        self.freeze()
+        self.assertEqual(PollResultSnapshot.objects.count(), self.poll_count)
+
+    def test_open_polls_are_not_frozen(self):
+        Poll.objects.update(expiry_date=None)
+        self.freeze()
+        self.assertFalse(PollResultSnapshot.objects.exists())
+
+    def test_closed_polls_are_served_from_the_snapshot(self):
+        self.freeze()
+        # Counters drifting after the freeze no longer affect what clients see
+        Option.objects.update(vote_count=99)
+        poll = Poll.objects.first()
+        response = self.client.get(reverse('poll_results', args=[poll.id]))
+        self.assertEqual([option['votes'] for option in response.data['options']], [1, 1, 0])
+        self.assertEqual(response.data['options'][0]['percentage'], 50)
+
+        response = self.client.get(reverse('poll_list'))
+        for listed in response.data['results']:
+            self.assertEqual([option['votes'] for option in listed['options']], [1, 1, 0])
+
+    def test_listing_query_count_is_unchanged(self):
+        self.freeze()
+        with self.assertNumQueries(2):
+            self.client.get(reverse('poll_list'))
+
+    def test_reopening_a_poll_thaws_its_results(self):
+        self.freeze()
+        poll = Poll.objects.first()
+        self.client.force_authenticate(CustomUser.objects.create_user(username='admin', password='x', roles='admin'))
+        response = self.client.patch(reverse('admin_poll_detail', args=[poll.id]), {'expiry_date': None}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(PollResultSnapshot.objects.filter(poll=poll).exists())
+
+
+class TrendingPollTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = CustomUser.objects.create_user(username='creator', password='pass12345')
+        self.now = timezone.now().replace(minute=30, second=0, microsecond=0)
+
+    def poll_with_votes(self, category, *buckets):
+        """buckets are (hours ago, votes) pairs written straight into the rollups."""
+        poll = Poll.objects.create(question=f"{category} poll", creator=self.creator, category=category)
+        option = Option.objects.create(poll=poll, text="Yes")
+        VoteHourlyRollup.objects.bulk_create(
+            VoteHourlyRollup(
+                hour=self.now.replace(minute=0) - timedelta(hours=ago), poll=poll, option=option,
+                category=category, votes=votes,
+            )
+            for ago, votes in buckets
+        )
+        return poll
+
+    def test_recent_votes_outrank_older_ones(self):
+        old = self.poll_with_votes('TECH', (24, 100))
+        fresh = self.poll_with_votes('TECH', (0, 20))
+        sport = self.poll_with_votes('SPRT', (1, 5))
+        refresh_trending(self.now)
+
+        response = self.client.get(reverse('poll_trending'))
+        self.assertEqual([poll['id'] for poll in response.data], [fresh.id, old.id, sport.id])
+        response = self.client.get(reverse('poll_trending'), {'category': 'SPRT'})
+        self.assertEqual([poll['id'] for poll in response.data], [sport.id])
+
+    def test_closed_polls_are_not_trending(self):
+        closed = self.poll_with_votes('TECH', (0, 50))
+        open_poll = self.poll_with_votes('TECH', (0, 1))
+        refresh_trending(self.now)
+        Poll.objects.filter(pk=closed.pk).update(expiry_date=timezone.now() - timedelta(minutes=1))
+        response = self.client.get(reverse('poll_trending'))
+        self.assertEqual([poll['id'] for poll in response.data], [open_poll.id])
+
+    def test_feed_size_is_bounded_and_query_count_constant(self):
+        for i in range(5):
+            self.poll_with_votes('EDU', (0, i + 1))
+        with self.settings(TRENDING_SIZE=3):
+            refresh_trending(self.now)
+        # polls joined with their rank + options
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('poll_trending'), {'category': 'EDU'})
+        self.assertEqual(len(response.data), 3)
+
+    def test_invalid_category(self):
+        self.assertEqual(self.client.get(reverse('poll_trending'), {'category': 'NOPE'}).status_code, 400)
+
+
+class PollSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.creator = CustomUser.objects.create_user(username='creator', password='pass12345')
+        self.client.force_authenticate(self.creator)
+        self.pets = self.create_poll("Which pets do you keep?", ["Cats", "Dogs"], 'LIFE')
+        self.languages = self.create_poll("Favourite programming language?", ["Python", "Rust"], 'TECH')
+        self.snakes = self.create_poll("Are snakes good pets?", ["Yes", "No"], 'LIFE')
+        self.client.force_authenticate(None)
+
+    def create_poll(self, question, options, category):
+        response = self.client.post(
+            reverse('poll_create'), {'question': question, 'options': options, 'category': category}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return Poll.objects.get(question=question)
+
+    def search(self, **params):
+        response = self.client.get(reverse('poll_search'), params)
+        self.assertEqual(response.status_code, 200)
+        return [poll['id'] for poll in response.data['results']]
+
+    def test_matches_questions_and_options(self):
+        self.assertEqual(self.search(q='python'), [self.languages.id])
+        self.assertEqual(set(self.search(q='pets')), {self.pets.id, self.snakes.id})
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search(q='pets dogs'), [self.pets.id])
+
+    def test_category_filter(self):
+        self.assertEqual(self.search(q='language', category='LIFE'), [])
+
+    def test_syntax_in_terms_is_literal(self):
+        self.assertEqual(self.search(q='"pets" OR NEAR('), [])
+
+    def test_cursor_pages_cover_all_matches(self):
+        seen, url = [], reverse('poll_search') + '?q=pets&page_size=1'
+        while url:
+            response = self.client.get(url)
+            seen += [poll['id'] for poll in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted([self.pets.id, self.snakes.id]))
+
+    def test_edits_are_reindexed(self):
+        admin = CustomUser.objects.create_user(username='admin', password='x', roles='admin')
+        self.client.force_authenticate(admin)
+        self.client.patch(reverse('admin_poll_detail', args=[self.languages.id]), {'question': "Best editor?"})
+        self.assertEqual(self.search(q='programming'), [])
+        self.assertEqual(self.search(q='editor'), [self.languages.id])
+
+    def test_missing_terms(self):
+        self.assertEqual(self.client.get(reverse('poll_search')).status_code, 400)
+
+
+class PollPayloadTests(PollFixtureMixin, TestCase):
+    """The fast-path payloads and renderer must produce exactly the bytes of the DRF serializers."""
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        frozen, closed, upcoming, empty = Poll.objects.order_by('id')[:4]
+        Poll.objects.filter(pk__in=[frozen.pk, closed.pk]).update(expiry_date=now - timedelta(hours=1))
+        freeze_polls([frozen.pk])
+        # Drift after the freeze must not show for the frozen poll
+        Option.objects.filter(poll=frozen).update(vote_count=7)
+        Poll.objects.filter(pk=upcoming.pk).update(
+            expiry_date=now + timedelta(days=1), question="Caf\u00e9 \u2028 \U0001f600 \"quoted\""
+        )
+        Option.objects.filter(poll=empty).delete()
+        Poll.objects.filter(pk=empty.pk).update(total_votes=0)
+
+    def serializer_bytes(self, user):
+        polls = Poll.objects.for_listing().order_by('-created_at', 'id')
+        data = PollSerializer(polls, many=True, context={'request': SimpleNamespace(user=user)}).data
+        return JSONRenderer().render(data)
+
+    def payload_bytes(self, user):
+        return ORJSONRenderer().render(poll_payloads(poll_rows(Poll.objects.order_by('-created_at', 'id')), user))
+
+    def test_poll_payloads_match_poll_serializer(self):
+        for user in (AnonymousUser(), self.user, self.creator):
+            with self.subTest(user=str(user)):
+                self.assertEqual(self.payload_bytes(user), self.serializer_bytes(user))
+
+    def test_results_payloads_match_result_serializer(self):
+        for poll in Poll.objects.select_related('result_snapshot'):
+            with self.subTest(poll=poll.id):
+                results, is_open = results_payload(poll.id)
+                self.assertEqual(ORJSONRenderer().render(results), JSONRenderer().render(PollResultSerializer(poll).data))
+                self.assertEqual(is_open, poll.is_active())
+
+    def test_poll_list_snapshot(self):
+        poll = Poll.objects.order_by('id').last()
+        Poll.objects.filter(pk=poll.pk).update(created_at=datetime(2030, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc))
+        option_ids = list(poll.options.order_by('id').values_list('id', flat=True))
+        response = self.client.get(reverse('poll_list') + '?page_size=1')
+        expected = (
+            '{"id":%d,"question":"Question 4","creator":"creator","category":"TECH",'
+            '"created_at":"2030-01-02T03:04:05.678901Z","expiry_date":null,"options":['
+            '{"id":%d,"text":"Option 0","votes":1,"percentage":50.0},'
+            '{"id":%d,"text":"Option 1","votes":1,"percentage":50.0},'
+            '{"id":%d,"text":"Option 2","votes":0,"percentage":0.0}],"user_vote":null}'
+        ) % (poll.id, *option_ids)
+        self.assertIn(expected.encode(), response.content)
+
+    def test_renderer_falls_back_for_indented_output(self):
+        response = self.client.get(reverse('category_choices'), HTTP_ACCEPT='application/json; indent=2')
+        self.assertIn(b'\n  {\n    "value": "TECH"', response.content)
+
+
+@override_settings(ROOT_URLCONF='pollpro_backend.asgi_urls')
+class PollOptionEditTests(PollFixtureMixin, TestCase):
+    """Updating a poll's options only touches the options that change."""
+    poll_count = 1
+
+    def setUp(self):
+        super().setUp()
+        self.poll = Poll.objects.get()
+        self.options = list(self.poll.options.order_by('id'))
+        VoteHourlyRollup.objects.create(
+            hour=timezone.now().replace(minute=0, second=0, microsecond=0), poll=self.poll,
+            option=self.options[1], category='TECH', votes=1,
+        )
+        self.client.force_authenticate(self.creator)
+
+    def edit(self, options):
+        url = reverse('user_poll_retrieve_update_destroy', args=[self.poll.id])
+        return self.client.patch(url, {'options': options}, format='json')
+
+    def test_plan(self):
+        existing = {1: 'Red', 2: 'Gren', 3: 'Blue', 4: 'Red'}
+        edits = [{'id': None, 'text': 'Red'}, {'id': 2, 'text': 'Green'}, {'id': None, 'text': 'Pink'}]
+        self.assertEqual(plan_option_edits(existing, edits), ({2: 'Green'}, ['Pink'], [3, 4]))
+
+    def test_rename_keeps_votes(self):
+        response = self.edit(['Option 0', {'id': self.options[1].id, 'text': "Option one"}, 'Option 2'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['options'][1], {'id': self.options[1].id, 'text': "Option one"})
+        self.assertEqual(
+            list(self.poll.options.order_by('id').values_list('id', 'text', 'vote_count')),
+            [(self.options[0].id, 'Option 0', 1), (self.options[1].id, 'Option one', 1), (self.options[2].id, 'Option 2', 0)],
+        )
+        self.assertEqual(Vote.objects.filter(poll=self.poll).count(), 2)
+        self.assertEqual(self.client.get(reverse('poll_results', args=[self.poll.id])).json()['options'][1]['text'], "Option one")
+
+    def test_removed_options_lose_only_their_votes(self):
+        response = self.edit(['Option 2', 'Option 0', 'Option 3'])
+        self.assertEqual(response.status_code, 200)
+        options = list(self.poll.options.order_by('id').values_list('text', flat=True))
+        self.assertEqual(options, ['Option 0', 'Option 2', 'Option 3'])
+        self.assertEqual(list(Vote.objects.filter(poll=self.poll).values_list('option_id', flat=True)), [self.options[0].id])
+        self.assertFalse(VoteHourlyRollup.objects.filter(option=self.options[1]).exists())
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.total_votes, 1)
+        # The creator's ballot went with its option, so they may vote again
+        option = self.poll.options.get(text='Option 3')
+        self.assertEqual(self.client.post(reverse('poll_vote', args=[self.poll.id]), {'option': option.id}).status_code, 201)
+
+    def test_unchanged_options_write_nothing(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.edit(['Option 0', 'Option 1', 'Option 2'])
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries.captured_queries if 'polls_option' in q['sql'] and not q['sql'].startswith('SELECT')])
+        self.assertEqual(Vote.objects.filter(poll=self.poll).count(), 2)
+
+    def test_invalid_edits(self):
+        other = Option.objects.create(poll=Poll.objects.create(question="Other", creator=self.creator), text="X")
+        self.assertEqual(self.edit(['Only one']).status_code, 400)
+        self.assertEqual(self.edit(['A', {'id': other.id, 'text': 'B'}]).status_code, 400)
+        self.assertEqual(self.edit([{'id': self.options[0].id, 'text': 'A'}, {'id': self.options[0].id, 'text': 'B'}]).status_code, 400)
+        self.assertEqual(self.edit(['A', {'text': 'B'}]).status_code, 400)
+        self.assertEqual(self.poll.options.count(), 3)
+
+
+class ShardedCounterTests(PollFixtureMixin, TestCase):
+    """Votes on a sharded poll land on shard rows; every read adds them up until compaction folds them."""
+    poll_count = 2
+
+    def setUp(self):
+        super().setUp()
+        self.poll = Poll.objects.order_by('id').first()
+        Poll.objects.filter(pk=self.poll.pk).update(counter_shards=4)
+        self.options = list(self.poll.options.order_by('id'))
+        self.voters = [CustomUser.objects.create_user(username=f'fan{i}', password='pass12345') for i in range(6)]
+        for voter in self.voters:
+            self.client.force_authenticate(voter)
+            response = self.client.post(reverse('poll_vote', args=[self.poll.id]), {'option': self.options[2].id})
+            self.assertEqual(response.status_code, 201)
+
+    def stored(self):
+        return (
+            list(self.poll.options.order_by('id').values_list('vote_count', flat=True)),
+            Poll.objects.get(pk=self.poll.pk).total_votes,
+        )
+
+    def test_votes_go_to_shards(self):
+        self.assertEqual(self.stored(), ([1, 1, 0], 2))
+        self.assertEqual(OptionCounterShard.objects.filter(option=self.options[2]).aggregate(Sum('votes'))['votes__sum'], 6)
+        self.assertLessEqual(OptionCounterShard.objects.count(), 4)
+        results = self.client.get(reverse('poll_results', args=[self.poll.id])).json()
+        self.assertEqual([(o['votes'], o['percentage']) for o in results['options']], [(1, 12.5), (1, 12.5), (6, 75.0)])
+        call_command('rebuild_vote_counters', check=True, stdout=StringIO())
+
+    def test_reads_match_the_serializers(self):
+        self.client.force_authenticate(self.voters[0])
+        polls = Poll.objects.for_listing().order_by('-created_at', 'id')
+        data = PollSerializer(polls, many=True, context={'request': SimpleNamespace(user=self.voters[0])}).data
+        payload = poll_payloads(poll_rows(Poll.objects.order_by('-created_at', 'id')), self.voters[0])
+        self.assertEqual(ORJSONRenderer().render(payload), JSONRenderer().render(data))
+        self.assertEqual([o['votes'] for o in data[-1]['options']], [1, 1, 6])
+        poll = Poll.objects.get(pk=self.poll.pk)
+        results, _ = results_payload(poll.id)
+        self.assertEqual(ORJSONRenderer().render(results), JSONRenderer().render(PollResultSerializer(poll).data))
+
+    def test_retraction_goes_negative_in_a_shard(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.delete(reverse('vote_retract', args=[self.poll.id])).status_code, 200)
+        self.assertEqual(OptionCounterShard.objects.get(option=self.options[0]).votes, -1)
+        results = self.client.get(reverse('poll_results', args=[self.poll.id])).json()
+        self.assertEqual([o['votes'] for o in results['options']], [0, 1, 6])
+        call_command('rebuild_vote_counters', check=True, stdout=StringIO())
+
+    def test_compaction_folds_the_shards(self):
+        self.assertEqual(compact_counters(), (1, 6))
+        self.assertEqual(self.stored(), ([1, 1, 6], 8))
+        self.assertFalse(OptionCounterShard.objects.exclude(votes=0).exists())
+        self.assertEqual(compact_counters(), (0, 0))
+        call_command('rebuild_vote_counters', check=True, stdout=StringIO())
+
+    def test_unsharding_compacts_and_drops_the_shards(self):
+        admin = CustomUser.objects.create_user(username='boss', password='pass12345', roles='admin')
+        self.client.force_authenticate(admin)
+        response = self.client.patch(reverse('admin_poll_detail', args=[self.poll.id]), {'counter_shards': 0}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored(), ([1, 1, 6], 8))
+        self.assertFalse(OptionCounterShard.objects.exists())
+
+    def test_removing_an_option_folds_the_shards_first(self):
+        self.client.force_authenticate(self.creator)
+        url = reverse('user_poll_retrieve_update_destroy', args=[self.poll.id])
+        response = self.client.patch(url, {'options': ['Option 0', 'Option 2']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored(), ([1, 6], 7))
+        call_command('rebuild_vote_counters', check=True, stdout=StringIO())
+
+
+@override_settings(VOTE_INGESTION_MODE='queued')
+class QueuedVoteTests(PollFixtureMixin, TestCase):
+    """Queued ingestion answers 202 at once; the drain applies the votes later with the same checks."""
+    poll_count = 1
+
+    def setUp(self):
+        super().setUp()
+        self.poll = Poll.objects.get()
+        self.options = list(self.poll.options.order_by('id'))
+        self.url = reverse('poll_vote', args=[self.poll.id])
+        self.voter = CustomUser.objects.create_user(username='new_voter', password='pass12345')
+        self.client.force_authenticate(self.voter)
+
+    def vote(self, option):
+        return self.client.post(self.url, {'option': option.id})
+
+    def test_vote_is_queued_then_drained(self):
+        response = self.vote(self.options[2])
+        self.assertEqual((response.status_code, response.data), (202, {"detail": "Vote queued"}))
+        self.assertFalse(Vote.objects.filter(user=self.voter).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(drain_vote_queue(100), (1, 1))
+        self.assertFalse(QueuedVote.objects.exists())
+        self.assertEqual(self.poll.options.get(pk=self.options[2].pk).vote_count, 1)
+        self.assertEqual(get_user_votes(self.voter.id)[self.poll.id], self.options[2].id)
+        self.assertEqual(self.vote(self.options[1]).data, {"error": "You have already voted on this poll"})
+        call_command('rebuild_vote_counters', check=True, stdout=StringIO())
+
+    def test_cached_checks(self):
+        other = Option.objects.create(poll=Poll.objects.create(question="Other", creator=self.creator), text="X")
+        self.assertEqual(self.vote(other).data, {"option": ["Option does not belong to this poll."]})
+        self.assertEqual(self.client.post(reverse('poll_vote', args=[self.poll.id + 100]), {'option': 1}).status_code, 404)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.vote(self.options[2]).data, {"error": "You have already voted on this poll"})
+        self.assertFalse(QueuedVote.objects.exists())
+
+    def test_expiry_is_judged_at_acceptance(self):
+        self.vote(self.options[2])
+        QueuedVote.objects.update(accepted_at=timezone.now() - timedelta(minutes=2))
+        Poll.objects.filter(pk=self.poll.pk).update(expiry_date=timezone.now() - timedelta(minutes=1))
+        before = timezone.now()
+        self.assertEqual(drain_vote_queue(100), (1, 1))
+        # Dated when it was applied, not backdated to its acceptance
+        self.assertGreaterEqual(Vote.objects.get(user=self.voter).created_at, before)
+        # The expiry change went through the ORM directly, so the cached metadata is still open
+        self.client.force_authenticate(CustomUser.objects.create_user(username='late', password='pass12345'))
+        self.assertEqual(self.vote(self.options[2]).status_code, 202)
+        self.assertEqual(drain_vote_queue(100), (1, 0))
+
+    def test_editing_the_poll_refreshes_the_metadata(self):
+        self.vote(self.options[2])
+        self.client.force_authenticate(self.creator)
+        url = reverse('user_poll_retrieve_update_destroy', args=[self.poll.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {'options': ['Option 0', 'Option 1', 'Option 3']}, format='json')
+        added = self.poll.options.get(text='Option 3')
+        self.client.force_authenticate(CustomUser.objects.create_user(username='fan', password='pass12345'))
+        self.assertEqual(self.vote(added).status_code, 202)
+        # The queued vote for the removed option is dropped by the drain
+        self.assertEqual(drain_vote_queue(100), (2, 1))
+
+    def test_duplicates_in_the_queue_count_once(self):
+        self.vote(self.options[2])
+        self.vote(self.options[1])
+        self.assertEqual(drain_vote_queue(1), (1, 1))
+        self.assertEqual(drain_vote_queue(1), (1, 0))
+        call_command('rebuild_vote_counters', check=True, stdout=StringIO())
+
+    def test_status_and_drain_command(self):
+        admin = CustomUser.objects.create_user(username='boss', password='pass12345', roles='admin')
+        self.vote(self.options[2])
+        self.client.force_authenticate(admin)
+        status = self.client.get(reverse('admin_vote_queue')).data
+        self.assertEqual((status['mode'], status['pending']), ('queued', 1))
+        self.assertGreaterEqual(status['lag_seconds'], 0)
+        out = StringIO()
+        call_command('drain_vote_queue', stdout=out)
+        self.assertIn("1 recorded, 0 rejected", out.getvalue())
+        status = self.client.get(reverse('admin_vote_queue')).data
+        self.assertEqual((status['pending'], status['lag_seconds']), (0, 0.0))
+        self.assertIsNotNone(status['last_drain_at'])
+        self.client.force_authenticate(self.voter)
+        self.assertEqual(self.client.get(reverse('admin_vote_queue')).status_code, 403)
+
+
+class AsyncReadViewTests(PollFixtureMixin, TestCase):
+    """The async views served through ASGI must answer exactly like the DRF views."""
+    compared_headers = ('Content-Type', 'Allow', 'Vary', 'ETag', 'WWW-Authenticate')
+
+    def get_both(self, url, **headers):
+        with override_settings(ROOT_URLCONF='pollpro_backend.urls'):
+            sync = self.client.get(url, headers=headers)
+        async_ = async_to_sync(self.async_client.get)(url, headers=headers)
+        return sync, async_
+
+    def assertSameResponse(self, url, **headers):
+        sync, async_ = self.get_both(url, **headers)
+        self.assertEqual(async_.status_code, sync.status_code)
+        self.assertEqual(async_.content, sync.content)
+        for header in self.compared_headers:
+            self.assertEqual(async_.headers.get(header), sync.headers.get(header), header)
+        return async_
+
+    def test_poll_list(self):
+        self.assertSameResponse(reverse('poll_list'))
+        self.assertSameResponse(reverse('poll_list') + '?category=TECH')
+        self.assertSameResponse(reverse('poll_list') + '?category=NOPE')
+
+    def test_poll_list_pages(self):
+        response = self.assertSameResponse(reverse('poll_list') + '?page_size=2')
+        while response.json()['next']:
+            response = self.assertSameResponse(response.json()['next'])
+        response = self.assertSameResponse(response.json()['previous'])
+
+    def test_authenticated_reads_include_user_vote(self):
+        token = f'Bearer {access_token_for(self.user)}'
+        response = self.assertSameResponse(reverse('poll_list'), authorization=token)
+        self.assertIsNotNone(response.json()['results'][0]['user_vote'])
+        self.assertSameResponse(reverse('poll_detail', args=[Poll.objects.first().id]), authorization=token)
+
+    def test_invalid_token_is_rejected(self):
+        response = self.assertSameResponse(reverse('poll_list'), authorization='Bearer not-a-token')
+        self.assertEqual(response.status_code, 401)
+
+    def test_poll_detail(self):
+        self.assertSameResponse(reverse('poll_detail', args=[Poll.objects.first().id]))
+        self.assertEqual(self.assertSameResponse(reverse('poll_detail', args=[999999])).status_code, 404)
+
+    def test_poll_results_and_etag(self):
+        url = reverse('poll_results', args=[Poll.objects.first().id])
+        etag = self.assertSameResponse(url)['ETag']
+        self.assertEqual(self.assertSameResponse(url, if_none_match=etag).status_code, 304)
+        self.assertEqual(self.assertSameResponse(reverse('poll_results', args=[999999])).status_code, 404)
+
+    def test_category_choices(self):
+        self.assertSameResponse(reverse('category_choices'))
+
+    def test_writes_go_to_drf_views(self):
+        poll = Poll.objects.first()
+        response = async_to_sync(self.async_client.delete)(
+            reverse('poll_detail', args=[poll.id]), headers={'authorization': f'Bearer {access_token_for(self.creator)}'}
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Poll.objects.filter(pk=poll.id).exists())
+
+    def test_same_query_count(self):
+        sync, async_ = self.get_both(reverse('poll_list'))
+        query_count = lambda response: response.headers['Server-Timing'].split('desc="')[1].split(' ')[0]
+        self.assertEqual(query_count(async_), query_count(sync))
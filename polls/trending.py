@@ -0,0 +1,58 @@
+# pollpro_backend/polls/trending.py
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from .models import TrendingPoll, VoteHourlyRollup
+
+
+def hotness(rows, now, half_life_hours):
+    """
+    Decayed vote velocity per poll from (poll_id, hour, votes) rows: each hourly bucket counts
+    from its midpoint and loses half its weight every `half_life_hours`.
+    """
+    scores = defaultdict(float)
+    for poll_id, hour, votes in rows:
+        age = max((now - hour - timedelta(minutes=30)).total_seconds() / 3600, 0)
+        scores[poll_id] += votes * 0.5 ** (age / half_life_hours)
+    return scores
+
+
+def refresh_trending(now=None):
+    """
+    Rank open polls by hotness from the hourly vote rollups (no scan of polls_vote) and
+    replace the stored top-K, overall and per category, in one transaction.
+    Returns the number of rows written.
+    """
+    now = now or timezone.now()
+    rows = (
+        VoteHourlyRollup.objects.filter(hour__gte=now - timedelta(hours=settings.TRENDING_WINDOW_HOURS))
+        .filter(Q(poll__expiry_date__isnull=True) | Q(poll__expiry_date__gt=now))
+        .values_list('poll_id', 'poll__category', 'hour')
+        .annotate(votes=Sum('votes'))
+        .order_by()
+    )
+    categories = {}
+    buckets = []
+    for poll_id, category, hour, votes in rows.iterator():
+        categories[poll_id] = category
+        buckets.append((poll_id, hour, votes))
+    scores = hotness(buckets, now, settings.TRENDING_HALF_LIFE_HOURS)
+
+    scopes = {'': list(scores)}
+    for poll_id, category in categories.items():
+        scopes.setdefault(category, []).append(poll_id)
+    entries = [
+        TrendingPoll(scope=scope, rank=rank, poll_id=poll_id, score=scores[poll_id], computed_at=now)
+        for scope, poll_ids in scopes.items()
+        for rank, poll_id in enumerate(
+            heapq.nlargest(settings.TRENDING_SIZE, poll_ids, key=lambda poll_id: (scores[poll_id], -poll_id)), start=1
+        )
+    ]
+    with transaction.atomic():
+        TrendingPoll.objects.all().delete()
+        TrendingPoll.objects.bulk_create(entries)
+    return len(entries)
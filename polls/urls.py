@@ -7,20 +7,30 @@ from .views import (
     PollResultView,
     CategoryChoicesView,
     VoteRetractView,
+    BulkVoteView,
+    UserVoteLookupView,
     UserPollHistoryView,
+    TrendingPollListView,
+    PollSearchView,
     UserPollListCreateView,
     UserPollRetrieveUpdateDestroyView
 )
+from notifications.views import poll_results_stream
 
 urlpatterns = [
     path('', PollListView.as_view(), name='poll_list'),
     path('create/', PollCreateView.as_view(), name='poll_create'),
     path('categories/', CategoryChoicesView.as_view(), name='category_choices'),
+    path('votes/bulk/', BulkVoteView.as_view(), name='poll_vote_bulk'),
+    path('votes/mine/', UserVoteLookupView.as_view(), name='poll_user_votes'),
+    path('search/', PollSearchView.as_view(), name='poll_search'),
+    path('trending/', TrendingPollListView.as_view(), name='poll_trending'),
     path('user-history/', UserPollHistoryView.as_view(), name='user_poll_history'),
     path('<int:pk>/', PollDetailView.as_view(), name='poll_detail'),
     path('<int:pk>/vote/', VoteView.as_view(), name='poll_vote'),
     path('<int:pk>/retract/', VoteRetractView.as_view(), name='vote_retract'),
     path('<int:pk>/results/', PollResultView.as_view(), name='poll_results'),
+    path('<int:pk>/results/stream/', poll_results_stream, name='poll_results_stream'),
     path('user-polls/', UserPollListCreateView.as_view(), name='user_poll_list_create'),
     path('user-polls/<int:pk>/', UserPollRetrieveUpdateDestroyView.as_view(), name='user_poll_retrieve_update_destroy'),
 ]
\ No newline at end of file
@@ -5,10 +5,25 @@ from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from rest_framework.exceptions import NotFound
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from core.metrics import query_budget
 from .models import Poll, Vote
-from .serializers import PollSerializer, PollCreateSerializer, VoteSerializer, PollResultSerializer,PollUpdateSerializer
+from .counters import adjust_vote_counters
+from .cache import bump_results_version, get_cached_results, cache_results, etag_matches, get_user_votes, user_votes_changed
+from .voting import cast_vote, cast_votes, check_ballots, VoteRejected
+from .ingest import enqueue_vote, queued_ingestion
+from .pagination import PollCursorPagination, PollSearchPagination
+from .search import search_polls
+from .payloads import poll_rows, poll_payloads, results_payload
+from .serializers import PollSerializer, PollCreateSerializer, VoteSerializer, PollResultSerializer,PollUpdateSerializer, BulkVoteSerializer, UserVoteLookupSerializer
 from .permissions import IsAdmin, IsAuthenticated, IsAdminOrCreator, IsPollCreator
 
+def poll_not_found():
+    # The error get_object() raises
+    return NotFound(f"No {Poll._meta.object_name} matches the given query.")
+
 class CategoryChoicesView(generics.GenericAPIView):
     permission_classes = []  # Allow anyone to access
 
@@ -48,10 +63,11 @@ class PollCreateView(generics.CreateAPIView):
 class UserPollListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = PollSerializer
+    pagination_class = PollCursorPagination
 
     def get_queryset(self):
         # Filter polls by the authenticated user
-        return Poll.objects.filter(creator=self.request.user).order_by('-created_at')
+        return Poll.objects.for_listing().filter(creator=self.request.user).order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
         """
@@ -60,8 +76,9 @@ class UserPollListCreateView(generics.ListCreateAPIView):
         queryset = self.get_queryset()
         if not queryset.exists():
             return Response({"detail": "No polls found for this user"}, status=status.HTTP_200_OK)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     def perform_create(self, serializer):
         """
@@ -107,9 +124,15 @@ class UserPollRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def perform_destroy(self, instance):
+        bump_results_version(instance.id)
+        instance.delete()
+
+@query_budget(5)
 class PollListView(generics.ListAPIView):
     serializer_class = PollSerializer
     permission_classes = []  # Allow anyone to list polls
+    pagination_class = PollCursorPagination
 
     @swagger_auto_schema(
         operation_description="List all polls with optional category filter",
@@ -128,7 +151,8 @@ class PollListView(generics.ListAPIView):
         """
         This view returns a list of all polls with optional category filtering.
         """
-        queryset = Poll.objects.all().order_by('-created_at')  # Order by newest first
+        # Plain rows: list() serializes them on the fast path (polls.payloads)
+        queryset = Poll.objects.order_by('-created_at')  # Order by newest first
         category = self.request.query_params.get('category', None)
         
         if category:
@@ -144,20 +168,18 @@ class PollListView(generics.ListAPIView):
 
     def list(self, request, *args, **kwargs):
         """
-        Override list method to add additional context or debugging
+        Serialize from `.values()` rows; the output is exactly PollSerializer's
         """
-        queryset = self.get_queryset()
+        queryset = poll_rows(self.get_queryset())
         page = self.paginate_queryset(queryset)
         
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(poll_payloads(page, request.user))
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(poll_payloads(queryset, request.user))
 
 class PollDetailView(generics.RetrieveDestroyAPIView):
-    queryset = Poll.objects.all()
+    queryset = Poll.objects.select_related('result_snapshot')
     serializer_class = PollSerializer
     permission_classes = [IsAdminOrCreator]  # Admins or creators can delete
 
@@ -180,6 +202,11 @@ class PollDetailView(generics.RetrieveDestroyAPIView):
     def delete(self, request, *args, **kwargs):
         return super().delete(request, *args, **kwargs)
 
+    def perform_destroy(self, instance):
+        bump_results_version(instance.id)
+        instance.delete()
+
+@query_budget(5)
 class VoteView(generics.CreateAPIView):
     queryset = Vote.objects.all()
     serializer_class = VoteSerializer
@@ -190,34 +217,99 @@ class VoteView(generics.CreateAPIView):
         responses={201: openapi.Response('Vote recorded', openapi.Schema(
             type=openapi.TYPE_OBJECT,
             properties={'detail': openapi.Schema(type=openapi.TYPE_STRING)}
-        )), 400: 'Invalid input', 401: 'Unauthorized', 404: 'Poll not found'}
+        )), 202: 'Vote queued (VOTE_INGESTION_MODE=queued)', 400: 'Invalid input', 401: 'Unauthorized', 404: 'Poll not found'}
     )
     def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if queued_ingestion():
+            try:
+                enqueue_vote(self.kwargs['pk'], serializer.validated_data['option'], request.user.id)
+            except VoteRejected as rejection:
+                return Response(rejection.detail, status=rejection.status_code)
+            return Response({"detail": "Vote queued"}, status=status.HTTP_202_ACCEPTED)
         try:
-            poll = Poll.objects.get(pk=self.kwargs['pk'])
-            
-            # Check if poll is active
-            if not poll.is_active():
-                return Response(
-                    {"error": "Cannot vote on an expired poll"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Check if user has already voted
-            existing_vote = Vote.objects.filter(poll=poll, user=request.user).first()
-            if existing_vote:
-                return Response(
-                    {"error": "You have already voted on this poll"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            serializer = self.get_serializer(data=request.data, context={'poll': poll, 'request': request})
-            serializer.is_valid(raise_exception=True)
-            Vote.objects.create(poll=poll, user=request.user, **serializer.validated_data)
-            return Response({"detail": "Vote recorded"}, status=status.HTTP_201_CREATED)
-            
-        except Poll.DoesNotExist:
-            return Response({"error": "Poll not found"}, status=status.HTTP_404_NOT_FOUND)
+            # Existence, option ownership, expiry and duplicates are all checked by the insert itself
+            cast_vote(self.kwargs['pk'], serializer.validated_data['option'], request.user.id)
+        except VoteRejected as rejection:
+            return Response(rejection.detail, status=rejection.status_code)
+        return Response({"detail": "Vote recorded"}, status=status.HTTP_201_CREATED)
+
+class BulkVoteView(generics.GenericAPIView):
+    serializer_class = BulkVoteSerializer
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Submit many votes at once, e.g. from kiosk or offline-sync clients (authenticated users only). "
+            "Admins may set `user` on each item to vote on behalf of other users. "
+            "Each item is reported as created or rejected with a reason."
+        ),
+        responses={200: openapi.Response('Per-item results', openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'created': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'rejected': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            }
+        )), 400: 'Invalid input', 401: 'Unauthorized', 403: 'Voting for other users requires admin'}
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['votes']
+
+        is_admin = request.user.roles == 'admin'
+        if not is_admin and any(item.get('user', request.user.id) != request.user.id for item in items):
+            return Response(
+                {"error": "Only admins can vote on behalf of other users"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        ballots = [(item['poll'], item['option'], item.get('user', request.user.id)) for item in items]
+        errors = check_ballots(ballots, check_users=is_admin)
+        recorded = cast_votes(ballot for ballot, error in zip(ballots, errors) if error is None)
+
+        results = []
+        for ballot, error in zip(ballots, errors):
+            if error is None and ballot not in recorded:
+                # Lost a race with a concurrent vote or expiry after validation
+                error = "You have already voted on this poll or it has expired"
+            poll_id, option_id, user_id = ballot
+            result = {'poll': poll_id, 'option': option_id, 'user': user_id, 'status': 'created' if error is None else 'rejected'}
+            if error is not None:
+                result['error'] = error
+            results.append(result)
+        return Response({
+            'created': len(recorded),
+            'rejected': len(results) - len(recorded),
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+@query_budget(3)
+class UserVoteLookupView(generics.GenericAPIView):
+    serializer_class = UserVoteLookupSerializer
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description=(
+            "The requesting user's choice on each of up to 300 polls: a map of poll id to the option voted "
+            "for, or null. Answered from the user's cached voted set (authenticated users only)."
+        ),
+        query_serializer=UserVoteLookupSerializer,
+        responses={200: openapi.Response('Choices by poll id', openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={'votes': openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                additional_properties=openapi.Schema(type=openapi.TYPE_INTEGER, x_nullable=True),
+            )}
+        )), 400: 'Invalid or too many ids', 401: 'Unauthorized'}
+    )
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        votes = get_user_votes(request.user.id)
+        return Response({'votes': {poll_id: votes.get(poll_id) for poll_id in serializer.validated_data['ids']}})
 
 class VoteRetractView(generics.DestroyAPIView):
     queryset = Vote.objects.all()
@@ -241,28 +333,121 @@ class VoteRetractView(generics.DestroyAPIView):
             if not poll.is_active():
                 return Response({"error": "Cannot retract vote on an expired poll"}, status=status.HTTP_400_BAD_REQUEST)
             vote = Vote.objects.get(poll=poll, user=request.user)
-            vote.delete()
+            with transaction.atomic():
+                # A concurrent retract may have deleted it already; only the one that did counts it
+                deleted, _ = Vote.objects.filter(pk=vote.pk).delete()
+                if not deleted:
+                    raise Vote.DoesNotExist
+                adjust_vote_counters([(vote.poll_id, vote.option_id)], delta=-1)
+                user_votes_changed(request.user.id, {poll.id: None})
             return Response({"detail": "Vote retracted"}, status=status.HTTP_200_OK)
         except Poll.DoesNotExist:
             return Response({"error": "Poll not found"}, status=status.HTTP_404_NOT_FOUND)
         except Vote.DoesNotExist:
             return Response({"error": "No vote found to retract"}, status=status.HTTP_400_BAD_REQUEST)
 
+@query_budget(3)
 class PollResultView(generics.RetrieveAPIView):
-    queryset = Poll.objects.all()
+    # Only cache misses read the poll, and what they read is cached under the current
+    # version: a lagging replica would pin stale results, so read from the primary
+    queryset = Poll.objects.select_related('result_snapshot').using('default')
     serializer_class = PollResultSerializer
     permission_classes = []  
 
     @swagger_auto_schema(
-        operation_description="View poll results",
-        responses={200: PollResultSerializer, 404: 'Not found'}
+        operation_description="View poll results. Supports If-None-Match conditional requests.",
+        responses={200: PollResultSerializer, 304: 'Not modified', 404: 'Not found'}
     )
     def get(self, request, *args, **kwargs):
+        version, entry = get_cached_results(self.kwargs['pk'])
+        if entry is None:
+            # PollResultSerializer's output, built from rows (polls.payloads)
+            found = results_payload(self.kwargs['pk'], using='default')
+            if found is None:
+                raise poll_not_found()
+            entry = cache_results(self.kwargs['pk'], version, *found)
+
+        headers = {'ETag': entry['etag']}
+        if etag_matches(request.headers.get('If-None-Match'), entry['etag']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry['data'], headers=headers)
+
+@query_budget(5)
+class TrendingPollListView(generics.ListAPIView):
+    serializer_class = PollSerializer
+    permission_classes = []
+    pagination_class = None
+
+    @swagger_auto_schema(
+        operation_description="Open polls ranked by recent vote velocity, overall or within one category. Refreshed periodically by `manage.py refresh_trending`.",
+        manual_parameters=[
+            openapi.Parameter(
+                name='category',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=[choice[0] for choice in Poll.CATEGORY_CHOICES],
+                description='Rank within one category. Leave empty for all categories.'
+            )
+        ],
+        responses={200: PollSerializer(many=True), 400: 'Invalid category'}
+    )
+    def get(self, request, *args, **kwargs):
+        category = request.query_params.get('category', '')
+        if category and category not in dict(Poll.CATEGORY_CHOICES):
+            return Response({"error": "Invalid category"}, status=status.HTTP_400_BAD_REQUEST)
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        # At most TRENDING_SIZE rows read through the (scope, rank) index; polls that closed
+        # since the last refresh drop out straight away
+        now = timezone.now()
+        return (
+            Poll.objects.for_listing()
+            .filter(trending__scope=self.request.query_params.get('category', ''))
+            .filter(Q(expiry_date__isnull=True) | Q(expiry_date__gt=now))
+            .order_by('trending__rank')
+        )
+
+@query_budget(5)
+class PollSearchView(generics.ListAPIView):
+    serializer_class = PollSerializer
+    permission_classes = []
+    pagination_class = PollSearchPagination
+
+    @swagger_auto_schema(
+        operation_description="Full-text search over poll questions and options, best match first. Cursor-paginated.",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True, description='Search terms'),
+            openapi.Parameter(
+                name='category',
+                in_=openapi.IN_QUERY,
+                type=openapi.TYPE_STRING,
+                enum=[choice[0] for choice in Poll.CATEGORY_CHOICES],
+                description='Restrict to one category.'
+            ),
+        ],
+        responses={200: PollSerializer(many=True), 400: 'Missing search terms or invalid category'}
+    )
+    def get(self, request, *args, **kwargs):
+        if not request.query_params.get('q', '').strip():
+            return Response({"error": "Search terms required"}, status=status.HTTP_400_BAD_REQUEST)
+        category = request.query_params.get('category')
+        if category and category not in dict(Poll.CATEGORY_CHOICES):
+            return Response({"error": "Invalid category"}, status=status.HTTP_400_BAD_REQUEST)
         return super().get(request, *args, **kwargs)
 
+    def get_queryset(self):
+        queryset = Poll.objects.for_listing()
+        category = self.request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category=category)
+        return search_polls(queryset, self.request.query_params['q'].strip())
+
+@query_budget(5)
 class UserPollHistoryView(generics.ListAPIView):
     serializer_class = PollSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PollCursorPagination
 
     @swagger_auto_schema(
         operation_description="List polls the user has voted in (authenticated users only)",
@@ -273,4 +458,4 @@ class UserPollHistoryView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return Poll.objects.filter(votes__user=user).distinct().order_by('-created_at')
\ No newline at end of file
+        return Poll.objects.for_listing().filter(votes__user=user).distinct().order_by('-created_at')
\ No newline at end of file
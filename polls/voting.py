@@ -0,0 +1,199 @@
+# pollpro_backend/polls/voting.py
+from collections import defaultdict
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from rest_framework import status
+from users.models import CustomUser
+from .models import Poll, Option, OptionCounterShard, Vote
+from .cache import user_votes_changed
+from .counters import adjust_vote_counters, votes_changed
+
+
+class VoteRejected(Exception):
+    def __init__(self, detail, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+def _insert_sql(with_counters):
+    qn = connection.ops.quote_name
+    vote, option, poll = Vote._meta.db_table, Option._meta.db_table, Poll._meta.db_table
+    shard = OptionCounterShard._meta.db_table
+    # The option->poll join and the expiry check make an invalid or late vote insert nothing;
+    # the (poll, user) unique constraint turns a duplicate into a no-op instead of an IntegrityError.
+    insert = f"""
+        INSERT INTO {qn(vote)} (poll_id, option_id, user_id, created_at)
+        SELECT o.poll_id, o.id, %s, %s
+        FROM {qn(option)} o INNER JOIN {qn(poll)} p ON p.id = o.poll_id
+        WHERE o.id = %s AND o.poll_id = %s AND (p.expiry_date IS NULL OR p.expiry_date > %s)
+        ON CONFLICT (poll_id, user_id) DO NOTHING
+        RETURNING id, poll_id, option_id
+    """
+    if not with_counters:
+        return insert
+    # Postgres can bump both counters, or a random shard of a sharded poll, in the same
+    # statement (mirrors adjust_vote_counters)
+    return f"""
+        WITH ins AS ({insert}),
+        cnt AS (
+            SELECT ins.poll_id, ins.option_id, p.counter_shards
+            FROM ins INNER JOIN {qn(poll)} p ON p.id = ins.poll_id
+        ),
+        opt AS (
+            UPDATE {qn(option)} SET vote_count = vote_count + 1
+            WHERE id IN (SELECT option_id FROM cnt WHERE counter_shards = 0)
+        ),
+        pl AS (
+            UPDATE {qn(poll)} SET total_votes = total_votes + 1
+            WHERE id IN (SELECT poll_id FROM cnt WHERE counter_shards = 0)
+        ),
+        sh AS (
+            INSERT INTO {qn(shard)} (poll_id, option_id, shard, votes)
+            SELECT poll_id, option_id, floor(random() * counter_shards)::int, 1 FROM cnt WHERE counter_shards > 0
+            ON CONFLICT (option_id, shard) DO UPDATE SET votes = {qn(shard)}.votes + 1
+        )
+        SELECT id, poll_id, option_id FROM ins
+    """
+
+
+def _rejection(poll_id, option_id, user_id):
+    """Explain why the insert matched no row, with a single query."""
+    poll = Poll.objects.filter(pk=poll_id).annotate(
+        has_option=Exists(Option.objects.filter(pk=option_id, poll=OuterRef('pk'))),
+        has_voted=Exists(Vote.objects.filter(poll=OuterRef('pk'), user_id=user_id)),
+    ).only('id', 'expiry_date').first()
+    if poll is None:
+        return VoteRejected({"error": "Poll not found"}, status.HTTP_404_NOT_FOUND)
+    if not poll.is_active():
+        return VoteRejected({"error": "Cannot vote on an expired poll"})
+    if poll.has_voted:
+        return VoteRejected({"error": "You have already voted on this poll"})
+    if not poll.has_option:
+        return VoteRejected({"option": ["Option does not belong to this poll."]})
+    # The poll expired or the vote was retracted between the two queries
+    return VoteRejected({"error": "Vote could not be recorded, please retry"})
+
+
+def cast_vote(poll_id, option_id, user_id):
+    """
+    Record a vote in one round trip on Postgres (insert plus counters) or three on other
+    backends. A rejected vote costs one more query to explain itself and raises VoteRejected.
+    Returns the new vote id.
+    """
+    now = timezone.now()
+    db_now = connection.ops.adapt_datetimefield_value(now)
+    with_counters = connection.vendor == 'postgresql'
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_insert_sql(with_counters), [user_id, db_now, option_id, poll_id, db_now])
+            row = cursor.fetchone()
+        if row is None:
+            raise _rejection(poll_id, option_id, user_id)
+        vote_id, poll_id, option_id = row
+        if with_counters:
+            votes_changed(poll_id, {option_id: 1})
+        else:
+            adjust_vote_counters([(poll_id, option_id)])
+        user_votes_changed(user_id, {poll_id: option_id})
+    return vote_id
+
+
+def voter_deleted(sender, instance, **kwargs):
+    """
+    pre_delete receiver for CustomUser, however the user is deleted: the user's votes are about
+    to cascade away in the same transaction, so take them off the counters and the voted set.
+    """
+    votes = list(Vote.objects.filter(user_id=instance.pk).values_list('poll_id', 'option_id'))
+    if votes:
+        adjust_vote_counters(votes, delta=-1)
+        user_votes_changed(instance.pk, {poll_id: None for poll_id, _ in votes})
+
+
+def _bulk_insert_sql(count):
+    qn = connection.ops.quote_name
+    vote, option, poll = Vote._meta.db_table, Option._meta.db_table, Poll._meta.db_table
+    values = ', '.join(['(%s, %s, %s, %s)'] * count)
+    return f"""
+        WITH v (poll_id, option_id, user_id, cast_at) AS (VALUES {values})
+        INSERT INTO {qn(vote)} (poll_id, option_id, user_id, created_at)
+        SELECT o.poll_id, o.id, v.user_id, %s
+        FROM v
+        INNER JOIN {qn(option)} o ON o.id = v.option_id AND o.poll_id = v.poll_id
+        INNER JOIN {qn(poll)} p ON p.id = o.poll_id
+        WHERE p.expiry_date IS NULL OR p.expiry_date > v.cast_at
+        ON CONFLICT (poll_id, user_id) DO NOTHING
+        RETURNING poll_id, option_id, user_id
+    """
+
+
+def cast_votes(ballots):
+    """
+    Insert many (poll_id, option_id, user_id) ballots in one transaction and return the set
+    of ballots that were actually recorded.
+
+    Like cast_vote, validity is re-checked by the INSERT itself and duplicates are skipped
+    with ON CONFLICT DO NOTHING. Unlike bulk_create(ignore_conflicts=True), RETURNING tells
+    exactly which rows landed even when racing other voters, so the counters stay exact.
+    """
+    now = timezone.now()
+    return record_votes((poll_id, option_id, user_id, now) for poll_id, option_id, user_id in ballots)
+
+
+def record_votes(rows):
+    """
+    cast_votes for (poll_id, option_id, user_id, cast_at) rows, e.g. votes accepted earlier:
+    each vote is checked against the poll's expiry at its own cast_at. created_at is still
+    the insert time, so it keeps growing with the vote ids.
+    """
+    rows = list(rows)
+    if not rows:
+        return set()
+    adapt = connection.ops.adapt_datetimefield_value
+    params = [value for *ballot, cast_at in rows for value in (*ballot, adapt(cast_at))]
+    params.append(adapt(timezone.now()))
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(_bulk_insert_sql(len(rows)), params)
+            recorded = {tuple(row) for row in cursor.fetchall()}
+        adjust_vote_counters((poll_id, option_id) for poll_id, option_id, _ in recorded)
+        per_user = defaultdict(dict)
+        for poll_id, option_id, user_id in recorded:
+            per_user[user_id][poll_id] = option_id
+        for user_id, changes in per_user.items():
+            user_votes_changed(user_id, changes)
+    return recorded
+
+
+def check_ballots(ballots, check_users=False):
+    """
+    Validate (poll_id, option_id, user_id) ballots with a fixed number of set-based queries
+    and return one error message (or None) per ballot, in order.
+    """
+    poll_ids = {poll_id for poll_id, _, _ in ballots}
+    user_ids = {user_id for _, _, user_id in ballots}
+    polls = dict(Poll.objects.filter(pk__in=poll_ids).values_list('id', 'expiry_date'))
+    options = dict(Option.objects.filter(pk__in={o for _, o, _ in ballots}).values_list('id', 'poll_id'))
+    voted = set(Vote.objects.filter(poll_id__in=poll_ids, user_id__in=user_ids).values_list('poll_id', 'user_id'))
+    users = set(CustomUser.objects.filter(pk__in=user_ids, is_active=True).values_list('id', flat=True)) if check_users else user_ids
+
+    now = timezone.now()
+    seen = set()
+    errors = []
+    for poll_id, option_id, user_id in ballots:
+        if poll_id not in polls:
+            error = "Poll not found"
+        elif polls[poll_id] is not None and polls[poll_id] <= now:
+            error = "Cannot vote on an expired poll"
+        elif options.get(option_id) != poll_id:
+            error = "Option does not belong to this poll."
+        elif user_id not in users:
+            error = "User not found"
+        elif (poll_id, user_id) in voted or (poll_id, user_id) in seen:
+            error = "You have already voted on this poll"
+        else:
+            error = None
+            seen.add((poll_id, user_id))
+        errors.append(error)
+    return errors
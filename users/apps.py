@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, pre_save
+        from .models import CustomUser
+        from .tokens import user_deleted, user_saving
+        pre_save.connect(user_saving, sender=CustomUser, dispatch_uid='users.user_saving')
+        post_delete.connect(user_deleted, sender=CustomUser, dispatch_uid='users.user_deleted')
@@ -0,0 +1,142 @@
+# pollpro_backend/users/authentication.py
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from core.metrics import unmetered
+from .models import CustomUser, DeletedUser
+
+# Model fields rebuilt from token claims; everything else is loaded lazily on first access
+CLAIM_FIELDS = ('username', 'roles')
+
+
+class RevocationList:
+    """
+    Process-local snapshot of what invalidates an otherwise valid access token: blacklisted
+    JTIs and users whose claims changed or who were deleted. It is reloaded from the database at most every
+    `refresh_seconds`, which bounds how long another worker's logout or role change can go
+    unnoticed; changes made by this process are applied immediately.
+    """
+
+    def __init__(self, refresh_seconds):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._jtis = frozenset()
+        self._changed = {}
+        self._loaded_at = None
+
+    def is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    def refresh_if_stale(self):
+        if not self.is_stale():
+            return
+        # Only the first load blocks; later, one thread reloads while the others keep the current snapshot
+        if not self._lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            # The reload serves every request of this process, not just the one that triggered it
+            with unmetered():
+                now = timezone.now()
+                jtis = frozenset(
+                    BlacklistedToken.objects.filter(token__expires_at__gt=now).values_list('token__jti', flat=True)
+                )
+                cutoff = now - api_settings.ACCESS_TOKEN_LIFETIME
+                # A deleted user's tokens fall back to the database lookup, which rejects them
+                changed = {}
+                for user_id, changed_at in CustomUser.objects.filter(claims_changed_at__gt=cutoff).values_list(
+                    'id', 'claims_changed_at'
+                ).union(
+                    DeletedUser.objects.filter(deleted_at__gt=cutoff).values_list('user_id', 'deleted_at'), all=True
+                ):
+                    changed[user_id] = max(changed_at, changed.get(user_id, changed_at))
+            self._jtis, self._changed = jtis, changed
+            self._loaded_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def is_blacklisted(self, jti):
+        return jti in self._jtis
+
+    def changed_since(self, user_id, issued_at):
+        changed_at = self._changed.get(user_id)
+        return changed_at is not None and changed_at > issued_at
+
+    def blacklist(self, jti):
+        with self._lock:
+            self._jtis = self._jtis | {jti}
+
+    def claims_changed(self, user_id, changed_at):
+        with self._lock:
+            self._changed = {**self._changed, user_id: changed_at}
+
+    def clear(self):
+        with self._lock:
+            self._jtis, self._changed, self._loaded_at = frozenset(), {}, None
+
+
+revocations = RevocationList(settings.JWT_REVOCATION_REFRESH_SECONDS)
+
+
+def user_from_claims(validated_token):
+    """
+    A CustomUser built from token claims without a query. The remaining fields are deferred
+    exactly as with `.only()`, so code that needs e.g. the email still gets it on access,
+    and save() writes back only the fields that were loaded or assigned.
+    """
+    values = {
+        'id': validated_token[api_settings.USER_ID_CLAIM],
+        'is_active': True,
+        **{field: validated_token[field] for field in CLAIM_FIELDS},
+    }
+    fields = [f.attname for f in CustomUser._meta.concrete_fields if f.attname in values]
+    return CustomUser.from_db('default', fields, [values[name] for name in fields])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the role claims of the token instead of loading the user
+    on every request. Tokens that are blacklisted, predate a change of the user's claims or
+    carry no role claims fall back to the usual database checks.
+    """
+
+    def get_user(self, validated_token):
+        revocations.refresh_if_stale()
+        user = self.claims_user(validated_token)
+        return user if user is not None else super().get_user(validated_token)
+
+    def claims_user(self, validated_token):
+        """The user rebuilt from the token's claims, or None when they cannot be trusted."""
+        if revocations.is_blacklisted(validated_token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken("Token is blacklisted")
+        if not all(field in validated_token for field in CLAIM_FIELDS + (api_settings.USER_ID_CLAIM, 'iat')):
+            return None
+        issued_at = datetime.fromtimestamp(validated_token['iat'], tz=dt_timezone.utc)
+        if revocations.changed_since(validated_token[api_settings.USER_ID_CLAIM], issued_at):
+            return None
+        return user_from_claims(validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views on a plain Django request. The database is only
+        touched, from a worker thread, where the sync path would touch it.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if revocations.is_stale():
+            await sync_to_async(revocations.refresh_if_stale)()
+        user = self.claims_user(validated_token)
+        if user is None:
+            user = await sync_to_async(super().get_user)(validated_token)
+        return user, validated_token
@@ -12,10 +12,40 @@ class CustomUser(AbstractUser):
         choices=ROLE_CHOICES,
         default='user',
     )
+    # Set whenever a claim baked into access tokens (username, roles, is_active) changes,
+    # so tokens issued before it stop being trusted without a database lookup
+    claims_changed_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+
+    CLAIM_CHANGE_FIELDS = ('username', 'roles', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # Compared on save by users.tokens.user_saving, which stamps claims_changed_at
+        user.loaded_claims = user.current_claims()
+        return user
+
+    def current_claims(self):
+        """The claim fields' values, or None when some of them were deferred."""
+        if self.get_deferred_fields() & set(self.CLAIM_CHANGE_FIELDS):
+            return None
+        return tuple(getattr(self, field) for field in self.CLAIM_CHANGE_FIELDS)
 
     def __str__(self):
         return self.username
 
     class Meta:
         verbose_name = 'User'
-        verbose_name_plural = 'Users'
\ No newline at end of file
+        verbose_name_plural = 'Users'
+
+class DeletedUser(models.Model):
+    """
+    A user deleted less than ACCESS_TOKEN_LIFETIME ago. Their access tokens are still validly
+    signed, so users.authentication.RevocationList loads these ids to stop trusting them.
+    """
+    # The user row is gone, so this is a plain id rather than a foreign key
+    user_id = models.BigIntegerField(primary_key=True)
+    deleted_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"User {self.user_id} deleted at {self.deleted_at}"
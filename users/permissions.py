@@ -15,4 +15,4 @@ class IsAdminOrCreator(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # Allow deletion if user is admin or the poll's creator
-        return request.user.roles == 'admin' or obj.creator == request.user
\ No newline at end of file
+        return request.user.roles == 'admin' or obj.creator_id == request.user.id
\ No newline at end of file
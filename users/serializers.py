@@ -35,4 +35,4 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = CustomUser
         fields = ('id', 'username', 'email', 'roles')
-        ref_name = 'UserAppUserSerializer' 
\ No newline at end of file
+        ref_name = 'UserAppUserSerializer'
@@ -1,3 +1,113 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import revocations
+from .models import CustomUser
+from .tokens import access_token_for, claims_changed
 
-# Create your tests here.
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        revocations.clear()
+        self.admin = CustomUser.objects.create_user(username='admin', password='pw-Admin-123', roles='admin')
+        self.user = CustomUser.objects.create_user(username='alice', email='alice@example.com', password='pw-Alice-123')
+        self.client = APIClient()
+        # Load the revocation list up front so it is not counted below
+        revocations.refresh_if_stale()
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_claims_token_needs_no_auth_query(self):
+        self.authenticate(access_token_for(self.admin))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('category_choices'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_admin_permission_uses_role_claim(self):
+        self.authenticate(access_token_for(self.user))
+        self.assertEqual(self.client.get(reverse('admin_user_list')).status_code, 403)
+
+    def test_deferred_fields_load_on_access(self):
+        self.authenticate(access_token_for(self.user))
+        response = self.client.get(reverse('user_detail'))
+        self.assertEqual(response.data['email'], 'alice@example.com')
+
+    def test_token_without_claims_falls_back_to_database(self):
+        self.authenticate(AccessToken.for_user(self.admin))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('category_choices'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_login_issues_claims(self):
+        response = self.client.post(reverse('login'), {'username': 'admin', 'password': 'pw-Admin-123'})
+        self.assertEqual(AccessToken(response.data['access'])['roles'], 'admin')
+
+    def test_logout_blacklists_access_token(self):
+        login = self.client.post(reverse('login'), {'username': 'alice', 'password': 'pw-Alice-123'}).data
+        self.authenticate(login['access'])
+        response = self.client.post(reverse('logout'), {'refresh': login['refresh']})
+        self.assertEqual(response.status_code, 205)
+        self.assertEqual(self.client.get(reverse('user_detail')).status_code, 401)
+
+    def test_role_change_overrides_older_tokens(self):
+        token = access_token_for(self.user)
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(reverse('admin_user_detail', args=[self.user.id]), {'roles': 'admin'})
+        self.assertEqual(response.status_code, 200)
+
+        self.client.force_authenticate(None)
+        self.authenticate(token)
+        self.assertEqual(self.client.get(reverse('admin_user_list')).status_code, 200)
+
+    def test_deactivation_rejects_older_tokens(self):
+        token = access_token_for(self.user)
+        self.client.force_authenticate(self.admin)
+        self.client.patch(reverse('admin_user_detail', args=[self.user.id]), {'is_active': False})
+
+        self.client.force_authenticate(None)
+        self.authenticate(token)
+        self.assertEqual(self.client.get(reverse('user_detail')).status_code, 401)
+
+    def test_other_workers_changes_seen_after_refresh(self):
+        token = access_token_for(self.user)
+        # Simulate another worker: the change is in the database but not in the local list
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.authenticate(token)
+        self.assertEqual(self.client.get(reverse('user_detail')).status_code, 200)
+
+        claims_changed(self.user)
+        self.user.save(update_fields=['claims_changed_at'])
+        revocations.clear()
+        self.assertEqual(self.client.get(reverse('user_detail')).status_code, 401)
+
+    def test_deleted_users_tokens_are_rejected(self):
+        token = access_token_for(self.admin)
+        self.client.force_authenticate(CustomUser.objects.create_user(username='root', password='x', roles='admin'))
+        self.assertEqual(self.client.delete(reverse('admin_user_detail', args=[self.admin.id])).status_code, 204)
+
+        self.client.force_authenticate(None)
+        self.authenticate(token)
+        self.assertEqual(self.client.get(reverse('admin_user_list')).status_code, 401)
+        # Other workers learn of the deletion on their next refresh
+        revocations.clear()
+        self.assertEqual(self.client.get(reverse('user_detail')).status_code, 401)
+
+    def test_any_save_of_a_claim_change_overrides_older_tokens(self):
+        # As the Django admin site or a shell session would save it
+        token = access_token_for(self.user)
+        user = CustomUser.objects.get(pk=self.user.pk)
+        user.email = 'alice@example.com'
+        user.save()
+        self.assertIsNone(CustomUser.objects.get(pk=self.user.pk).claims_changed_at)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        self.assertIsNotNone(CustomUser.objects.get(pk=self.user.pk).claims_changed_at)
+
+        self.authenticate(token)
+        self.assertEqual(self.client.get(reverse('user_detail')).status_code, 401)
@@ -0,0 +1,89 @@
+# pollpro_backend/users/tokens.py
+from datetime import datetime, timezone as dt_timezone
+from django.utils import timezone
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .authentication import CLAIM_FIELDS, revocations
+from .models import CustomUser, DeletedUser
+
+
+def set_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    return token
+
+
+def access_token_for(user):
+    """An access token carrying the claims ClaimsJWTAuthentication needs to skip the user lookup."""
+    return set_claims(AccessToken.for_user(user), user)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens always carry the user's current claims."""
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = CustomUser.objects.only(*CLAIM_FIELDS).get(pk=self[api_settings.USER_ID_CLAIM])
+        return set_claims(access, user)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+
+def blacklist_access_token(token):
+    """
+    Blacklist an access token until it expires. simplejwt only tracks refresh tokens, so an
+    outstanding row is recorded for it first.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            'user_id': token.get(api_settings.USER_ID_CLAIM),
+            'token': str(token),
+            'created_at': datetime.fromtimestamp(token['iat'], tz=dt_timezone.utc),
+            'expires_at': datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+        },
+    )
+    BlacklistedToken.objects.get_or_create(token=outstanding)
+    revocations.blacklist(jti)
+
+
+def claims_changed(user):
+    """Stamp a change of username, roles or is_active; user_saving calls it before the user is saved."""
+    user.claims_changed_at = timezone.now()
+    revocations.claims_changed(user.pk, user.claims_changed_at)
+
+
+def user_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    pre_save receiver for CustomUser, however the user is saved (API, Django admin site, shell):
+    stamp claims_changed_at when the username, roles or is_active differ from what was loaded.
+    """
+    loaded = getattr(instance, 'loaded_claims', None)
+    current = instance.current_claims()
+    if raw or loaded is None or current is None or loaded == current:
+        return
+    claims_changed(instance)
+    instance.loaded_claims = current
+    if update_fields is not None and 'claims_changed_at' not in update_fields:
+        CustomUser.objects.filter(pk=instance.pk).update(claims_changed_at=instance.claims_changed_at)
+
+
+def user_deleted(sender, instance, **kwargs):
+    """
+    post_delete receiver for CustomUser, however the user was deleted: record the deletion so
+    every worker stops trusting the user's access tokens, and prune records that outlived them.
+    """
+    now = timezone.now()
+    DeletedUser.objects.update_or_create(user_id=instance.pk, defaults={'deleted_at': now})
+    DeletedUser.objects.filter(deleted_at__lte=now - api_settings.ACCESS_TOKEN_LIFETIME).delete()
+    revocations.claims_changed(instance.pk, now)
@@ -1,11 +1,14 @@
 # pollpro_backend/users/views.py
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import blacklist_access_token
 from .serializers import UserRegisterSerializer, UserSerializer
 from polls.permissions import IsAdmin
+from pollpro_admin.filters import UserFilter, filter_parameters
+from pollpro_admin.pagination import AdminCursorPagination
 from .models import CustomUser
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -62,7 +65,7 @@ class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
-        operation_description="Logout by blacklisting the refresh token.",
+        operation_description="Logout by blacklisting the refresh token and the access token of the request.",
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
             required=['refresh'],
@@ -82,21 +85,27 @@ class LogoutView(APIView):
                 return Response({"error": "Refresh token required"}, status=status.HTTP_400_BAD_REQUEST)
             token = RefreshToken(refresh_token)
             token.blacklist()
+            # The access token used for this request would otherwise stay valid until it expires
+            if request.auth is not None:
+                blacklist_access_token(request.auth)
             return Response({"detail": "Successfully logged out"}, status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-class AdminUserManagementView(APIView):
+class AdminUserManagementView(generics.ListAPIView):
+    queryset = CustomUser.objects.all()
+    serializer_class = UserSerializer
     permission_classes = [IsAdmin]
+    filterset_class = UserFilter
+    pagination_class = AdminCursorPagination
 
     @swagger_auto_schema(
-        operation_description="List all users (admin only).",
-        responses={
-            200: openapi.Response("List of all users", UserSerializer(many=True)),
-            403: "Permission denied"
-        }
+        operation_description=(
+            "List users, newest first (admin only). Filter by `role`, `is_active` and date "
+            "joined (`since`, `until`)."
+        ),
+        manual_parameters=filter_parameters(UserFilter),
+        responses={403: "Permission denied"}
     )
-    def get(self, request):
-        users = CustomUser.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
\ No newline at end of file